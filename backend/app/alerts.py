@@ -0,0 +1,362 @@
+"""Price alerts evaluated on every tick.
+
+Users set alerts such as "AAPL above 200", "AAPL below 180" or "AAPL moves
+3%". Each alert is reduced to one or two price levels: a move alert sets
+one level above and one below its base price (the price when it was set).
+Per ticker, levels that fire on a rise are kept in one sorted NumPy array
+and levels that fire on a fall in another, stored negated so both fire as
+a prefix. Fired levels are removed, so every level left in the rise array
+is above the previous price, and a ``searchsorted`` of the new price
+gives exactly the levels crossed between the previous and the new price
+(the fall array likewise). A tick costs a dict lookup plus two binary
+searches for each ticker that moved, whatever the total alert count.
+
+Alerts are one-shot. Fired alerts are appended to a short in-memory feed
+that the SSE stream reads with a cursor, and marked triggered in the
+database by a background task.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.market.models import PriceUpdate
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/alerts", tags=["alerts"])
+
+CONDITIONS = ("above", "below", "move")
+FEED_SIZE = 1000  # fired alerts kept for SSE clients to catch up on
+
+
+class AlertRequest(BaseModel):
+    ticker: str
+    condition: str  # "above", "below" or "move"
+    value: float  # price level, or percent for "move"
+
+
+class AlertResponse(BaseModel):
+    id: str
+    ticker: str
+    condition: str
+    value: float
+    base_price: float | None = None
+    status: str  # "active" or "triggered"
+    created_at: str
+    triggered_at: str | None = None
+    trigger_price: float | None = None
+
+
+@dataclass(slots=True)
+class Alert:
+    id: str
+    ticker: str
+    condition: str
+    value: float
+    base_price: float | None = None
+
+    def levels(self) -> tuple[float | None, float | None]:
+        """(fire at or above, fire at or below) price levels."""
+        if self.condition == "above":
+            return self.value, None
+        if self.condition == "below":
+            return None, self.value
+        move = self.base_price * self.value / 100
+        return self.base_price + move, self.base_price - move
+
+
+class _Levels:
+    """Alert ids sorted by key; keys <= a threshold have been reached."""
+
+    __slots__ = ("keys", "ids")
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.float64)
+        self.ids = np.empty(0, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: float, alert_id: str) -> None:
+        i = np.searchsorted(self.keys, key, side="right")
+        self.keys = np.insert(self.keys, i, key)
+        self.ids = np.insert(self.ids, i, alert_id)
+
+    def remove(self, key: float, alert_id: str) -> None:
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        hi = int(np.searchsorted(self.keys, key, side="right"))
+        match = np.flatnonzero(self.ids[lo:hi] == alert_id)
+        if len(match):
+            i = lo + int(match[0])
+            self.keys = np.delete(self.keys, i)
+            self.ids = np.delete(self.ids, i)
+
+    def pop_reached(self, threshold: float) -> np.ndarray | None:
+        keys = self.keys
+        if not len(keys) or keys[0] > threshold:  # common case: nothing reached
+            return None
+        i = int(np.searchsorted(keys, threshold, side="right"))
+        fired = self.ids[:i]
+        self.keys = self.keys[i:]
+        self.ids = self.ids[i:]
+        return fired
+
+
+class AlertEngine:
+    """Per-ticker sorted alert levels, fed by price cache updates."""
+
+    def __init__(self, feed_size: int = FEED_SIZE):
+        # ticker -> (rise levels, negated fall levels)
+        self._levels: dict[str, tuple[_Levels, _Levels]] = {}
+        self._alerts: dict[str, Alert] = {}
+        self._feed: deque[tuple[int, dict]] = deque(maxlen=feed_size)
+        self._seq = 0
+        self._unsaved: list[dict] = []
+        self._lock = threading.Lock()
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def add(self, alert: Alert) -> None:
+        above, below = alert.levels()
+        with self._lock:
+            books = self._levels.get(alert.ticker)
+            if books is None:
+                books = self._levels[alert.ticker] = (_Levels(), _Levels())
+            if above is not None:
+                books[0].add(above, alert.id)
+            if below is not None:
+                books[1].add(-below, alert.id)
+            self._alerts[alert.id] = alert
+
+    def _discard(self, alert: Alert) -> None:
+        """Remove an alert's remaining levels. Caller must hold the lock."""
+        books = self._levels.get(alert.ticker)
+        if books is None:
+            return
+        above, below = alert.levels()
+        if above is not None:
+            books[0].remove(above, alert.id)
+        if below is not None:
+            books[1].remove(-below, alert.id)
+        if not books[0] and not books[1]:
+            del self._levels[alert.ticker]
+
+    def remove(self, alert_id: str) -> bool:
+        with self._lock:
+            alert = self._alerts.pop(alert_id, None)
+            if alert is None:
+                return False
+            self._discard(alert)
+            return True
+
+    def on_prices(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Price cache listener: fire alerts whose level the new price reached."""
+        if not self._levels:
+            return
+        fired = []
+        with self._lock:
+            for u in updates:
+                books = self._levels.get(u.ticker)
+                if books is None:
+                    continue
+                rising = books[0].pop_reached(u.price)
+                falling = books[1].pop_reached(-u.price)
+                if rising is None and falling is None:
+                    continue
+                ids = [a for a in (rising, falling) if a is not None]
+                triggered_at = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+                for alert_id in np.concatenate(ids).tolist():
+                    alert = self._alerts.pop(alert_id, None)
+                    if alert is None:  # both levels of a move alert reached
+                        continue
+                    if alert.condition == "move":
+                        self._discard(alert)
+                    fired.append({
+                        "id": alert.id,
+                        "ticker": alert.ticker,
+                        "condition": alert.condition,
+                        "value": alert.value,
+                        "price": u.price,
+                        "previous_price": u.previous_price,
+                        "triggered_at": triggered_at,
+                    })
+                if not books[0] and not books[1]:
+                    self._levels.pop(u.ticker, None)
+            if not fired:
+                return
+            for event in fired:
+                self._seq += 1
+                self._feed.append((self._seq, event))
+            self._unsaved.extend(fired)
+        if self._wake is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number of the latest fired alert."""
+        return self._seq
+
+    def fired_since(self, cursor: int) -> tuple[list[dict], int]:
+        """Fired alerts after ``cursor`` and the new cursor."""
+        if cursor >= self._seq:
+            return [], cursor
+        with self._lock:
+            return [event for seq, event in self._feed if seq > cursor], self._seq
+
+    async def start(self) -> None:
+        """Load active alerts, subscribe to prices and start the persistence task."""
+        db = await get_db()
+        try:
+            cursor = await db.execute(
+                "SELECT id, ticker, condition, value, base_price FROM alerts "
+                "WHERE user_id = 'default' AND status = 'active'"
+            )
+            for row in await cursor.fetchall():
+                self.add(Alert(*row))
+        finally:
+            await db.close()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._wake = asyncio.Event()
+        price_cache.add_listener(self.on_prices)
+        self._task = asyncio.create_task(self._save_loop())
+        log.info("Alert engine started with %d active alerts", len(self))
+
+    async def stop(self) -> None:
+        price_cache.remove_listener(self.on_prices)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._save()
+        self._wake = None
+        with self._lock:
+            self._levels.clear()
+            self._alerts.clear()
+
+    async def _save_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                await self._save()
+            except Exception:
+                log.exception("Saving triggered alerts failed")
+
+    async def _save(self) -> None:
+        with self._lock:
+            fired, self._unsaved = self._unsaved, []
+        if not fired:
+            return
+        db = await get_db()
+        try:
+            await db.executemany(
+                "UPDATE alerts SET status = 'triggered', triggered_at = ?, trigger_price = ? "
+                "WHERE id = ? AND status = 'active'",
+                [(e["triggered_at"], e["price"], e["id"]) for e in fired],
+            )
+            await db.commit()
+        finally:
+            await db.close()
+
+
+alert_engine = AlertEngine()
+
+
+@router.post("", response_model=AlertResponse)
+async def create_alert(body: AlertRequest):
+    """Set an alert on a price level or a percentage move from the current price."""
+    ticker = body.ticker.upper().strip()
+    condition = body.condition.lower()
+
+    if condition not in CONDITIONS:
+        raise HTTPException(status_code=400, detail="condition must be 'above', 'below' or 'move'")
+    if body.value <= 0:
+        raise HTTPException(status_code=400, detail="value must be positive")
+
+    base_price = None
+    if condition == "move":
+        update = price_cache.get(ticker)
+        if update is None:
+            raise HTTPException(status_code=400, detail=f"No price available for {ticker}")
+        base_price = update.price
+
+    alert = Alert(str(uuid.uuid4()), ticker, condition, body.value, base_price)
+    now = datetime.now(timezone.utc).isoformat()
+    db = await get_db()
+    try:
+        await db.execute(
+            "INSERT INTO alerts (id, user_id, ticker, condition, value, base_price, status, created_at) "
+            "VALUES (?, 'default', ?, ?, ?, ?, 'active', ?)",
+            (alert.id, ticker, condition, body.value, base_price, now),
+        )
+        await db.commit()
+    finally:
+        await db.close()
+
+    alert_engine.add(alert)
+    return AlertResponse(
+        id=alert.id,
+        ticker=ticker,
+        condition=condition,
+        value=body.value,
+        base_price=base_price,
+        status="active",
+        created_at=now,
+    )
+
+
+@router.get("", response_model=list[AlertResponse])
+async def list_alerts(status: str | None = None):
+    """Return alerts, newest first, optionally filtered by status."""
+    query = "SELECT * FROM alerts WHERE user_id = 'default'"
+    params: tuple = ()
+    if status:
+        query += " AND status = ?"
+        params = (status,)
+    db = await get_db()
+    try:
+        cursor = await db.execute(query + " ORDER BY created_at DESC", params)
+        return [AlertResponse(**dict(row)) for row in await cursor.fetchall()]
+    finally:
+        await db.close()
+
+
+@router.delete("/{alert_id}")
+async def delete_alert(alert_id: str):
+    """Delete an alert."""
+    db = await get_db()
+    try:
+        cursor = await db.execute(
+            "DELETE FROM alerts WHERE id = ? AND user_id = 'default'", (alert_id,)
+        )
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail=f"No alert {alert_id}")
+        await db.commit()
+    finally:
+        await db.close()
+    alert_engine.remove(alert_id)
+    return {"ok": True}
@@ -1,19 +1,26 @@
 """POST /api/chat — LLM chat with auto-execution of trades and watchlist changes."""
 
+import asyncio
+import importlib
 import json
+import logging
 import os
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from litellm import acompletion
-
-from app.database import get_db
+from app.database import get_db, now_ms
+from app.market.cache import price_cache
+from app.metrics import LLM_REQUEST_SECONDS, LLM_TOKENS
+from app.portfolio import apply_trade, portfolio_changed
+from app.watchlist import untrack_ticker, watchlist_changed
 
 router = APIRouter()
 
+log = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------------
 # Pydantic models
 # ---------------------------------------------------------------------------
@@ -124,7 +131,7 @@ async def _load_history(db, limit: int = 20) -> list[dict]:
     """Load recent chat messages for context."""
     cur = await db.execute(
         "SELECT role, content FROM chat_messages "
-        "WHERE user_id = 'default' ORDER BY created_at DESC LIMIT ?",
+        "WHERE user_id = 'default' ORDER BY created_at DESC, id DESC LIMIT ?",
         (limit,),
     )
     rows = await cur.fetchall()
@@ -137,6 +144,10 @@ async def _load_history(db, limit: int = 20) -> list[dict]:
 # ---------------------------------------------------------------------------
 
 
+def llm_mock_enabled() -> bool:
+    return os.environ.get("LLM_MOCK", "").lower() == "true"
+
+
 def _mock_response(message: str) -> ChatResponse:
     """Return deterministic mock responses for testing."""
     lower = message.lower()
@@ -204,93 +215,21 @@ def _mock_response(message: str) -> ChatResponse:
 async def _execute_trade(
     db, ticker: str, side: str, quantity: float
 ) -> str | None:
-    """Execute a trade. Returns error string on failure, None on success."""
-    # We need a price. Use avg_cost for sells, or a default for buys.
-    # In a full system this comes from the price cache. For now, use a
-    # placeholder price of 100.0 if no market data is available.
-    # TODO: integrate with market data price cache when available
-    price = 150.0  # default placeholder
-
-    now = datetime.now(timezone.utc).isoformat()
-
-    if side == "buy":
-        cost = price * quantity
-        cur = await db.execute(
-            "SELECT cash_balance FROM users_profile WHERE id = 'default'"
-        )
-        row = await cur.fetchone()
-        cash = row["cash_balance"]
-        if cost > cash:
-            return f"Insufficient cash: need ${cost:,.2f} but only have ${cash:,.2f}"
-
-        # Deduct cash
-        await db.execute(
-            "UPDATE users_profile SET cash_balance = cash_balance - ? WHERE id = 'default'",
-            (cost,),
-        )
-
-        # Upsert position
-        cur = await db.execute(
-            "SELECT quantity, avg_cost FROM positions WHERE user_id = 'default' AND ticker = ?",
-            (ticker,),
-        )
-        existing = await cur.fetchone()
-        if existing:
-            old_qty = existing["quantity"]
-            old_cost = existing["avg_cost"]
-            new_qty = old_qty + quantity
-            new_avg = ((old_qty * old_cost) + (quantity * price)) / new_qty
-            await db.execute(
-                "UPDATE positions SET quantity = ?, avg_cost = ?, updated_at = ? "
-                "WHERE user_id = 'default' AND ticker = ?",
-                (new_qty, new_avg, now, ticker),
-            )
-        else:
-            await db.execute(
-                "INSERT INTO positions (id, user_id, ticker, quantity, avg_cost, updated_at) "
-                "VALUES (?, 'default', ?, ?, ?, ?)",
-                (str(uuid.uuid4()), ticker, quantity, price, now),
-            )
-
-    elif side == "sell":
-        cur = await db.execute(
-            "SELECT quantity, avg_cost FROM positions WHERE user_id = 'default' AND ticker = ?",
-            (ticker,),
-        )
-        existing = await cur.fetchone()
-        if not existing or existing["quantity"] < quantity:
-            held = existing["quantity"] if existing else 0
-            return f"Insufficient shares: want to sell {quantity} {ticker} but hold {held}"
-
-        price = existing["avg_cost"]  # sell at avg cost for now
-        proceeds = price * quantity
-        new_qty = existing["quantity"] - quantity
-
-        await db.execute(
-            "UPDATE users_profile SET cash_balance = cash_balance + ? WHERE id = 'default'",
-            (proceeds,),
-        )
-
-        if new_qty <= 0:
-            await db.execute(
-                "DELETE FROM positions WHERE user_id = 'default' AND ticker = ?",
-                (ticker,),
-            )
-        else:
-            await db.execute(
-                "UPDATE positions SET quantity = ?, updated_at = ? "
-                "WHERE user_id = 'default' AND ticker = ?",
-                (new_qty, now, ticker),
-            )
-    else:
+    """Execute a market order at the cached price. Returns error string on failure, None on success."""
+    ticker = ticker.upper().strip()
+    side = side.lower()
+    if side not in ("buy", "sell"):
         return f"Invalid side: {side}"
-
-    # Record trade
-    await db.execute(
-        "INSERT INTO trades (id, user_id, ticker, side, quantity, price, executed_at) "
-        "VALUES (?, 'default', ?, ?, ?, ?, ?)",
-        (str(uuid.uuid4()), ticker, side, quantity, price, now),
-    )
+    if quantity <= 0:
+        return f"Invalid quantity for {ticker}: {quantity}"
+    update = price_cache.get(ticker)
+    if update is None:
+        return f"No price available for {ticker}"
+    try:
+        await apply_trade(db, ticker, side, quantity, update.price)
+    except HTTPException as e:
+        await db.rollback()
+        return e.detail
     await db.commit()
     return None
 
@@ -313,6 +252,8 @@ async def _execute_watchlist_change(db, ticker: str, action: str) -> str | None:
             await db.commit()
         except Exception:
             return f"{ticker} is already on the watchlist"
+        watchlist_changed()
+        price_cache.add_ticker(ticker.upper())
 
     elif action == "remove":
         cur = await db.execute(
@@ -322,6 +263,8 @@ async def _execute_watchlist_change(db, ticker: str, action: str) -> str | None:
         await db.commit()
         if cur.rowcount == 0:
             return f"{ticker} is not on the watchlist"
+        watchlist_changed()
+        await untrack_ticker(db, ticker.upper())
 
     return None
 
@@ -331,15 +274,35 @@ async def _execute_watchlist_change(db, ticker: str, action: str) -> str | None:
 # ---------------------------------------------------------------------------
 
 
+async def warm_llm_client() -> None:
+    """Import LiteLLM in a worker thread so the first chat doesn't pay for it.
+
+    LiteLLM takes seconds to import, so it is never imported at module load;
+    the app starts serving first and this runs in the background.
+    """
+    try:
+        await asyncio.to_thread(importlib.import_module, "litellm")
+    except Exception:
+        log.exception("LiteLLM warm-up import failed")
+
+
 async def _call_llm(messages: list[dict]) -> ChatResponse:
     """Call LLM via LiteLLM -> OpenRouter and parse structured response."""
-    response = await acompletion(
-        model="openrouter/openai/gpt-oss-120b",
-        messages=messages,
-        extra_body={
-            "response_format": {"type": "json_object"},
-        },
-    )
+    from litellm import acompletion
+
+    with LLM_REQUEST_SECONDS.time():
+        response = await acompletion(
+            model="openrouter/openai/gpt-oss-120b",
+            messages=messages,
+            extra_body={
+                "response_format": {"type": "json_object"},
+            },
+        )
+
+    usage = getattr(response, "usage", None)
+    if usage:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, "prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, "completion")
 
     content = response.choices[0].message.content
     parsed = json.loads(content)
@@ -357,7 +320,7 @@ async def chat(req: ChatRequest):
     db = await get_db()
     try:
         # Check mock mode
-        if os.environ.get("LLM_MOCK", "").lower() == "true":
+        if llm_mock_enabled():
             result = _mock_response(req.message)
         else:
             # Build LLM messages
@@ -400,11 +363,11 @@ async def chat(req: ChatRequest):
             result.message += "\n\n(Errors: " + "; ".join(errors) + ")"
 
         # Store messages
-        now = datetime.now(timezone.utc).isoformat()
+        now = now_ms()
         await db.execute(
-            "INSERT INTO chat_messages (id, user_id, role, content, actions, created_at) "
-            "VALUES (?, 'default', 'user', ?, NULL, ?)",
-            (str(uuid.uuid4()), req.message, now),
+            "INSERT INTO chat_messages (user_id, role, content, actions, created_at) "
+            "VALUES ('default', 'user', ?, NULL, ?)",
+            (req.message, now),
         )
 
         actions_json = None
@@ -412,11 +375,13 @@ async def chat(req: ChatRequest):
             actions_json = json.dumps(result.model_dump(exclude={"message"}, exclude_none=True))
 
         await db.execute(
-            "INSERT INTO chat_messages (id, user_id, role, content, actions, created_at) "
-            "VALUES (?, 'default', 'assistant', ?, ?, ?)",
-            (str(uuid.uuid4()), result.message, actions_json, now),
+            "INSERT INTO chat_messages (user_id, role, content, actions, created_at) "
+            "VALUES ('default', 'assistant', ?, ?, ?)",
+            (result.message, actions_json, now),
         )
         await db.commit()
+        if result.trades:
+            portfolio_changed()
 
         return result
     finally:
@@ -1,10 +1,20 @@
-"""SQLite database with lazy initialization."""
+"""SQLite database with lazy initialization.
+
+Time-series tables (trades, portfolio_snapshots, chat_messages) use
+INTEGER rowid keys and INTEGER epoch-millisecond timestamps. Range scans
+compare integers, and rows and indexes stay small. ``init_db`` migrates
+databases created with the old TEXT uuid/ISO-8601 columns in place.
+"""
 
 import os
+import time
 import uuid
 from datetime import datetime, timezone
 
 import aiosqlite
+from aiosqlite.context import Result
+
+from app.metrics import DB_QUERY_SECONDS, current_route
 
 DB_PATH = os.environ.get("DB_PATH", "db/finally.db")
 
@@ -34,38 +44,153 @@ CREATE TABLE IF NOT EXISTS positions (
 );
 
 CREATE TABLE IF NOT EXISTS trades (
-    id TEXT PRIMARY KEY,
+    id INTEGER PRIMARY KEY,
     user_id TEXT DEFAULT 'default',
     ticker TEXT,
     side TEXT,
     quantity REAL,
     price REAL,
-    executed_at TEXT
+    executed_at INTEGER NOT NULL  -- epoch ms
 );
 
-CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+-- The implicit trailing rowid (id) matches the blotter's (executed_at, id) keyset order
+CREATE INDEX IF NOT EXISTS idx_trades_user_time ON trades (user_id, executed_at);
+CREATE INDEX IF NOT EXISTS idx_trades_user_ticker_time ON trades (user_id, ticker, executed_at);
+
+CREATE TABLE IF NOT EXISTS lots (
     id TEXT PRIMARY KEY,
     user_id TEXT DEFAULT 'default',
+    ticker TEXT,
+    quantity REAL,
+    cost REAL,
+    acquired_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_lots_user_ticker ON lots (user_id, ticker, acquired_at);
+
+CREATE TABLE IF NOT EXISTS realized_pnl (
+    user_id TEXT DEFAULT 'default',
+    ticker TEXT,
+    realized REAL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (user_id, ticker)
+);
+
+CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT DEFAULT 'default',
     total_value REAL,
-    recorded_at TEXT
+    recorded_at INTEGER NOT NULL  -- epoch ms
 );
 
-CREATE TABLE IF NOT EXISTS chat_messages (
+-- Covers the history query, which then never touches the table
+CREATE INDEX IF NOT EXISTS idx_snapshots_user_time ON portfolio_snapshots (user_id, recorded_at, total_value);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    user_id TEXT DEFAULT 'default',
+    ticker TEXT,
+    side TEXT,
+    order_type TEXT,
+    quantity REAL,
+    trigger_price REAL,
+    status TEXT,
+    created_at TEXT,
+    filled_at TEXT,
+    fill_price REAL,
+    detail TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+
+CREATE TABLE IF NOT EXISTS alerts (
     id TEXT PRIMARY KEY,
     user_id TEXT DEFAULT 'default',
+    ticker TEXT,
+    condition TEXT,
+    value REAL,
+    base_price REAL,
+    status TEXT,
+    created_at TEXT,
+    triggered_at TEXT,
+    trigger_price REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts (status);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT DEFAULT 'default',
     role TEXT,
     content TEXT,
     actions TEXT,
-    created_at TEXT
+    created_at INTEGER NOT NULL  -- epoch ms
 );
+
+CREATE INDEX IF NOT EXISTS idx_chat_user_time ON chat_messages (user_id, created_at);
 """
 
+# Tables moved from TEXT uuid keys and ISO-8601 timestamps to INTEGER rowids
+# and epoch ms: table -> (timestamp column, columns copied as-is)
+_INTEGER_TIME_TABLES = {
+    "trades": ("executed_at", ("user_id", "ticker", "side", "quantity", "price")),
+    "portfolio_snapshots": ("recorded_at", ("user_id", "total_value")),
+    "chat_messages": ("created_at", ("user_id", "role", "content", "actions")),
+}
+
 DEFAULT_TICKERS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "JPM", "V", "NFLX"]
 
 
+def now_ms() -> int:
+    """Current time in epoch milliseconds, the time-series timestamp format."""
+    return time.time_ns() // 1_000_000
+
+
+def ms_to_iso(ms: int) -> str:
+    """Render epoch ms as ISO-8601 UTC, matching ``iso_sql``."""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{ms % 1000:03d}Z"
+
+
+def iso_sql(column: str) -> str:
+    """SQL expression rendering an epoch-ms column as ISO-8601 UTC text."""
+    return f"strftime('%Y-%m-%dT%H:%M:%fZ', {column} / 1000.0, 'unixepoch')"
+
+
+def iso_to_ms(value: str | None) -> int | None:
+    """Parse an ISO-8601 timestamp (naive means UTC) into epoch ms."""
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+
+def _timed(method):
+    """Wrap a connection method to record its latency per route.
+
+    The wrapper returns aiosqlite's ``Result`` like the original, so both
+    ``await db.execute(...)`` and ``async with db.execute(...)`` keep working.
+    """
+
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, current_route())
+
+    def wrapper(*args, **kwargs):
+        return Result(timed(*args, **kwargs))
+
+    return wrapper
+
+
 async def get_db() -> aiosqlite.Connection:
     """Get a database connection."""
     db = await aiosqlite.connect(DB_PATH)
+    db.execute = _timed(db.execute)
+    db.commit = _timed(db.commit)
     db.row_factory = aiosqlite.Row
     await db.execute("PRAGMA journal_mode=WAL")
     return db
@@ -77,7 +202,8 @@ async def init_db():
 
     db = await get_db()
     try:
-        await db.executescript(SCHEMA_SQL)
+        if not await _migrate_integer_time(db):
+            await db.executescript(SCHEMA_SQL)
 
         # Check if seed data exists
         cursor = await db.execute("SELECT COUNT(*) FROM users_profile")
@@ -96,3 +222,55 @@ async def init_db():
             await db.commit()
     finally:
         await db.close()
+
+
+def _legacy_ms(value: str | None) -> int | None:
+    try:
+        return iso_to_ms(value)
+    except (TypeError, ValueError):
+        return None  # the migration falls back to the latest time before it
+
+
+async def _migrate_integer_time(db) -> bool:
+    """Rebuild time-series tables still on TEXT ids/timestamps; True if any were.
+
+    Runs in one transaction together with the schema script: legacy tables
+    are renamed aside, recreated, refilled oldest first (so rowids follow
+    time), then dropped. A row whose timestamp is missing or unparseable
+    takes the latest parseable time before it in insertion order (0 if
+    none), so the new NOT NULL columns always get a value. Afterwards the
+    file is vacuumed to return the freed pages.
+    """
+    legacy = []
+    for table, (time_column, _) in _INTEGER_TIME_TABLES.items():
+        cursor = await db.execute(f"PRAGMA table_info({table})")
+        types = {row["name"]: row["type"] for row in await cursor.fetchall()}
+        if types.get(time_column) == "TEXT":
+            legacy.append(table)
+    if not legacy:
+        return False
+
+    await db.create_function("iso_to_ms", 1, _legacy_ms, deterministic=True)
+    script = ["BEGIN;"]
+    for table in legacy:
+        cursor = await db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        )
+        script += [f"DROP INDEX {row['name']};" for row in await cursor.fetchall()]
+        script.append(f"ALTER TABLE {table} RENAME TO {table}_legacy;")
+    script.append(SCHEMA_SQL)
+    for table in legacy:
+        time_column, columns = _INTEGER_TIME_TABLES[table]
+        copied = ", ".join(columns)
+        ms = f"iso_to_ms({time_column})"
+        script.append(
+            f"INSERT INTO {table} ({copied}, {time_column}) "
+            f"SELECT {copied}, COALESCE({ms}, MAX({ms}) OVER (ORDER BY rowid), 0) AS ms "
+            f"FROM {table}_legacy ORDER BY ms, rowid;"
+        )
+        script.append(f"DROP TABLE {table}_legacy;")
+    script.append("COMMIT;")
+    await db.executescript("\n".join(script))
+    await db.execute("VACUUM")
+    return True
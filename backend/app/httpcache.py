@@ -0,0 +1,139 @@
+"""Version-keyed response caching for polled read endpoints.
+
+A ``ResponseCache`` keeps the last rendered JSON body of an endpoint with
+the data versions it was built from (portfolio version, watchlist
+version, price cache generation, ...). Requests whose versions match
+reuse the body without touching the database. The ETag is a hash of the
+body, so it is strong and a matching ``If-None-Match`` gets a 304 with no
+body.
+
+``strict`` versions (holdings, watchlist, snapshots) must match exactly.
+``loose`` versions (the price generation, which moves every tick) may
+lag for up to ``RESPONSE_CACHE_TTL`` seconds (default 1; 0 means exact).
+Concurrent misses for the same versions share one build (single flight).
+A build returns a value of ``model``, or JSON bytes it rendered itself.
+
+The versions are per-process counters, so with ``SHARED_PRICES=true``
+(several workers on one database) a write in another worker would go
+unnoticed. Bodies are then rebuilt on every request; ETags still work.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.market.shared import shared_prices_enabled
+from app.metrics import RESPONSE_CACHE_REQUESTS
+
+DEFAULT_TTL = 1.0  # seconds
+
+_caches: list["ResponseCache"] = []
+
+
+class _Entry:
+    __slots__ = ("strict", "loose", "body", "etag", "built")
+
+    def __init__(self, strict: Hashable, loose: Hashable, body: bytes):
+        self.strict = strict
+        self.loose = loose
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        self.built = time.monotonic()
+
+
+class ResponseCache:
+    """One cached response body, rebuilt when its data versions move."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        strict: Callable[[], Hashable],
+        loose: Callable[[], Hashable] | None = None,
+        ttl: float | None = None,
+        enabled: bool | None = None,
+    ):
+        self.name = name
+        self.ttl = float(os.environ.get("RESPONSE_CACHE_TTL", DEFAULT_TTL)) if ttl is None else ttl
+        self.enabled = not shared_prices_enabled() if enabled is None else enabled
+        self._adapter = TypeAdapter(model)
+        self._strict = strict
+        self._loose = loose or (lambda: None)
+        self._entry: _Entry | None = None
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        _caches.append(self)
+
+    def _fresh(self, strict: Hashable, loose: Hashable) -> _Entry | None:
+        entry = self._entry
+        if entry is None or entry.strict != strict:
+            return None
+        if entry.loose == loose or time.monotonic() - entry.built < self.ttl:
+            return entry
+        return None
+
+    async def get(self, build: Callable[[], Awaitable[Any]]) -> _Entry:
+        """The cached entry, building it (once across concurrent callers) if stale."""
+        if not self.enabled:
+            RESPONSE_CACHE_REQUESTS.inc(1, self.name, "miss")
+            value = await build()
+            body = value if isinstance(value, bytes) else self._adapter.dump_json(value)
+            return _Entry(None, None, body)
+
+        strict, loose = self._strict(), self._loose()
+        entry = self._fresh(strict, loose)
+        if entry is not None:
+            RESPONSE_CACHE_REQUESTS.inc(1, self.name, "hit")
+            return entry
+
+        key = (strict, loose)
+        flight = self._inflight.get(key)
+        if flight is not None:
+            RESPONSE_CACHE_REQUESTS.inc(1, self.name, "coalesced")
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise  # this request was cancelled
+                return await self.get(build)  # the building request went away
+
+        RESPONSE_CACHE_REQUESTS.inc(1, self.name, "miss")
+        flight = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await build()
+            body = value if isinstance(value, bytes) else self._adapter.dump_json(value)
+            entry = _Entry(strict, loose, body)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as exc:
+            flight.set_exception(exc)
+            flight.exception()  # waiters re-raise it; don't log it as unretrieved
+            raise
+        finally:
+            del self._inflight[key]
+        self._entry = entry
+        flight.set_result(entry)
+        return entry
+
+    async def respond(self, request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+        """JSON response with ETag, or 304 if the client already has this body."""
+        entry = await self.get(build)
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == entry.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        self._entry = None
+
+
+def clear_response_caches() -> None:
+    """Drop every cached body, e.g. after the database was replaced."""
+    for cache in _caches:
+        cache.clear()
@@ -0,0 +1,90 @@
+"""Tax-lot ledger and running realized P&L, updated inside trade transactions.
+
+Every buy opens a lot. Every sell consumes the oldest lots first and adds
+its realized gain to a running per-ticker total in ``realized_pnl``, so
+realized P&L is read from one row per ticker and never rebuilt from the
+trade history. A sell touches only the lots it consumes.
+
+``COST_BASIS_METHOD`` chooses the basis for realized P&L:
+
+- ``fifo`` (default): the cost of the consumed lots. The position's
+  ``avg_cost`` then tracks the cost of the lots left over.
+- ``average``: the position's average cost, which a sell leaves unchanged.
+
+Shares bought before lots were tracked have no lot. They are the oldest
+shares, so sells consume them first, costed at whatever the position's
+total cost leaves after the recorded lots.
+"""
+
+import os
+import uuid
+
+COST_BASIS_METHODS = ("fifo", "average")
+
+
+def cost_basis_method() -> str:
+    method = os.environ.get("COST_BASIS_METHOD", "fifo").lower()
+    return method if method in COST_BASIS_METHODS else "fifo"
+
+
+async def open_lot(db, ticker: str, quantity: float, price: float, now: str) -> None:
+    await db.execute(
+        "INSERT INTO lots (id, user_id, ticker, quantity, cost, acquired_at) VALUES (?, 'default', ?, ?, ?, ?)",
+        (str(uuid.uuid4()), ticker, quantity, price, now),
+    )
+
+
+async def close_lots(
+    db, ticker: str, quantity: float, price: float, avg_cost: float, held: float, now: str
+) -> tuple[float, float]:
+    """Consume ``quantity`` shares FIFO and book the realized gain.
+
+    Returns (realized P&L of this sell, average cost of the shares left).
+    """
+    cursor = await db.execute(
+        "SELECT COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * cost), 0) FROM lots "
+        "WHERE user_id = 'default' AND ticker = ?",
+        (ticker,),
+    )
+    tracked, tracked_cost = await cursor.fetchone()
+    untracked = held - tracked
+    lot_cost = 0.0  # cost of the shares sold
+    remaining = quantity
+    if untracked > 1e-9:  # pre-ledger shares are the oldest
+        take = min(untracked, remaining)
+        lot_cost += take * max(held * avg_cost - tracked_cost, 0.0) / untracked
+        remaining -= take
+
+    cursor = await db.execute(
+        "SELECT id, quantity, cost FROM lots WHERE user_id = 'default' AND ticker = ? "
+        "ORDER BY acquired_at, rowid",
+        (ticker,),
+    )
+    while remaining > 0 and (lot := await cursor.fetchone()):
+        take = min(lot["quantity"], remaining)
+        lot_cost += take * lot["cost"]
+        remaining -= take
+        if take == lot["quantity"]:
+            await db.execute("DELETE FROM lots WHERE id = ?", (lot["id"],))
+        else:
+            await db.execute(
+                "UPDATE lots SET quantity = ? WHERE id = ?", (lot["quantity"] - take, lot["id"])
+            )
+    await cursor.close()
+    fifo_cost = lot_cost + remaining * avg_cost  # lots short of the position: average cost
+
+    left = held - quantity
+    if cost_basis_method() == "fifo":
+        realized = quantity * price - fifo_cost
+        new_avg = (held * avg_cost - fifo_cost) / left if left > 0 else avg_cost
+    else:
+        realized = quantity * (price - avg_cost)
+        new_avg = avg_cost
+
+    await db.execute(
+        "INSERT INTO realized_pnl (user_id, ticker, realized, updated_at) VALUES ('default', ?, ?, ?) "
+        "ON CONFLICT (user_id, ticker) DO UPDATE SET realized = realized + excluded.realized, "
+        "updated_at = excluded.updated_at",
+        (ticker, realized, now),
+    )
+    return realized, new_avg
@@ -0,0 +1,248 @@
+"""Load generator for a running FinAlly instance.
+
+Opens N SSE price streams and runs closed-loop workers that issue a
+weighted mix of portfolio/watchlist GETs and trade POSTs, then reports
+request throughput and latency percentiles, SSE event delivery lag (tick
+timestamp to client receipt) and server RSS (from /metrics).
+
+    python -m app.loadgen --url http://localhost:8000 --streams 50 \\
+        --workers 20 --duration 30 --mix portfolio=5,watchlist=4,trade=1
+
+Run it against an instance using the simulator provider. Trades buy and
+then sell one share of a default ticker, so the portfolio stays small.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+DEFAULT_MIX = "portfolio=5,watchlist=4,trade=1"
+TRADE_TICKERS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "JPM", "V", "NFLX"]
+
+
+@dataclass
+class LoadConfig:
+    streams: int = 10
+    workers: int = 10
+    duration: float = 30.0
+    think: float = 0.0  # seconds each worker waits between requests
+    mix: dict[str, int] = field(default_factory=lambda: parse_mix(DEFAULT_MIX))
+
+
+@dataclass
+class LoadStats:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    statuses: dict[str, dict[int, int]] = field(default_factory=dict)
+    errors: int = 0
+    events: int = 0
+    event_lags: list[float] = field(default_factory=list)
+    stream_errors: int = 0
+    elapsed: float = 0.0
+    rss_before: float | None = None
+    rss_after: float | None = None
+
+    def record(self, kind: str, status: int, latency: float) -> None:
+        self.latencies.setdefault(kind, []).append(latency)
+        counts = self.statuses.setdefault(kind, {})
+        counts[status] = counts.get(status, 0) + 1
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    """Parse ``portfolio=5,watchlist=4,trade=1`` into request weights."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("portfolio", "watchlist", "history", "trade"):
+            raise ValueError(f"Unknown request kind: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def parse_sse_price(line: str) -> tuple[str, str] | None:
+    """Return (ticker, timestamp) from an SSE ``data:`` line, else None."""
+    if not line.startswith("data:"):
+        return None
+    try:
+        data = json.loads(line[5:].strip())
+        return data["ticker"], data["timestamp"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """p50/p95/p99/max in milliseconds."""
+    if not values:
+        return {}
+    p50, p95, p99, top = np.percentile(np.asarray(values), [50, 95, 99, 100]) * 1000
+    return {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2), "max_ms": round(top, 2)}
+
+
+async def scrape_rss(client: httpx.AsyncClient) -> float | None:
+    try:
+        resp = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    for line in resp.text.splitlines():
+        if line.startswith("process_resident_memory_bytes "):
+            return float(line.split()[1])
+    return None
+
+
+async def _stream(client: httpx.AsyncClient, stats: LoadStats, deadline: float) -> None:
+    """Consume one SSE stream, timing each distinct tick on first receipt."""
+    seen: dict[str, str] = {}
+    try:
+        async with client.stream("GET", "/api/stream/prices", timeout=None) as resp:
+            async for line in resp.aiter_lines():
+                received = time.time()
+                parsed = parse_sse_price(line)
+                if parsed:
+                    ticker, stamp = parsed
+                    stats.events += 1
+                    if seen.get(ticker) != stamp:
+                        seen[ticker] = stamp
+                        stats.event_lags.append(received - datetime.fromisoformat(stamp).timestamp())
+                if time.monotonic() >= deadline:
+                    return
+    except httpx.HTTPError:
+        stats.stream_errors += 1
+
+
+async def _request(client: httpx.AsyncClient, kind: str, rng: random.Random, held: dict[str, int]):
+    if kind == "portfolio":
+        return await client.get("/api/portfolio")
+    if kind == "watchlist":
+        return await client.get("/api/watchlist")
+    if kind == "history":
+        return await client.get("/api/portfolio/history")
+    ticker = rng.choice(TRADE_TICKERS)
+    side = "sell" if held.get(ticker, 0) > 0 else "buy"
+    resp = await client.post(
+        "/api/portfolio/trade", json={"ticker": ticker, "quantity": 1, "side": side}
+    )
+    if resp.status_code == 200:
+        held[ticker] = held.get(ticker, 0) + (1 if side == "buy" else -1)
+    return resp
+
+
+async def _worker(
+    client: httpx.AsyncClient, config: LoadConfig, stats: LoadStats, deadline: float, seed: int
+) -> None:
+    rng = random.Random(seed)
+    kinds = list(config.mix)
+    weights = [config.mix[k] for k in kinds]
+    held: dict[str, int] = {}
+    while time.monotonic() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        start = time.perf_counter()
+        try:
+            resp = await _request(client, kind, rng, held)
+            stats.record(kind, resp.status_code, time.perf_counter() - start)
+        except httpx.HTTPError:
+            stats.errors += 1
+        if config.think:
+            await asyncio.sleep(config.think)
+
+
+async def run_load(client: httpx.AsyncClient, config: LoadConfig) -> LoadStats:
+    """Drive load through ``client`` (any base URL or transport) for ``config.duration``."""
+    stats = LoadStats()
+    stats.rss_before = await scrape_rss(client)
+    start = time.monotonic()
+    deadline = start + config.duration
+    streams = [asyncio.create_task(_stream(client, stats, deadline)) for _ in range(config.streams)]
+    workers = [_worker(client, config, stats, deadline, seed) for seed in range(config.workers)]
+    await asyncio.gather(*workers)
+    # Streams only check the deadline when a line arrives
+    if streams:
+        await asyncio.wait(streams, timeout=max(deadline - time.monotonic(), 0) + 1.0)
+    for task in streams:
+        task.cancel()
+    stats.elapsed = time.monotonic() - start
+    stats.rss_after = await scrape_rss(client)
+    return stats
+
+
+def summarize(stats: LoadStats) -> dict:
+    total = sum(len(v) for v in stats.latencies.values())
+    return {
+        "elapsed_s": round(stats.elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / stats.elapsed, 1) if stats.elapsed else 0.0,
+        "errors": stats.errors,
+        "by_kind": {
+            kind: {"count": len(lat), "statuses": stats.statuses[kind], **percentiles(lat)}
+            for kind, lat in stats.latencies.items()
+        },
+        "latency": percentiles([x for lat in stats.latencies.values() for x in lat]),
+        "sse": {
+            "events": stats.events,
+            "events_per_s": round(stats.events / stats.elapsed, 1) if stats.elapsed else 0.0,
+            "stream_errors": stats.stream_errors,
+            "delivery_lag": percentiles(stats.event_lags),
+        },
+        "server_rss_mb": {
+            "before": round(stats.rss_before / 2**20, 1) if stats.rss_before else None,
+            "after": round(stats.rss_after / 2**20, 1) if stats.rss_after else None,
+        },
+    }
+
+
+def _print_report(summary: dict) -> None:
+    print(f"Duration        {summary['elapsed_s']}s")
+    print(f"Requests        {summary['requests']} ({summary['throughput_rps']} req/s), {summary['errors']} errors")
+    lat = summary["latency"]
+    if lat:
+        print(f"Latency         p50 {lat['p50_ms']}ms  p95 {lat['p95_ms']}ms  p99 {lat['p99_ms']}ms")
+    for kind, row in summary["by_kind"].items():
+        print(f"  {kind:<12}  n={row['count']:<6} p50 {row['p50_ms']}ms  p99 {row['p99_ms']}ms  {row['statuses']}")
+    sse = summary["sse"]
+    print(f"SSE events      {sse['events']} ({sse['events_per_s']}/s), {sse['stream_errors']} stream errors")
+    lag = sse["delivery_lag"]
+    if lag:
+        print(f"Delivery lag    p50 {lag['p50_ms']}ms  p95 {lag['p95_ms']}ms  p99 {lag['p99_ms']}ms")
+    rss = summary["server_rss_mb"]
+    print(f"Server RSS      {rss['before']} MB -> {rss['after']} MB")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--streams", type=int, default=10, help="concurrent SSE price streams")
+    parser.add_argument("--workers", type=int, default=10, help="concurrent request workers")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--think", type=float, default=0.0, help="pause between a worker's requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="request weights, e.g. portfolio=5,trade=1")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        streams=args.streams,
+        workers=args.workers,
+        duration=args.duration,
+        think=args.think,
+        mix=parse_mix(args.mix),
+    )
+    limits = httpx.Limits(max_connections=args.streams + args.workers + 2)
+
+    async def run() -> LoadStats:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+            return await run_load(client, config)
+
+    summary = summarize(asyncio.run(run()))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_report(summary)
+
+
+if __name__ == "__main__":
+    main()
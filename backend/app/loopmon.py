@@ -0,0 +1,165 @@
+"""Event-loop lag sampler and slow-callback detector.
+
+Enabled with ``LOOP_MONITOR=true``. A sampler task sleeps for a fixed
+interval and records how late it wakes up; that lateness is how long
+every other coroutine on the loop (SSE generators, the simulator, request
+handlers) was kept waiting. A watchdog thread watches the sampler's
+heartbeat. If the loop stops turning for longer than
+``LOOP_SLOW_CALLBACK_MS``, it captures the running task and the loop
+thread's stack while the stall is still in progress, so the offending
+code shows up in the report instead of whatever runs after it.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import APIRouter
+
+from app.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+SAMPLE_INTERVAL = 0.1  # seconds
+DEFAULT_THRESHOLD_MS = 100
+LAG_WINDOW = 600  # samples kept for percentiles (one minute)
+MAX_STALL_REPORTS = 50
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Event loop wake-up lateness",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+LOOP_STALLS = Counter("event_loop_stalls_total", "Event loop stalls over the slow-callback threshold")
+
+
+class LoopMonitor:
+    """Samples loop lag and reports callbacks that block the loop."""
+
+    def __init__(self, threshold: float, interval: float = SAMPLE_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.lags: deque[float] = deque(maxlen=LAG_WINDOW)
+        self.stalls: deque[dict] = deque(maxlen=MAX_STALL_REPORTS)
+        self._heartbeat = time.monotonic()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(now - before - self.interval, 0.0)
+            self.lags.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self) -> None:
+        """Watchdog thread: snapshot the loop thread while it is stalled."""
+        reported_beat = None
+        poll = min(self.threshold / 2, self.interval)
+        while not self._stopping.wait(poll):
+            beat = self._heartbeat
+            stalled_for = time.monotonic() - beat - self.interval
+            if stalled_for > self.threshold and beat != reported_beat:
+                reported_beat = beat
+                self._report_stall(stalled_for)
+
+    def _report_stall(self, stalled_for: float) -> None:
+        task = asyncio.current_task(self._loop)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        report = {
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "blocked_ms": round(stalled_for * 1000, 1),
+            "task": task.get_name() if task else None,
+            "coroutine": repr(task.get_coro()) if task else None,
+            "stack": traceback.format_stack(frame) if frame else [],
+        }
+        self.stalls.append(report)
+        LOOP_STALLS.inc()
+        logger.warning(
+            "Event loop blocked for >%.0fms in %s\n%s",
+            stalled_for * 1000, report["coroutine"] or "<no task>", "".join(report["stack"]),
+        )
+
+    def lag_percentiles(self) -> dict[str, float | int]:
+        lags = np.fromiter(self.lags, dtype=np.float64)
+        if len(lags) == 0:
+            return {"samples": 0}
+        p50, p95, p99 = np.percentile(lags, [50, 95, 99]) * 1000
+        return {
+            "samples": len(lags),
+            "p50_ms": round(p50, 2),
+            "p95_ms": round(p95, 2),
+            "p99_ms": round(p99, 2),
+            "max_ms": round(float(lags.max()) * 1000, 2),
+        }
+
+
+_monitor: LoopMonitor | None = None
+
+
+def loop_monitor_enabled() -> bool:
+    return os.environ.get("LOOP_MONITOR", "").lower() == "true"
+
+
+def start_loop_monitor() -> None:
+    """Start sampling on the running loop."""
+    global _monitor
+    threshold_ms = float(os.environ.get("LOOP_SLOW_CALLBACK_MS", DEFAULT_THRESHOLD_MS))
+    _monitor = LoopMonitor(threshold=threshold_ms / 1000)
+    _monitor.start()
+
+
+async def stop_loop_monitor() -> None:
+    global _monitor
+    if _monitor:
+        await _monitor.stop()
+        _monitor = None
+
+
+@router.get("/loop")
+async def get_loop_stats():
+    """Recent loop lag percentiles and slow-callback reports."""
+    if _monitor is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "threshold_ms": _monitor.threshold * 1000,
+        "lag": _monitor.lag_percentiles(),
+        "stalls": list(_monitor.stalls),
+    }
@@ -8,33 +8,118 @@ from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.chat import router as chat_router
+from app.alerts import alert_engine, router as alerts_router
+from app.chat import llm_mock_enabled, router as chat_router, warm_llm_client
 from app.database import init_db
+from app.loopmon import (
+    loop_monitor_enabled,
+    router as loopmon_router,
+    start_loop_monitor,
+    stop_loop_monitor,
+)
+from app.market.cache import price_cache
+from app.market.checkpoint import (
+    MarketCheckpointer,
+    default_checkpoint_interval,
+    default_checkpoint_path,
+    market_checkpoint_enabled,
+)
+from app.market.history import router as history_router, tick_history
 from app.market.provider import create_provider
+from app.metrics import MetricsMiddleware, router as metrics_router
+from app.orders import order_engine, router as orders_router
 from app.market.stream import router as stream_router
+from app.market.tickstore import TickRecorder, default_store_dir, tick_store_enabled
 from app.portfolio import router as portfolio_router
+from app.projection import router as projection_router, shutdown_projection_pool
+from app.rebalance import router as rebalance_router
+from app.risk import router as risk_router
 from app.watchlist import router as watchlist_router
 from app.snapshots import start_snapshot_recorder, stop_snapshot_recorder
 
 
+async def _when_producer(provider, start) -> None:
+    """Call ``start`` once this worker becomes the shared-price producer."""
+    while not provider.is_producer:
+        await asyncio.sleep(1.0)
+    start()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database, start market data provider and snapshot recorder."""
+    """Initialize database, restore market state, start order and alert engines, market data provider, tick recording and snapshots."""
+    if loop_monitor_enabled():
+        start_loop_monitor()
     await init_db()
     provider = create_provider()
+    checkpointer = None
+    if market_checkpoint_enabled():
+        checkpointer = MarketCheckpointer(
+            default_checkpoint_path(), provider, interval=default_checkpoint_interval()
+        )
+        checkpointer.restore()  # warm cache before the first request
+    price_cache.add_listener(tick_history.record)
+    recorder = TickRecorder(default_store_dir()) if tick_store_enabled() else None
+    recording = False
+
+    def start_recording() -> None:
+        # Ticks and snapshots are written by the producing worker only, so
+        # shared-price workers don't append the same rows N times
+        nonlocal recording
+        recording = True
+        if recorder:
+            price_cache.add_listener(recorder.record)
+            recorder.start()
+        start_snapshot_recorder()
+
+    await order_engine.start()
+    await alert_engine.start()
+    takeover = None
+    if provider.is_producer:  # before start, so the first ticks are recorded
+        start_recording()
     await provider.start()
-    start_snapshot_recorder()
+    if not recording:
+        takeover = asyncio.create_task(_when_producer(provider, start_recording))
+    if checkpointer:
+        checkpointer.start()
+    warmup = None
+    if not llm_mock_enabled():
+        warmup = asyncio.create_task(warm_llm_client())
     yield
-    stop_snapshot_recorder()
+    if warmup:
+        warmup.cancel()
+    if takeover:
+        takeover.cancel()
+    if recording:
+        stop_snapshot_recorder()
+    if checkpointer:
+        await checkpointer.stop()
     await provider.stop()
+    await alert_engine.stop()
+    await order_engine.stop()
+    if recording and recorder:
+        price_cache.remove_listener(recorder.record)
+        await recorder.stop()
+    price_cache.remove_listener(tick_history.record)
+    shutdown_projection_pool()
+    await stop_loop_monitor()
 
 
 app = FastAPI(title="FinAlly", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 app.include_router(chat_router)
 
 app.include_router(stream_router)
+app.include_router(history_router)
 app.include_router(portfolio_router)
+app.include_router(risk_router)
+app.include_router(projection_router)
+app.include_router(rebalance_router)
+app.include_router(orders_router)
+app.include_router(alerts_router)
 app.include_router(watchlist_router)
+app.include_router(metrics_router)
+app.include_router(loopmon_router)
 
 
 @app.get("/api/health")
@@ -1,50 +1,240 @@
-"""Shared in-memory price cache."""
+"""Shared in-memory price cache — the single source of truth for latest prices."""
 
 import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
 from datetime import datetime, timezone
 
 from app.market.models import PriceUpdate
+from app.metrics import PRICE_UPDATES
+
+logger = logging.getLogger(__name__)
+
+# Called after every write with the batch of updates and its epoch timestamp
+PriceListener = Callable[[list[PriceUpdate], float], None]
+
+
+def _direction(price: float, previous_price: float) -> str:
+    if price > previous_price:
+        return "up"
+    if price < previous_price:
+        return "down"
+    return "flat"
 
 
 class PriceCache:
-    """Thread-safe in-memory cache of latest prices per ticker."""
+    """Thread-safe in-memory cache of latest prices per ticker.
+
+    Every write bumps a cache-wide ``generation`` counter and the written
+    ticker's own version, so readers can cheaply tell whether anything they
+    care about has changed. ``get_all`` hands out an immutable snapshot that is
+    rebuilt at most once per generation and shared by every caller.
+
+    Listeners registered with ``add_listener`` are called synchronously after
+    each write with the batch of updates, so per-tick consumers (history,
+    recorders, order triggers) see exactly the ticker that moved.
+
+    ``remove_ticker`` only hides a ticker from the streamed set: providers
+    keep pricing it, so trades, orders and alerts on it still work, but
+    ``tickers`` and ``get_all`` leave it out until it is added again.
+    """
 
     def __init__(self):
         self._prices: dict[str, PriceUpdate] = {}
+        self._versions: dict[str, int] = {}
+        self._tickers: frozenset[str] = frozenset()
+        self._hidden: frozenset[str] = frozenset()
+        self._generation = 0
+        self._epoch = 0
+        self._writes = 0
+        self._snapshot: tuple[PriceUpdate, ...] = ()
+        self._snapshot_generation = 0
+        self._lock = threading.Lock()
         self._event = asyncio.Event()
+        self._listeners: tuple[PriceListener, ...] = ()
 
-    def update(self, ticker: str, price: float) -> PriceUpdate:
-        """Update price for a ticker and return the PriceUpdate."""
+    def _store(self, ticker: str, price: float, timestamp: str) -> PriceUpdate:
+        """Write one price. Caller must hold the lock."""
         prev = self._prices.get(ticker)
         previous_price = prev.price if prev else price
-
-        if price > previous_price:
-            direction = "up"
-        elif price < previous_price:
-            direction = "down"
-        else:
-            direction = "flat"
-
         update = PriceUpdate(
             ticker=ticker,
             price=round(price, 2),
             previous_price=round(previous_price, 2),
-            timestamp=datetime.now(timezone.utc).isoformat(),
-            direction=direction,
+            timestamp=timestamp,
+            direction=_direction(price, previous_price),
         )
+        self._put(update)
+        return update
+
+    def _put(self, update: PriceUpdate) -> None:
+        """Store a finished quote. Caller must hold the lock."""
+        ticker = update.ticker
         self._prices[ticker] = update
+        self._versions[ticker] = self._versions.get(ticker, 0) + 1
+        if ticker not in self._tickers and ticker not in self._hidden:
+            self._tickers = self._tickers | {ticker}
+
+    def _notify(self, updates: list[PriceUpdate], ts: float) -> None:
+        for listener in self._listeners:
+            try:
+                listener(updates, ts)
+            except Exception:
+                logger.exception("Price listener %r failed", listener)
         self._event.set()
         self._event.clear()
+
+    def update(self, ticker: str, price: float) -> PriceUpdate:
+        """Update price for a ticker and return the PriceUpdate."""
+        ts = time.time()
+        timestamp = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+        with self._lock:
+            update = self._store(ticker, price, timestamp)
+            self._generation += 1
+            self._writes += 1
+        self._notify([update], ts)
         return update
 
-    def get_all(self) -> list[PriceUpdate]:
-        """Return latest prices for all tickers."""
-        return list(self._prices.values())
+    def update_many(
+        self, prices: Mapping[str, float] | Iterable[tuple[str, float]]
+    ) -> list[PriceUpdate]:
+        """Update several tickers as one atomic batch.
+
+        All updates share a timestamp and a single generation bump, and
+        waiters are woken once for the whole batch.
+        """
+        items = prices.items() if isinstance(prices, Mapping) else prices
+        ts = time.time()
+        timestamp = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+        with self._lock:
+            updates = [self._store(t, p, timestamp) for t, p in items]
+            if updates:
+                self._generation += 1
+                self._writes += len(updates)
+        if updates:
+            self._notify(updates, ts)
+        return updates
+
+    def publish(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Store quotes priced elsewhere as one batch, e.g. by another worker.
+
+        Unlike ``update_many`` the previous price and timestamp are taken as
+        given, so every worker shows the same quotes as the producer.
+        """
+        if not updates:
+            return
+        with self._lock:
+            for update in updates:
+                self._put(update)
+            self._generation += 1
+            self._writes += len(updates)
+        self._notify(updates, ts)
+
+    def restore(self, updates: Iterable[PriceUpdate]) -> None:
+        """Seed saved quotes as-is, e.g. from a checkpoint, without notifying listeners."""
+        with self._lock:
+            for update in updates:
+                self._prices[update.ticker] = update
+                self._versions[update.ticker] = self._versions.get(update.ticker, 0) + 1
+            self._tickers = self._tickers | (self._prices.keys() - self._hidden)
+            self._generation += 1
 
     def get(self, ticker: str) -> PriceUpdate | None:
         """Return latest price for a single ticker."""
         return self._prices.get(ticker)
 
+    def get_many(self, tickers: Iterable[str]) -> dict[str, PriceUpdate]:
+        """Return latest prices for the given tickers from a single generation.
+
+        Tickers without a price are omitted.
+        """
+        with self._lock:
+            prices = self._prices
+            return {t: prices[t] for t in tickers if t in prices}
+
+    def get_all(self) -> tuple[PriceUpdate, ...]:
+        """Return latest prices for all tickers, leaving out hidden ones.
+
+        The returned tuple is shared between callers until the next write.
+        """
+        if self._snapshot_generation != self._generation:
+            with self._lock:
+                hidden = self._hidden
+                self._snapshot = tuple(u for u in self._prices.values() if u.ticker not in hidden)
+                self._snapshot_generation = self._generation
+        return self._snapshot
+
+    def version(self, ticker: str) -> int:
+        """Return how many times a ticker has been written (0 if never)."""
+        return self._versions.get(ticker, 0)
+
+    @property
+    def epoch(self) -> int:
+        """Bumped by ``clear()``, which restarts the per-ticker versions."""
+        return self._epoch
+
+    @property
+    def generation(self) -> int:
+        """Monotonic counter bumped on every write to the cache."""
+        return self._generation
+
+    @property
+    def writes(self) -> int:
+        """Total ticker prices written since startup."""
+        return self._writes
+
+    @property
+    def tickers(self) -> frozenset[str]:
+        """Tickers the cache tracks, whether or not they have a price yet."""
+        return self._tickers
+
+    @property
+    def hidden(self) -> frozenset[str]:
+        """Tickers removed from tracking whose prices are kept but not streamed."""
+        return self._hidden
+
+    @property
+    def universe(self) -> frozenset[str]:
+        """Tracked tickers plus hidden ones, which providers should keep pricing."""
+        return self._tickers | self._hidden
+
+    def add_ticker(self, ticker: str) -> None:
+        """Start tracking a ticker so providers pick it up."""
+        with self._lock:
+            if ticker not in self._tickers:
+                self._tickers = self._tickers | {ticker}
+            if ticker in self._hidden:
+                self._hidden = self._hidden - {ticker}
+                self._generation += 1
+
+    def remove_ticker(self, ticker: str) -> None:
+        """Stop tracking a ticker; its price is kept up to date but hidden."""
+        with self._lock:
+            self._tickers = self._tickers - {ticker}
+            self._hidden = self._hidden | {ticker}
+            self._generation += 1
+
+    def add_listener(self, listener: PriceListener) -> None:
+        """Call ``listener(updates, ts)`` after every write."""
+        if listener not in self._listeners:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: PriceListener) -> None:
+        """Stop calling a previously added listener."""
+        self._listeners = tuple(fn for fn in self._listeners if fn != listener)
+
+    def clear(self) -> None:
+        """Drop every ticker, price and version."""
+        with self._lock:
+            self._prices.clear()
+            self._versions.clear()
+            self._tickers = frozenset()
+            self._hidden = frozenset()
+            self._generation += 1
+            self._epoch += 1
+
     async def wait_for_update(self, timeout: float = 1.0) -> bool:
         """Wait for any price update. Returns True if update received."""
         try:
@@ -56,3 +246,4 @@ class PriceCache:
 
 # Singleton cache instance
 price_cache = PriceCache()
+PRICE_UPDATES.set_function(lambda: price_cache.writes)
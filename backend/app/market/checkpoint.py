@@ -0,0 +1,159 @@
+"""Warm restart: periodic checkpoints of the price cache and provider state.
+
+The checkpoint is a small ``.npz`` file next to the database (override
+with ``MARKET_CHECKPOINT_FILE``; ``MARKET_CHECKPOINT=false`` turns it off).
+It holds the latest quote per ticker, plus the provider's own state as
+JSON, such as the simulator's unrounded prices and random streams.
+
+``app.main`` loads it before the provider starts. The cache is therefore
+warm from the first request, and the simulator continues from where it
+stopped instead of jumping back to the seed prices. The file is rewritten
+every ``MARKET_CHECKPOINT_INTERVAL`` seconds while prices move, and once
+more on shutdown. Each write goes to a temporary file, named per process,
+that is then renamed into place, so a crash never leaves a torn
+checkpoint. With shared prices only the producing worker writes; readers
+would otherwise overwrite the simulator state with none.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import zipfile
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+from app.market.cache import price_cache
+from app.market.interface import MarketDataProvider
+from app.market.models import PriceUpdate
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_INTERVAL = 5.0  # seconds
+
+
+def market_checkpoint_enabled() -> bool:
+    return os.environ.get("MARKET_CHECKPOINT", "true").lower() != "false"
+
+
+def default_checkpoint_interval() -> float:
+    return float(os.environ.get("MARKET_CHECKPOINT_INTERVAL", DEFAULT_INTERVAL))
+
+
+def default_checkpoint_path() -> Path:
+    """``market_state.npz`` next to the SQLite file."""
+    from app.database import DB_PATH
+
+    configured = os.environ.get("MARKET_CHECKPOINT_FILE")
+    if configured:
+        return Path(configured)
+    return Path(os.path.dirname(DB_PATH) or ".") / "market_state.npz"
+
+
+def save_checkpoint(path: Path | str, updates: Sequence[PriceUpdate], state: dict | None) -> None:
+    """Atomically write quotes and provider state to ``path``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            version=np.array(FORMAT_VERSION),
+            ticker=np.array([u.ticker for u in updates], dtype=str),
+            price=np.array([u.price for u in updates], dtype=np.float64),
+            previous_price=np.array([u.previous_price for u in updates], dtype=np.float64),
+            timestamp=np.array([u.timestamp for u in updates], dtype=str),
+            direction=np.array([u.direction for u in updates], dtype=str),
+            state=np.frombuffer(json.dumps(state).encode(), dtype=np.uint8),
+        )
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: Path | str) -> tuple[list[PriceUpdate], dict | None] | None:
+    """Quotes and provider state from ``path``; None if missing or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                log.warning("Ignoring checkpoint %s with format version %s", path, data["version"])
+                return None
+            updates = [
+                PriceUpdate(ticker=t, price=p, previous_price=pp, timestamp=ts, direction=d)
+                for t, p, pp, ts, d in zip(
+                    data["ticker"].tolist(), data["price"].tolist(), data["previous_price"].tolist(),
+                    data["timestamp"].tolist(), data["direction"].tolist(),
+                )
+            ]
+            state = json.loads(data["state"].tobytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        log.warning("Ignoring unreadable checkpoint %s", path, exc_info=True)
+        return None
+    return updates, state
+
+
+class MarketCheckpointer:
+    """Restores the cache and provider at startup and checkpoints them periodically."""
+
+    def __init__(self, path: Path | str, provider: MarketDataProvider, interval: float = DEFAULT_INTERVAL):
+        self.path = Path(path)
+        self.interval = interval
+        self._provider = provider
+        self._saved_generation = -1
+        self._task: asyncio.Task | None = None
+
+    def restore(self) -> int:
+        """Seed the cache and provider from the checkpoint; returns quotes restored."""
+        loaded = load_checkpoint(self.path)
+        if loaded is None:
+            return 0
+        updates, state = loaded
+        price_cache.restore(updates)
+        if state is not None:
+            self._provider.restore_state(state)
+        self._saved_generation = price_cache.generation
+        log.info("Restored %d quotes from %s", len(updates), self.path)
+        return len(updates)
+
+    def _capture(self) -> tuple[int, tuple[PriceUpdate, ...], dict | None]:
+        # Cache and provider read together on the loop, so they agree
+        return price_cache.generation, price_cache.get_all(), self._provider.checkpoint_state()
+
+    def save(self) -> None:
+        if not self._provider.is_producer:
+            return
+        generation, updates, state = self._capture()
+        save_checkpoint(self.path, updates, state)
+        self._saved_generation = generation
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if price_cache.generation == self._saved_generation or not self._provider.is_producer:
+                continue
+            try:
+                generation, updates, state = self._capture()
+                await asyncio.to_thread(save_checkpoint, self.path, updates, state)
+                self._saved_generation = generation
+            except Exception:
+                log.exception("Market checkpoint failed")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic task and write a final checkpoint."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            self.save()
+        except Exception:
+            log.exception("Final market checkpoint failed")
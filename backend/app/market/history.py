@@ -0,0 +1,294 @@
+"""In-memory intraday tick history, OHLC bar and bulk quote endpoints."""
+
+import hashlib
+import os
+import re
+import secrets
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.market.models import PriceUpdate
+
+router = APIRouter(prefix="/api/prices", tags=["prices"])
+
+DEFAULT_CAPACITY = 7200  # ticks per ticker: one hour at the simulator's 500ms cadence
+
+_INTERVAL_RE = re.compile(r"^(\d+)([smh])$")
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+class TickRing:
+    """Fixed-size ring buffer of (timestamp, price) ticks backed by NumPy."""
+
+    __slots__ = ("_ts", "_px", "_head", "_size")
+
+    def __init__(self, capacity: int):
+        self._ts = np.empty(capacity, dtype=np.float64)
+        self._px = np.empty(capacity, dtype=np.float64)
+        self._head = 0  # next write position
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._ts)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts: float, price: float) -> None:
+        i = self._head
+        self._ts[i] = ts
+        self._px[i] = price
+        self._head = (i + 1) % len(self._ts)
+        if self._size < len(self._ts):
+            self._size += 1
+
+    def series(self, since: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, prices) oldest first, optionally from ``since`` on."""
+        if self._size < len(self._ts):
+            ts, px = self._ts[: self._size], self._px[: self._size]
+        else:
+            h = self._head
+            ts = np.concatenate((self._ts[h:], self._ts[:h]))
+            px = np.concatenate((self._px[h:], self._px[:h]))
+        if since is not None:
+            start = int(np.searchsorted(ts, since, side="left"))
+            ts, px = ts[start:], px[start:]
+        return ts, px
+
+
+def downsample(ts: np.ndarray, px: np.ndarray, points: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pick ``points`` evenly spaced ticks, always keeping the first and last."""
+    if len(ts) <= points:
+        return ts, px
+    idx = np.linspace(0, len(ts) - 1, points).round().astype(np.int64)
+    return ts[idx], px[idx]
+
+
+def aggregate_ohlc(ts: np.ndarray, px: np.ndarray, interval: float) -> dict[str, np.ndarray]:
+    """Bucket ordered ticks into OHLC bars of ``interval`` seconds."""
+    if len(ts) == 0:
+        empty = np.empty(0)
+        return {
+            "time": empty,
+            "open": empty,
+            "high": empty,
+            "low": empty,
+            "close": empty,
+            "ticks": np.empty(0, dtype=np.int64),
+        }
+    buckets = np.floor(ts / interval).astype(np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    bounds = np.append(starts, len(px))
+    return {
+        "time": buckets[starts] * interval,
+        "open": px[starts],
+        "high": np.maximum.reduceat(px, starts),
+        "low": np.minimum.reduceat(px, starts),
+        "close": px[bounds[1:] - 1],
+        "ticks": np.diff(bounds),
+    }
+
+
+class TickHistory:
+    """Per-ticker ring buffers fed by the price cache.
+
+    Memory is bounded at ``capacity`` ticks per ticker; older ticks are
+    overwritten in place.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._capacity = capacity
+        self._rings: dict[str, TickRing] = {}
+
+    def record(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Price cache listener: append one tick per updated ticker.
+
+        Tickers hidden from the stream are still priced but not recorded,
+        so a dropped ring stays dropped until the ticker is tracked again.
+        """
+        rings = self._rings
+        hidden = price_cache.hidden
+        for u in updates:
+            if u.ticker in hidden:
+                continue
+            ring = rings.get(u.ticker)
+            if ring is None:
+                ring = rings[u.ticker] = TickRing(self._capacity)
+            ring.append(ts, u.price)
+
+    def tickers(self) -> list[str]:
+        return list(self._rings)
+
+    def series(self, ticker: str, since: float | None = None) -> tuple[np.ndarray, np.ndarray] | None:
+        """Return (timestamps, prices) for a ticker, or None if never seen."""
+        ring = self._rings.get(ticker)
+        return ring.series(since) if ring is not None else None
+
+    def bars(self, ticker: str, interval: float, since: float | None = None) -> dict[str, np.ndarray] | None:
+        """Return OHLC bars for a ticker, or None if never seen."""
+        data = self.series(ticker, since)
+        return aggregate_ohlc(*data, interval) if data is not None else None
+
+    def drop(self, ticker: str) -> None:
+        """Forget a ticker's ticks once it is no longer tracked."""
+        self._rings.pop(ticker, None)
+
+    def clear(self) -> None:
+        self._rings.clear()
+
+
+# Singleton history, registered as a price cache listener in app.main
+tick_history = TickHistory(int(os.environ.get("TICK_HISTORY_SIZE", DEFAULT_CAPACITY)))
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+
+class Bar(BaseModel):
+    time: int  # bar open, epoch seconds
+    open: float
+    high: float
+    low: float
+    close: float
+    ticks: int
+
+
+class BarsResponse(BaseModel):
+    ticker: str
+    interval: str
+    bars: list[Bar]
+
+
+class PricesResponse(BaseModel):
+    """Latest quotes and sparklines in columns; row ``i`` of each is ``tickers[i]``."""
+
+    tickers: list[str]
+    price: list[float]
+    previous_price: list[float]
+    direction: list[str]
+    timestamp: list[str]
+    series_time: list[list[float]]  # epoch seconds, oldest first
+    series_price: list[list[float]]
+
+
+# Distinguishes ETags across restarts, when cache versions start over
+_ETAG_PREFIX = secrets.token_hex(4)
+
+
+def parse_interval(interval: str) -> int:
+    """Parse '30s' / '1m' / '1h' into seconds."""
+    match = _INTERVAL_RE.match(interval)
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail=f"Invalid interval: {interval}")
+    return int(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+def _to_bars(data: dict[str, np.ndarray], limit: int | None) -> list[Bar]:
+    if limit is not None:
+        data = {k: v[-limit:] for k, v in data.items()}
+    return [
+        Bar(time=int(t), open=o, high=h, low=lo, close=c, ticks=int(n))
+        for t, o, h, lo, c, n in zip(
+            data["time"].tolist(), data["open"].tolist(), data["high"].tolist(),
+            data["low"].tolist(), data["close"].tolist(), data["ticks"].tolist(),
+        )
+    ]
+
+
+def _prices_etag(versions: dict[str, int], points: int) -> str:
+    """ETag from the returned tickers' cache versions; ticks feed history and cache together."""
+    key = ",".join(f"{t}:{v}" for t, v in versions.items())
+    key = f"{price_cache.epoch}|{points}|{key}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'"{_ETAG_PREFIX}-{digest}"'
+
+
+@router.get("", response_model=PricesResponse)
+async def get_prices(
+    request: Request,
+    response: Response,
+    tickers: str | None = None,
+    points: int = Query(60, ge=2, le=1000),
+):
+    """Latest quotes plus a downsampled recent series for many tickers in one call.
+
+    Defaults to every ticker in the price cache. Answers 304 when the
+    client's ``If-None-Match`` matches, i.e. none of the tickers has ticked.
+    """
+    wanted = (
+        sorted({t.strip().upper() for t in tickers.split(",") if t.strip()})
+        if tickers
+        else sorted(price_cache.tickers)
+    )
+    # Versions read before the quotes, so a tick in between only makes the ETag older
+    versions = {t: price_cache.version(t) for t in wanted}
+    quotes = price_cache.get_many(wanted)
+    etag = _prices_etag({t: versions[t] for t in wanted if t in quotes}, points)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    result = PricesResponse(
+        tickers=[], price=[], previous_price=[], direction=[], timestamp=[],
+        series_time=[], series_price=[],
+    )
+    for ticker in wanted:
+        quote = quotes.get(ticker)
+        if quote is None:
+            continue
+        data = tick_history.series(ticker)
+        ts, px = downsample(*data, points) if data is not None else (np.empty(0), np.empty(0))
+        result.tickers.append(ticker)
+        result.price.append(quote.price)
+        result.previous_price.append(quote.previous_price)
+        result.direction.append(quote.direction)
+        result.timestamp.append(quote.timestamp)
+        result.series_time.append(np.round(ts, 3).tolist())
+        result.series_price.append(px.tolist())
+    return result
+
+
+@router.get("/bars", response_model=list[BarsResponse])
+async def get_bars_bulk(
+    interval: str = "1m",
+    tickers: str | None = None,
+    limit: int | None = Query(None, ge=1),
+):
+    """OHLC bars for many tickers (default: the watchlist) in one call."""
+    seconds = parse_interval(interval)
+    if tickers:
+        wanted = [t.strip().upper() for t in tickers.split(",") if t.strip()]
+    else:
+        db = await get_db()
+        try:
+            cursor = await db.execute(
+                "SELECT ticker FROM watchlist WHERE user_id = 'default' ORDER BY added_at"
+            )
+            wanted = [row["ticker"] for row in await cursor.fetchall()]
+        finally:
+            await db.close()
+    result = []
+    for ticker in wanted:
+        data = tick_history.bars(ticker, seconds)
+        if data is not None:
+            result.append(BarsResponse(ticker=ticker, interval=interval, bars=_to_bars(data, limit)))
+    return result
+
+
+@router.get("/{ticker}/bars", response_model=BarsResponse)
+async def get_bars(ticker: str, interval: str = "1m", limit: int | None = Query(None, ge=1)):
+    """OHLC bars for one ticker aggregated on the fly from recent ticks."""
+    seconds = parse_interval(interval)
+    ticker = ticker.upper().strip()
+    data = tick_history.bars(ticker, seconds)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"No price history for {ticker}")
+    return BarsResponse(ticker=ticker, interval=interval, bars=_to_bars(data, limit))
@@ -13,3 +13,15 @@ class MarketDataProvider(ABC):
     @abstractmethod
     async def stop(self) -> None:
         """Stop producing price updates."""
+
+    @property
+    def is_producer(self) -> bool:
+        """Whether this process generates the prices it serves (and checkpoints them)."""
+        return True
+
+    def checkpoint_state(self) -> dict | None:
+        """JSON-serializable state to resume from after a restart, if any."""
+        return None
+
+    def restore_state(self, state: dict) -> None:
+        """Resume from a previous ``checkpoint_state()``; called before ``start``."""
@@ -8,6 +8,7 @@ import httpx
 
 from app.market.cache import price_cache
 from app.market.interface import MarketDataProvider
+from app.metrics import MASSIVE_POLL_ERRORS, MASSIVE_POLL_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -47,21 +48,25 @@ class MassiveClient(MarketDataProvider):
 
     async def _poll(self) -> None:
         """Fetch latest prices for all tickers from Polygon.io snapshot endpoint."""
-        tickers_csv = ",".join(self._tickers)
+        tickers_csv = ",".join(sorted(price_cache.universe.union(self._tickers)))
         url = f"{POLYGON_BASE_URL}/v2/snapshot/locale/us/markets/stocks/tickers"
         params = {"tickers": tickers_csv, "apiKey": self._api_key}
 
         try:
-            resp = await self._client.get(url, params=params)
+            with MASSIVE_POLL_SECONDS.time():
+                resp = await self._client.get(url, params=params)
             resp.raise_for_status()
             data = resp.json()
 
+            prices = {}
             for item in data.get("tickers", []):
                 ticker = item.get("ticker")
                 last_trade = item.get("lastTrade", {})
                 price = last_trade.get("p")
                 if ticker and price is not None:
-                    price_cache.update(ticker, float(price))
+                    prices[ticker] = float(price)
+            price_cache.update_many(prices)
 
         except httpx.HTTPError as e:
+            MASSIVE_POLL_ERRORS.inc()
             logger.error("Massive API poll failed: %s", e)
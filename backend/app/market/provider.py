@@ -7,6 +7,20 @@ from app.market.interface import MarketDataProvider
 
 def create_provider() -> MarketDataProvider:
     """Create the appropriate provider based on environment."""
+    from app.market.shared import SharedMarket, shared_prices_enabled
+
+    if shared_prices_enabled():
+        return SharedMarket(_create_source)
+    return _create_source()
+
+
+def _create_source() -> MarketDataProvider:
+    """Create the provider that actually produces prices."""
+    if os.environ.get("MARKET_REPLAY_FILE", "").strip():
+        from app.market.replay import replay_from_env
+
+        return replay_from_env()
+
     api_key = os.environ.get("MASSIVE_API_KEY", "").strip()
 
     if api_key:
@@ -17,4 +31,5 @@ def create_provider() -> MarketDataProvider:
 
     from app.market.simulator import Simulator
 
-    return Simulator()
+    seed = os.environ.get("SIMULATOR_SEED", "").strip()
+    return Simulator(seed=int(seed) if seed else None)
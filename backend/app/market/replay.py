@@ -0,0 +1,183 @@
+"""Replay recorded ticks from a local file into the price cache."""
+
+import asyncio
+import csv
+import logging
+import os
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from app.market.cache import price_cache
+from app.market.interface import MarketDataProvider
+from app.market.tickstore import TickStoreReader
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 65536
+
+Tick = tuple[float, str, float]  # (epoch seconds, ticker, price)
+
+
+def _parse_timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _iter_csv(path: Path) -> Iterator[Tick]:
+    """Rows of ``timestamp,ticker,price`` (header required; epoch or ISO-8601)."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield _parse_timestamp(row["timestamp"]), row["ticker"], float(row["price"])
+
+
+def _iter_parquet(path: Path) -> Iterator[Tick]:
+    """Record batches of a Parquet file with timestamp/ticker/price columns."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Replaying Parquet files requires pyarrow") from e
+
+    for batch in pq.ParquetFile(path).iter_batches(
+        batch_size=CHUNK_ROWS, columns=["timestamp", "ticker", "price"]
+    ):
+        ts = batch.column("timestamp")
+        if pa.types.is_timestamp(ts.type):
+            ts = ts.cast(pa.timestamp("us")).cast(pa.int64()).to_numpy() / 1e6
+        else:
+            ts = ts.to_numpy()
+        yield from zip(
+            ts.tolist(),
+            batch.column("ticker").to_pylist(),
+            batch.column("price").to_numpy().tolist(),
+        )
+
+
+def _iter_npz(path: Path) -> Iterator[Tick]:
+    """Arrays ``ts`` (epoch seconds), ``ticker`` and ``price`` of equal length.
+
+    NumPy materialises each npz member on access, so this format is read
+    whole; use CSV, Parquet or a tick store directory for large files.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        ts, tickers, px = data["ts"], data["ticker"], data["price"]
+        for lo in range(0, len(ts), CHUNK_ROWS):
+            hi = lo + CHUNK_ROWS
+            yield from zip(ts[lo:hi].tolist(), tickers[lo:hi].tolist(), px[lo:hi].tolist())
+
+
+def _iter_tick_store(path: Path) -> Iterator[Tick]:
+    """Every day of a tick store directory (see app.market.tickstore)."""
+    reader = TickStoreReader(path)
+    symbols = reader.symbols
+    for day in reader.days():
+        cols = reader.map_day(day)
+        if cols is None:
+            continue
+        for lo in range(0, len(cols["ts"]), CHUNK_ROWS):
+            hi = lo + CHUNK_ROWS
+            yield from zip(
+                cols["ts"][lo:hi].tolist(),
+                (symbols[i] for i in cols["sym"][lo:hi].tolist()),
+                cols["px"][lo:hi].tolist(),
+            )
+
+
+def iter_ticks(path: Path | str) -> Iterator[Tick]:
+    """Stream ticks from a CSV, Parquet or npz file, or a tick store directory."""
+    path = Path(path)
+    if path.is_dir():
+        return _iter_tick_store(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return _iter_csv(path)
+    if suffix == ".parquet":
+        return _iter_parquet(path)
+    if suffix == ".npz":
+        return _iter_npz(path)
+    raise ValueError(f"Unsupported replay file: {path}")
+
+
+def _parse_speed(value: str) -> float:
+    """``max`` (or 0) replays as fast as possible; otherwise a ×N multiplier."""
+    value = value.strip().lower()
+    if value in ("", "1"):
+        return 1.0
+    if value == "max":
+        return 0.0
+    return float(value)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Feeds recorded ticks into the price cache at real-time, ×N or max speed.
+
+    Ticks sharing a timestamp are published as one ``update_many`` batch.
+    Batches are scheduled against the wall clock at replay start so long
+    replays don't drift; with ``speed=0`` they are published back to back,
+    yielding to the event loop between batches.
+    """
+
+    def __init__(self, path: Path | str, speed: float = 1.0):
+        self._path = Path(path)
+        self._speed = speed
+        self._task: asyncio.Task | None = None
+        self.ticks_replayed = 0
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        wall_start = loop.time()
+        first_ts: float | None = None
+        batch_ts: float | None = None
+        batch: dict[str, float] = {}
+
+        for ts, ticker, price in iter_ticks(self._path):
+            if ts != batch_ts and batch:
+                await self._publish(batch, batch_ts, first_ts, wall_start, loop)
+                batch = {}
+            if first_ts is None:
+                first_ts = ts
+            batch_ts = ts
+            batch[ticker] = price
+
+        if batch:
+            await self._publish(batch, batch_ts, first_ts, wall_start, loop)
+        logger.info("Replay of %s finished after %d ticks", self._path, self.ticks_replayed)
+
+    async def _publish(
+        self,
+        batch: dict[str, float],
+        ts: float,
+        first_ts: float,
+        wall_start: float,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        if self._speed > 0:
+            delay = wall_start + (ts - first_ts) / self._speed - loop.time()
+            await asyncio.sleep(max(delay, 0))
+        else:
+            await asyncio.sleep(0)
+        price_cache.update_many(batch)
+        self.ticks_replayed += len(batch)
+
+
+def replay_from_env() -> ReplayProvider:
+    return ReplayProvider(
+        os.environ["MARKET_REPLAY_FILE"],
+        speed=_parse_speed(os.environ.get("MARKET_REPLAY_SPEED", "1")),
+    )
@@ -0,0 +1,394 @@
+"""Shared-memory price table so several uvicorn workers see one market.
+
+With ``SHARED_PRICES=true`` each worker wraps its provider in a
+``SharedMarket``. Workers race for an exclusive ``flock`` on a lock file
+next to the database; the winner is the producer. It runs the real
+provider and mirrors every price cache write into a
+``multiprocessing.shared_memory`` table. The other workers attach to the
+table and copy changed slots, with the producer's previous price and
+timestamp, into their local price cache, so everything downstream of the
+cache (SSE, portfolio, history) works unchanged. Only the producer
+records ticks and snapshots. The lock is released when the producer
+dies, so a reader takes over within one election interval.
+
+Table layout: a 64-byte header (magic, capacity, slot count, generation)
+followed by fixed-size slots of (seq, price, previous price, timestamp,
+ticker). Each slot is guarded by a seqlock: the writer makes ``seq`` odd,
+writes the fields, then makes it even again. Readers copy the columns
+between two reads of ``seq`` and keep only slots whose seq was even and
+unchanged; torn slots are picked up on the next poll.
+
+Prices have a single writer, but any worker may claim a slot, under a
+small lock file next to the database. A ticker added to the watchlist in
+a reader is registered as an empty slot. The producer tracks new slots,
+so providers that price only tracked tickers (Massive) pick it up. A
+worker that takes over as producer continues from the table's last
+prices instead of the provider's seed prices.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+from collections.abc import Callable
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from app.market.cache import _direction, price_cache
+from app.market.interface import MarketDataProvider
+from app.market.models import PriceUpdate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = "finally_prices"
+DEFAULT_CAPACITY = 1024
+MAGIC = 0x46494E50_00000001  # "FINP" + layout version
+HEADER_BYTES = 64
+POLL_INTERVAL = 0.1  # seconds between reader polls
+ELECTION_INTERVAL = 2.0  # seconds between reader attempts to take over
+
+SLOT_DTYPE = np.dtype(
+    [("seq", "<u8"), ("price", "<f8"), ("prev", "<f8"), ("ts", "<f8"), ("ticker", "S16")]
+)
+
+# Header word indexes
+_MAGIC, _CAPACITY, _COUNT, _GENERATION = range(4)
+
+
+def _segment_size(capacity: int) -> int:
+    return HEADER_BYTES + capacity * SLOT_DTYPE.itemsize
+
+
+def _unlink(shm: shared_memory.SharedMemory) -> None:
+    # unlink() unregisters from the resource tracker, which we opted out of
+    resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+class SharedPriceTable:
+    """Fixed-capacity seqlocked price slots in a named shared memory segment."""
+
+    def __init__(
+        self, shm: shared_memory.SharedMemory, capacity: int, lock_path: Path | None = None
+    ):
+        self._shm = shm
+        self._lock_path = lock_path
+        self._header = np.ndarray((4,), dtype="<u8", buffer=shm.buf)
+        slots = np.ndarray((capacity,), dtype=SLOT_DTYPE, buffer=shm.buf, offset=HEADER_BYTES)
+        self._seq = slots["seq"]
+        self._price = slots["price"]
+        self._prev = slots["prev"]
+        self._ts = slots["ts"]
+        self._ticker = slots["ticker"]
+        self._slots: dict[str, int] = {}
+        self._known = 0
+
+    @classmethod
+    def open(
+        cls,
+        name: str = DEFAULT_NAME,
+        capacity: int = DEFAULT_CAPACITY,
+        create: bool = False,
+        lock_path: Path | None = None,
+    ):
+        """Attach to a segment, creating (or replacing a mismatched) one if asked.
+
+        ``lock_path`` serializes slot claims across processes; without it
+        only one process may add tickers.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            if not create:
+                raise
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+            np.ndarray((4,), dtype="<u8", buffer=shm.buf)[:] = (MAGIC, capacity, 0, 0)
+        # Segments outlive any one worker; keep the resource tracker from
+        # unlinking them when this process exits.
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+        header = np.ndarray((4,), dtype="<u8", buffer=shm.buf)
+        if header[_MAGIC] != MAGIC or shm.size < _segment_size(int(header[_CAPACITY])):
+            if not create:
+                shm.close()
+                raise ValueError(f"Shared memory segment {name} has an unknown layout")
+            del header
+            _unlink(shm)
+            shm.close()
+            return cls.open(name, capacity, create=True, lock_path=lock_path)
+        return cls(shm, int(header[_CAPACITY]), lock_path)
+
+    def close(self) -> None:
+        # Drop views before closing so the buffer can be released
+        self._header = self._seq = self._price = self._prev = self._ts = self._ticker = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        _unlink(self._shm)
+
+    @property
+    def generation(self) -> int:
+        return int(self._header[_GENERATION])
+
+    def _refresh_slots(self) -> None:
+        count = int(self._header[_COUNT])
+        for i in range(self._known, count):
+            self._slots[self._ticker[i].decode()] = i
+        self._known = count
+
+    def _slot_for(self, ticker: str) -> int:
+        slot = self._slots.get(ticker)
+        if slot is None:
+            self._refresh_slots()
+            slot = self._slots.get(ticker)
+        if slot is None:
+            slot = self._claim(ticker)
+        return slot
+
+    def _claim(self, ticker: str) -> int:
+        fd = None
+        if self._lock_path is not None:
+            fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            self._refresh_slots()  # another process may have claimed it meanwhile
+            slot = self._slots.get(ticker)
+            if slot is not None:
+                return slot
+            slot = int(self._header[_COUNT])
+            if slot >= len(self._seq):
+                raise RuntimeError("Shared price table is full")
+            self._ticker[slot] = ticker.encode()
+            self._header[_COUNT] = slot + 1
+            self._slots[ticker] = slot
+            self._known = slot + 1
+            return slot
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def register(self, ticker: str) -> None:
+        """Give ``ticker`` a slot without a price, so the producer starts tracking it."""
+        self._slot_for(ticker)
+
+    def tickers(self) -> list[str]:
+        """Tickers with a slot, in slot order."""
+        self._refresh_slots()
+        return [self._ticker[i].decode() for i in range(self._known)]
+
+    def latest(self) -> dict[str, float]:
+        """Last published price of every slot that has one."""
+        last_seq = np.zeros(self.capacity, dtype="<u8")
+        tickers, prices, _ = self.read_changed(last_seq)
+        return dict(zip(tickers, prices.tolist()))
+
+    def write(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Publish a batch of updates (single writer only)."""
+        seq, price, prev, stamp = self._seq, self._price, self._prev, self._ts
+        for u in updates:
+            i = self._slot_for(u.ticker)
+            seq[i] += 1  # odd: write in progress
+            price[i] = u.price
+            prev[i] = u.previous_price
+            stamp[i] = ts
+            seq[i] += 1  # even: consistent
+        self._header[_GENERATION] += 1
+
+    def read_changed(self, last_seq: np.ndarray) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """Return tickers, prices and seqs of slots whose seq moved past ``last_seq``.
+
+        ``last_seq`` is updated in place for every slot read consistently.
+        """
+        names, price, _, _, seq = self._read(last_seq)
+        return names, price, seq
+
+    def read_updates(self, last_seq: np.ndarray) -> dict[float, list[PriceUpdate]]:
+        """Quotes of slots changed since ``last_seq``, grouped by the producer's batch time."""
+        names, price, prev, stamp, _ = self._read(last_seq)
+        batches: dict[float, list[PriceUpdate]] = {}
+        for ticker, p, pp, ts in zip(names, price.tolist(), prev.tolist(), stamp.tolist()):
+            batches.setdefault(ts, []).append(
+                PriceUpdate(
+                    ticker=ticker,
+                    price=p,
+                    previous_price=pp,
+                    timestamp=datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                    direction=_direction(p, pp),
+                )
+            )
+        return batches
+
+    def _read(self, last_seq: np.ndarray):
+        count = min(int(self._header[_COUNT]), len(last_seq))
+        before = self._seq[:count].copy()
+        price = self._price[:count].copy()
+        prev = self._prev[:count].copy()
+        stamp = self._ts[:count].copy()
+        after = self._seq[:count].copy()
+        ok = (before == after) & (before % 2 == 0) & (before != last_seq[:count])
+        idx = np.flatnonzero(ok)
+        last_seq[idx] = before[idx]
+        if count > self._known:
+            self._refresh_slots()
+        names = [self._ticker[i].decode() for i in idx.tolist()]
+        return names, price[idx], prev[idx], stamp[idx], before[idx]
+
+    @property
+    def capacity(self) -> int:
+        return len(self._seq)
+
+
+def _lock_path() -> Path:
+    from app.database import DB_PATH
+
+    return Path(os.path.dirname(DB_PATH) or ".") / "market.lock"
+
+
+def _slots_lock_path() -> Path:
+    return _lock_path().with_name("market.slots.lock")
+
+
+def _try_lock(path: Path) -> int | None:
+    """Take an exclusive non-blocking flock; return the fd or None if held."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+class SharedMarket(MarketDataProvider):
+    """Runs the real provider in one worker and mirrors prices into the rest."""
+
+    def __init__(
+        self,
+        factory: Callable[[], MarketDataProvider],
+        name: str = DEFAULT_NAME,
+        capacity: int = DEFAULT_CAPACITY,
+    ):
+        self._factory = factory
+        self._name = name
+        self._capacity = capacity
+        self._lock_fd: int | None = None
+        self._provider: MarketDataProvider | None = None
+        self._table: SharedPriceTable | None = None
+        self._task: asyncio.Task | None = None
+        self._tracker: asyncio.Task | None = None
+        self._restore: dict | None = None
+
+    @property
+    def is_producer(self) -> bool:
+        return self._provider is not None
+
+    def checkpoint_state(self) -> dict | None:
+        return self._provider.checkpoint_state() if self._provider else None
+
+    def restore_state(self, state: dict) -> None:
+        """Handed to the real provider if this worker starts as the producer."""
+        self._restore = state
+
+    async def start(self) -> None:
+        if not await self._try_become_producer():
+            self._restore = None  # stale by the time a reader takes over
+            self._task = asyncio.create_task(self._mirror())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._tracker):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._tracker = None
+        if self._provider:
+            price_cache.remove_listener(self._table.write)
+            await self._provider.stop()
+            self._provider = None
+        if self._table:
+            self._table.close()
+            self._table = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _try_become_producer(self) -> bool:
+        fd = _try_lock(_lock_path())
+        if fd is None:
+            return False
+        self._lock_fd = fd
+        if self._table is None:
+            self._table = SharedPriceTable.open(
+                self._name, self._capacity, create=True, lock_path=_slots_lock_path()
+            )
+        price_cache.add_listener(self._table.write)
+        self._provider = self._factory()
+        if self._restore is not None:
+            self._provider.restore_state(self._restore)
+            self._restore = None
+        else:
+            # Taking over: continue from the last shared prices, not the seeds
+            latest = self._table.latest()
+            if latest:
+                self._provider.restore_state({"prices": latest})
+        await self._provider.start()
+        self._tracker = asyncio.create_task(self._track_registered())
+        logger.info("Worker %d is the shared market producer", os.getpid())
+        return True
+
+    async def _track_registered(self) -> None:
+        """Track tickers that readers registered, so the provider prices them."""
+        seen = 0
+        while True:
+            tickers = self._table.tickers()
+            for ticker in tickers[seen:]:
+                price_cache.add_ticker(ticker)
+            seen = len(tickers)
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _register(self, tickers: frozenset[str]) -> None:
+        """Claim slots for tickers tracked in this reader."""
+        try:
+            for ticker in tickers:
+                self._table.register(ticker)
+        except RuntimeError:
+            logger.warning("Shared price table is full; new tickers are not forwarded")
+
+    async def _mirror(self) -> None:
+        """Copy changed slots into the local cache; take over if the producer dies."""
+        loop = asyncio.get_running_loop()
+        next_election = loop.time() + ELECTION_INTERVAL
+        last_seq = np.zeros(self._capacity, dtype="<u8")
+        generation = -1
+        registered = None
+        while True:
+            if self._table is None:
+                try:
+                    self._table = SharedPriceTable.open(
+                        self._name, self._capacity, lock_path=_slots_lock_path()
+                    )
+                    last_seq = np.zeros(self._table.capacity, dtype="<u8")
+                except (FileNotFoundError, ValueError):
+                    pass
+            if self._table is not None and price_cache.tickers is not registered:
+                registered = price_cache.tickers
+                self._register(registered)
+            if self._table is not None and self._table.generation != generation:
+                generation = self._table.generation
+                for ts, updates in sorted(self._table.read_updates(last_seq).items()):
+                    price_cache.publish(updates, ts)
+            if loop.time() >= next_election:
+                next_election = loop.time() + ELECTION_INTERVAL
+                if await self._try_become_producer():
+                    return
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+def shared_prices_enabled() -> bool:
+    return os.environ.get("SHARED_PRICES", "").lower() == "true"
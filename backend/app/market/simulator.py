@@ -2,12 +2,13 @@
 
 import asyncio
 import math
-import random
+import time
 
 import numpy as np
 
 from app.market.cache import price_cache
 from app.market.interface import MarketDataProvider
+from app.metrics import SIMULATOR_STEP_SECONDS
 
 # Seed prices and per-ticker parameters (annual drift, annual volatility)
 TICKER_CONFIG = {
@@ -35,38 +36,83 @@ EVENT_MAX_PCT = 0.05
 
 def _build_correlation_matrix(tickers: list[str]) -> np.ndarray:
     """Build a correlation matrix with tech and finance clusters."""
-    n = len(tickers)
-    corr = np.eye(n)
-    for i in range(n):
-        for j in range(i + 1, n):
-            ti, tj = tickers[i], tickers[j]
-            if ti in TECH_TICKERS and tj in TECH_TICKERS:
-                corr[i, j] = corr[j, i] = 0.6
-            elif ti in FINANCE_TICKERS and tj in FINANCE_TICKERS:
-                corr[i, j] = corr[j, i] = 0.5
-            else:
-                corr[i, j] = corr[j, i] = 0.2
+    tech = np.array([t in TECH_TICKERS for t in tickers])
+    finance = np.array([t in FINANCE_TICKERS for t in tickers])
+    corr = np.full((len(tickers), len(tickers)), 0.2)
+    corr[np.ix_(tech, tech)] = 0.6
+    corr[np.ix_(finance, finance)] = 0.5
+    np.fill_diagonal(corr, 1.0)
     return corr
 
 
 class Simulator(MarketDataProvider):
-    """GBM-based market data simulator."""
-
-    def __init__(self):
+    """GBM-based market data simulator.
+
+    Randomness comes from two per-instance ``numpy.random.Generator`` (PCG64)
+    streams — one for the diffusion shocks, one for the jump events — spawned
+    from ``seed``. The same seed therefore replays the same price path, and
+    because each step consumes a fixed-size block from each stream,
+    ``fast_forward(n)`` follows the same path as ``n`` calls to ``_step``.
+
+    ``config`` overrides the simulated universe (same shape as
+    ``TICKER_CONFIG``), e.g. for backtests or benchmarks over more tickers.
+    ``interval`` is the simulated seconds per step; backtests use coarser
+    bars than the live 500ms cadence. Random events stay a per-step chance.
+
+    ``checkpoint_state``/``restore_state`` carry prices and both random
+    streams across restarts, so a restarted app continues the same path.
+    """
+
+    def __init__(
+        self,
+        seed: int | None = None,
+        config: dict[str, dict] | None = None,
+        interval: float = UPDATE_INTERVAL,
+    ):
+        config = config or TICKER_CONFIG
         self._task: asyncio.Task | None = None
-        self._tickers = list(TICKER_CONFIG.keys())
-        self._prices = {t: cfg["seed"] for t, cfg in TICKER_CONFIG.items()}
-        self._dt = UPDATE_INTERVAL / (252 * 6.5 * 3600)  # fraction of trading year
+        self._tickers = list(config.keys())
+        self._prices = {t: cfg["seed"] for t, cfg in config.items()}
+        self._interval = interval
+        self._dt = interval / (252 * 6.5 * 3600)  # fraction of trading year
+        self._drift = np.array([config[t]["drift"] for t in self._tickers])
+        self._vol = np.array([config[t]["vol"] for t in self._tickers])
+
+        self.seed = seed
+        shock_seq, event_seq = np.random.SeedSequence(seed).spawn(2)
+        self._shock_rng = np.random.Generator(np.random.PCG64(shock_seq))
+        self._event_rng = np.random.Generator(np.random.PCG64(event_seq))
 
         # Precompute Cholesky decomposition for correlated random draws
         corr = _build_correlation_matrix(self._tickers)
         self._cholesky = np.linalg.cholesky(corr)
 
+    @property
+    def tickers(self) -> list[str]:
+        """Ticker order used for the columns of ``fast_forward`` paths."""
+        return list(self._tickers)
+
+    def checkpoint_state(self) -> dict:
+        return {
+            "seed": self.seed,
+            "prices": dict(self._prices),
+            "shock_rng": self._shock_rng.bit_generator.state,
+            "event_rng": self._event_rng.bit_generator.state,
+        }
+
+    def restore_state(self, state: dict) -> None:
+        """Continue from checkpointed prices; the random streams only if the seed is unchanged."""
+        for ticker, price in state.get("prices", {}).items():
+            if ticker in self._prices:
+                self._prices[ticker] = float(price)
+        if state.get("seed") == self.seed and "shock_rng" in state and "event_rng" in state:
+            self._shock_rng.bit_generator.state = state["shock_rng"]
+            self._event_rng.bit_generator.state = state["event_rng"]
+
     async def start(self) -> None:
         """Start the simulation loop."""
         # Seed initial prices into cache
-        for ticker, price in self._prices.items():
-            price_cache.update(ticker, price)
+        price_cache.update_many(self._prices)
         self._task = asyncio.create_task(self._run())
 
     async def stop(self) -> None:
@@ -82,31 +128,49 @@ class Simulator(MarketDataProvider):
         """Main simulation loop."""
         while True:
             self._step()
-            await asyncio.sleep(UPDATE_INTERVAL)
+            await asyncio.sleep(self._interval)
 
-    def _step(self) -> None:
-        """Advance all prices by one GBM step with correlation."""
+    def _growth_factors(self, steps: int) -> np.ndarray:
+        """Draw ``steps`` rows of per-ticker multiplicative price moves."""
         n = len(self._tickers)
         # Correlated normal draws
-        z_independent = np.random.standard_normal(n)
-        z_correlated = self._cholesky @ z_independent
-
-        for i, ticker in enumerate(self._tickers):
-            cfg = TICKER_CONFIG[ticker]
-            drift = cfg["drift"]
-            vol = cfg["vol"]
-            s = self._prices[ticker]
-
-            # GBM: dS = S * (mu*dt + sigma*sqrt(dt)*Z)
-            ds = s * (drift * self._dt + vol * math.sqrt(self._dt) * z_correlated[i])
-            new_price = s + ds
-
-            # Random event: sudden 2-5% move
-            if random.random() < EVENT_PROBABILITY:
-                pct = random.uniform(EVENT_MIN_PCT, EVENT_MAX_PCT)
-                sign = random.choice([-1, 1])
-                new_price *= 1 + sign * pct
-
-            new_price = max(new_price, 0.01)  # floor at 1 cent
-            self._prices[ticker] = new_price
-            price_cache.update(ticker, new_price)
+        z = self._shock_rng.standard_normal((steps, n)) @ self._cholesky.T
+        # GBM: dS = S * (mu*dt + sigma*sqrt(dt)*Z)
+        factors = 1 + self._drift * self._dt + self._vol * math.sqrt(self._dt) * z
+
+        # Random event: sudden 2-5% move
+        u = self._event_rng.random((steps, 3, n))
+        hit = u[:, 0] < EVENT_PROBABILITY
+        pct = EVENT_MIN_PCT + (EVENT_MAX_PCT - EVENT_MIN_PCT) * u[:, 1]
+        sign = np.where(u[:, 2] < 0.5, -1.0, 1.0)
+        return np.where(hit, factors * (1 + sign * pct), factors)
+
+    def fast_forward(self, steps: int) -> np.ndarray:
+        """Advance ``steps`` updates in one vectorized pass without sleeping.
+
+        Returns a ``(steps, len(tickers))`` array of prices, columns in
+        ``tickers`` order. Internal prices end at the last row; the price
+        cache is not touched, so backtests and tests can run offline.
+        """
+        factors = self._growth_factors(steps)
+        start = np.array([self._prices[t] for t in self._tickers])
+        # Prepend the start row so cumprod multiplies in the same order as _step
+        path = np.cumprod(np.vstack((start, factors)), axis=0)[1:]
+        if (path < 0.01).any():
+            # Floor at 1 cent is path-dependent; redo sequentially
+            s = start
+            for k in range(steps):
+                s = np.maximum(s * factors[k], 0.01)
+                path[k] = s
+        if steps:
+            self._prices = dict(zip(self._tickers, path[-1].tolist()))
+        return path
+
+    def _step(self) -> None:
+        """Advance all prices by one GBM step with correlation."""
+        start = time.perf_counter()
+        s = np.array([self._prices[t] for t in self._tickers])
+        new = np.maximum(s * self._growth_factors(1)[0], 0.01)  # floor at 1 cent
+        self._prices = dict(zip(self._tickers, new.tolist()))
+        price_cache.update_many(self._prices)
+        SIMULATOR_STEP_SECONDS.observe(time.perf_counter() - start)
@@ -1,27 +1,180 @@
-"""SSE streaming endpoint for live price updates."""
+"""Live price streaming: SSE (JSON per ticker, plus fired alerts) and WebSocket (binary frames)."""
 
 import asyncio
 import json
+import threading
+import time
+from datetime import datetime
 
-from fastapi import APIRouter
+import numpy as np
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from sse_starlette.sse import EventSourceResponse
 
+from app.alerts import alert_engine
 from app.market.cache import price_cache
+from app.market.models import PriceUpdate
+from app.metrics import SSE_CLIENTS, SSE_EVENTS, SSE_PASS_SECONDS, WS_CLIENTS, WS_QUEUE_DEPTH
 
 router = APIRouter()
 
+# One packed record per price update in a WebSocket binary frame:
+# uint16 symbol id, float64 price, float64 epoch-seconds timestamp (18 bytes)
+FRAME_DTYPE = np.dtype([("sym", "<u2"), ("price", "<f8"), ("ts", "<f8")])
+
+
+def _price_events(prices: tuple[PriceUpdate, ...]) -> list[dict]:
+    """Serialize one tick of prices into SSE events."""
+    return [{"event": "price", "data": p.model_dump_json()} for p in prices]
+
 
 async def _price_event_generator():
-    """Yield SSE events with all ticker prices at ~500ms cadence."""
-    while True:
-        prices = price_cache.get_all()
-        if prices:
-            for p in prices:
-                yield {"event": "price", "data": p.model_dump_json()}
-        await asyncio.sleep(0.5)
+    """Yield SSE events with all ticker prices at ~500ms cadence.
+
+    Alerts fired since the previous pass follow as ``alert`` events.
+    """
+    SSE_CLIENTS.inc()
+    alert_cursor = alert_engine.cursor
+    try:
+        while True:
+            prices = price_cache.get_all()
+            if prices:
+                # Each yield resumes once the previous event was sent, so a
+                # slow client stretches the pass
+                start = time.perf_counter()
+                for event in _price_events(prices):
+                    yield event
+                SSE_PASS_SECONDS.observe(time.perf_counter() - start)
+                SSE_EVENTS.inc(len(prices))
+            alerts, alert_cursor = alert_engine.fired_since(alert_cursor)
+            for alert in alerts:
+                yield {"event": "alert", "data": json.dumps(alert)}
+            await asyncio.sleep(0.5)
+    finally:
+        SSE_CLIENTS.dec()
 
 
 @router.get("/api/stream/prices")
 async def stream_prices():
     """SSE endpoint for live price updates."""
     return EventSourceResponse(_price_event_generator())
+
+
+def encode_frame(records: list[tuple[int, float, float]]) -> bytes:
+    """Pack (symbol id, price, timestamp) records into one binary frame."""
+    return np.array(records, dtype=FRAME_DTYPE).tobytes()
+
+
+def _epoch(update: PriceUpdate) -> float:
+    return datetime.fromisoformat(update.timestamp).timestamp()
+
+
+class _Subscription:
+    """Per-connection ticker subscriptions and updates waiting to be sent."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self._next_id = 0
+        self.pending: dict[int, tuple[float, float]] = {}
+        self.wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+
+    def subscribe(self, tickers: list[str]) -> list[str]:
+        """Assign ids to new tickers and queue their current price."""
+        added = []
+        for ticker in tickers:
+            if ticker in self.ids:
+                continue
+            self.ids[ticker] = self._next_id
+            self._next_id += 1
+            added.append(ticker)
+        for ticker, update in price_cache.get_many(added).items():
+            self.pending[self.ids[ticker]] = (update.price, _epoch(update))
+        return added
+
+    def unsubscribe(self, tickers: list[str]) -> None:
+        for ticker in tickers:
+            sym = self.ids.pop(ticker, None)
+            if sym is not None:
+                self.pending.pop(sym, None)
+
+    def on_prices(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Price cache listener: keep the latest price of each subscribed ticker."""
+        ids = self.ids
+        queued = False
+        for u in updates:
+            sym = ids.get(u.ticker)
+            if sym is not None:
+                self.pending[sym] = (u.price, ts)
+                queued = True
+        if queued:
+            if threading.get_ident() == self._loop_thread:
+                self.wake.set()
+            else:
+                self._loop.call_soon_threadsafe(self.wake.set)
+
+    def take(self) -> list[tuple[int, float, float]]:
+        pending, self.pending = self.pending, {}
+        return [(sym, price, ts) for sym, (price, ts) in pending.items()]
+
+
+async def _receive_commands(websocket: WebSocket, sub: _Subscription) -> None:
+    """Handle subscribe/unsubscribe messages until the client disconnects."""
+    while True:
+        try:
+            msg = json.loads(await websocket.receive_text())
+            action = msg["action"]
+            tickers = [str(t).upper().strip() for t in msg.get("tickers", [])]
+        except (ValueError, KeyError, TypeError):
+            await websocket.send_json({"type": "error", "detail": "Invalid message"})
+            continue
+
+        if action == "subscribe":
+            sub.subscribe(tickers)
+            await websocket.send_json({"type": "symbols", "symbols": sub.ids})
+            if sub.pending:
+                sub.wake.set()
+        elif action == "unsubscribe":
+            sub.unsubscribe(tickers)
+            await websocket.send_json({"type": "symbols", "symbols": sub.ids})
+        else:
+            await websocket.send_json({"type": "error", "detail": f"Unknown action: {action}"})
+
+
+async def _send_frames(websocket: WebSocket, sub: _Subscription) -> None:
+    """Send one binary frame per wake-up with every pending update."""
+    while True:
+        await sub.wake.wait()
+        sub.wake.clear()
+        records = sub.take()
+        if records:
+            WS_QUEUE_DEPTH.observe(len(records))
+            await websocket.send_bytes(encode_frame(records))
+
+
+@router.websocket("/api/ws/prices")
+async def ws_prices(websocket: WebSocket):
+    """WebSocket price stream with per-ticker subscriptions.
+
+    Clients send ``{"action": "subscribe"|"unsubscribe", "tickers": [...]}``
+    as text. The server answers with ``{"type": "symbols", "symbols":
+    {ticker: id}}`` and then pushes binary frames of ``FRAME_DTYPE``
+    records, only for subscribed tickers and only when they change.
+    """
+    await websocket.accept()
+    WS_CLIENTS.inc()
+    sub = _Subscription()
+    price_cache.add_listener(sub.on_prices)
+    receiver = asyncio.create_task(_receive_commands(websocket, sub))
+    sender = asyncio.create_task(_send_frames(websocket, sub))
+    try:
+        done, _ = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc and not isinstance(exc, WebSocketDisconnect):
+                raise exc
+    finally:
+        WS_CLIENTS.dec()
+        price_cache.remove_listener(sub.on_prices)
+        receiver.cancel()
+        sender.cancel()
@@ -0,0 +1,298 @@
+"""Persisted tick store: append-only per-day column files read through np.memmap.
+
+Layout under the store root (``db/ticks`` by default)::
+
+    symbols.txt            one ticker per line; the line number is its symbol id
+    2026-01-02/ts.f8       float64 epoch seconds
+    2026-01-02/sym.u2      uint16 symbol ids
+    2026-01-02/px.f8       float64 prices
+
+Each day's columns are only ever appended to, so a reader can map whatever
+is on disk and trust every complete row. Rows within a day are in
+timestamp order, which lets range queries binary-search the mapped
+timestamp column and return views instead of copies.
+"""
+
+import asyncio
+import logging
+import os
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from app.market.models import PriceUpdate
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {"ts": np.float64, "sym": np.uint16, "px": np.float64}
+COLUMN_FILES = {"ts": "ts.f8", "sym": "sym.u2", "px": "px.f8"}
+SYMBOLS_FILE = "symbols.txt"
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_FLUSH_SIZE = 4096  # buffered ticks before an early flush
+
+
+def default_store_dir() -> Path:
+    """``ticks/`` next to the SQLite file."""
+    from app.database import DB_PATH
+
+    configured = os.environ.get("TICK_STORE_DIR")
+    if configured:
+        return Path(configured)
+    return Path(os.path.dirname(DB_PATH) or ".") / "ticks"
+
+
+def _day_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+
+
+def _load_symbols(root: Path) -> list[str]:
+    path = root / SYMBOLS_FILE
+    if not path.exists():
+        return []
+    return path.read_text().split()
+
+
+def _truncate(path: Path, size: int) -> None:
+    if path.exists() and path.stat().st_size > size:
+        os.truncate(path, size)
+
+
+def _append_rows(day_dir: Path, columns: dict[str, array]) -> None:
+    """Append one batch to every column file, keeping the columns aligned.
+
+    A torn tail left by a crash is cut off first. If any append fails, every
+    column is cut back to where it was, so retrying the batch cannot
+    duplicate rows in the columns that were already written.
+    """
+    paths = {name: day_dir / COLUMN_FILES[name] for name in COLUMNS}
+    rows = min(
+        path.stat().st_size // np.dtype(COLUMNS[name]).itemsize if path.exists() else 0
+        for name, path in paths.items()
+    )
+    sizes = {name: rows * np.dtype(dtype).itemsize for name, dtype in COLUMNS.items()}
+    for name, path in paths.items():
+        _truncate(path, sizes[name])
+    try:
+        for name, path in paths.items():
+            with open(path, "ab") as f:
+                columns[name].tofile(f)
+    except OSError:
+        for name, path in paths.items():
+            try:
+                _truncate(path, sizes[name])
+            except OSError:
+                pass  # the next append cuts the torn tail
+        raise
+
+
+class TickRecorder:
+    """Price cache listener that appends every tick to the day's column files.
+
+    Ticks are buffered in memory and written by a background task every
+    ``flush_interval`` seconds, or earlier once ``flush_size`` ticks pile up.
+    The file I/O runs in a worker thread; batches that fail to write stay
+    queued and are retried on the next flush.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+    ):
+        self._root = Path(root)
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._symbols = _load_symbols(self._root)
+        self._symbol_ids = {s: i for i, s in enumerate(self._symbols)}
+        self._written_symbols = len(self._symbols)
+        self._day: str | None = None
+        self._ts = array("d")
+        self._sym = array("H")
+        self._px = array("d")
+        self._pending: list[tuple[str, array, array, array]] = []
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def record(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Price cache listener: buffer one row per update."""
+        day = _day_of(ts)
+        if day != self._day:
+            self._seal()
+            self._day = day
+        ids = self._symbol_ids
+        for u in updates:
+            sym = ids.get(u.ticker)
+            if sym is None:
+                sym = ids[u.ticker] = len(self._symbols)
+                self._symbols.append(u.ticker)
+            self._ts.append(ts)
+            self._sym.append(sym)
+            self._px.append(u.price)
+        if len(self._ts) >= self._flush_size:
+            self._wake.set()
+
+    def _seal(self) -> None:
+        """Queue the buffered rows as one batch for their day."""
+        if self._ts:
+            self._pending.append((self._day, self._ts, self._sym, self._px))
+            self._ts = array("d")
+            self._sym = array("H")
+            self._px = array("d")
+
+    def _write_pending(self) -> None:
+        # Batches queued so far; their symbols are all in the list by now
+        batches = len(self._pending)
+        if not batches:
+            return
+        self._root.mkdir(parents=True, exist_ok=True)
+        # Symbols first, so a reader never sees an id it cannot resolve
+        symbols = self._symbols[self._written_symbols :]
+        if symbols:
+            path = self._root / SYMBOLS_FILE
+            size = path.stat().st_size if path.exists() else 0
+            try:
+                with open(path, "a") as f:
+                    f.write("".join(s + "\n" for s in symbols))
+            except OSError:
+                _truncate(path, size)
+                raise
+            self._written_symbols += len(symbols)
+
+        for _ in range(batches):
+            day, ts, sym, px = self._pending[0]
+            day_dir = self._root / day
+            day_dir.mkdir(exist_ok=True)
+            _append_rows(day_dir, {"ts": ts, "sym": sym, "px": px})
+            self._pending.pop(0)
+
+    def flush(self) -> None:
+        """Append buffered rows to disk, blocking the caller."""
+        self._seal()
+        self._write_pending()
+
+    async def _flush_async(self) -> None:
+        """Append buffered rows to disk from a worker thread."""
+        self._seal()
+        await asyncio.to_thread(self._write_pending)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self._flush_async()
+            except OSError:
+                logger.exception("Tick store flush failed")
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task after one last flush."""
+        if self._task:
+            # Not cancelled: a write already running in its thread would race a new one
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        else:
+            await self._flush_async()
+
+
+class TickStoreReader:
+    """Range queries over recorded ticks via np.memmap."""
+
+    def __init__(self, root: Path | str):
+        self._root = Path(root)
+
+    @property
+    def symbols(self) -> list[str]:
+        return _load_symbols(self._root)
+
+    def days(self) -> list[str]:
+        if not self._root.is_dir():
+            return []
+        return sorted(p.name for p in self._root.iterdir() if p.is_dir())
+
+    def map_day(self, day: str) -> dict[str, np.ndarray] | None:
+        """Map one day's columns, or None if it has no complete rows."""
+        day_dir = self._root / day
+        sizes = {}
+        for name, dtype in COLUMNS.items():
+            path = day_dir / COLUMN_FILES[name]
+            if not path.exists():
+                return None
+            sizes[name] = path.stat().st_size // np.dtype(dtype).itemsize
+        # A flush interrupted mid-way can leave columns of unequal length
+        rows = min(sizes.values())
+        if rows == 0:
+            return None
+        return {
+            name: np.memmap(day_dir / COLUMN_FILES[name], dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+
+    def query(
+        self, start: float, end: float, ticker: str | None = None
+    ) -> dict[str, np.ndarray]:
+        """Return ``ts``/``sym``/``px`` columns for ``start <= ts < end``.
+
+        A range inside a single day with no ticker filter is returned as
+        views onto the mapped files; anything else is assembled into new
+        arrays.
+        """
+        sym_id = None
+        if ticker is not None:
+            symbols = self.symbols
+            if ticker not in symbols:
+                return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+            sym_id = symbols.index(ticker)
+
+        first = datetime.fromtimestamp(start, timezone.utc).date()
+        last = datetime.fromtimestamp(max(start, end), timezone.utc).date()
+        wanted = {(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)}
+
+        parts = []
+        for day in self.days():
+            if day not in wanted:
+                continue
+            cols = self.map_day(day)
+            if cols is None:
+                continue
+            lo = int(np.searchsorted(cols["ts"], start, side="left"))
+            hi = int(np.searchsorted(cols["ts"], end, side="left"))
+            part = {name: col[lo:hi] for name, col in cols.items()}
+            if sym_id is not None:
+                mask = part["sym"] == sym_id
+                part = {name: col[mask] for name, col in part.items()}
+            parts.append(part)
+
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+    def series(self, ticker: str, start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, prices) for one ticker."""
+        cols = self.query(start, end, ticker)
+        return cols["ts"], cols["px"]
+
+
+def tick_store_enabled() -> bool:
+    return os.environ.get("TICK_STORE", "").lower() == "true"
+
+
+def day_bounds(day: date) -> tuple[float, float]:
+    """Epoch-second [start, end) range of a UTC day."""
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+    return start, start + 86400.0
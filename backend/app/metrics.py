@@ -0,0 +1,257 @@
+"""In-process metrics exposed in Prometheus text format at GET /metrics.
+
+Counters, gauges and histograms are plain Python objects updated inline on
+hot paths, so recording a sample costs a dict lookup and an add. Labelled
+series are created on first use. Values a component already tracks can be
+exported with ``set_function`` and cost nothing until scraped.
+"""
+
+import os
+import resource
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from contextvars import ContextVar
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+# Latency buckets in seconds, 100us .. 30s
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_registry: list["_Metric"] = []
+
+# ASGI scope of the HTTP request being served, for per-route labels
+current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+
+def current_route() -> str:
+    """Route template of the current request, or "background" outside one."""
+    scope = current_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        _registry.append(self)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the (unlabelled) value from ``fn`` at scrape time."""
+        self._function = fn
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        if self._function is not None:
+            lines.append(f"{self.name} {self.value()}")
+            return lines
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, n: int):
+        self.counts = [0] * n
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed upper-bound buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series.counts) if series else 0
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, n in zip(bounds, series.counts):
+                cumulative += n
+                le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{suffix} {series.sum}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency to first response byte", ("method", "route")
+)
+SIMULATOR_STEP_SECONDS = Histogram("simulator_step_seconds", "Simulator._step duration")
+MASSIVE_POLL_SECONDS = Histogram("massive_poll_seconds", "Massive API poll duration")
+MASSIVE_POLL_ERRORS = Counter("massive_poll_errors_total", "Failed Massive API polls")
+PRICE_UPDATES = Counter("price_cache_updates_total", "Ticker prices written to the price cache")
+SSE_CLIENTS = Gauge("sse_clients", "Connected SSE price stream clients")
+SSE_EVENTS = Counter("sse_events_total", "SSE price events sent")
+SSE_PASS_SECONDS = Histogram(
+    "sse_pass_seconds", "Time for an SSE client to take one pass of price events (grows when it lags)"
+)
+WS_CLIENTS = Gauge("ws_clients", "Connected WebSocket price stream clients")
+WS_QUEUE_DEPTH = Histogram(
+    "ws_queue_depth", "Pending updates flushed per WebSocket frame",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+)
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "SQLite execute/commit latency", ("route",))
+LLM_REQUEST_SECONDS = Histogram("llm_request_seconds", "LLM completion latency")
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ("type",))
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total", "Cached read endpoint lookups", ("cache", "result")
+)
+PROCESS_RSS = Gauge("process_resident_memory_bytes", "Resident memory size in bytes")
+
+
+def _resident_memory() -> float:
+    """Current RSS from /proc, or peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+PROCESS_RSS.set_function(_resident_memory)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing HTTP requests per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_scope.set(scope)
+        start = time.perf_counter()
+        observed = False
+
+        async def send_wrapper(message):
+            nonlocal observed
+            if not observed and message["type"] == "http.response.start":
+                observed = True
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start, scope["method"], current_route()
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_scope.reset(token)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,354 @@
+"""Resting limit and stop orders, triggered from the price cache.
+
+Open orders live in the ``orders`` table and, while the app runs, in an
+in-memory ``OrderEngine``. Each ticker has two books sorted by trigger
+price: one for orders that fire when the price falls to the trigger
+(buy limit, sell stop) and one for orders that fire when it rises to it
+(sell limit, buy stop, stored under the negated trigger). In both books
+the crossed orders are a contiguous tail, so a tick finds them with one
+bisect and removes them with one slice delete: O(log n + k) for k fills,
+however many orders are resting. Only tickers in the update batch are
+looked at.
+
+Fills happen off the tick path: the cache listener queues crossed orders
+and a background task applies each one in its own transaction through
+``portfolio.apply_trade``, at the price of the tick that crossed it.
+Orders that can no longer be filled (not enough cash or shares) are
+marked rejected. Any other failure (e.g. a locked database) rolls the
+fill back and puts the order back on the book.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.market.models import PriceUpdate
+from app.portfolio import apply_trade, portfolio_changed
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/orders", tags=["orders"])
+
+ORDER_TYPES = ("limit", "stop")
+
+
+class OrderRequest(BaseModel):
+    ticker: str
+    side: str  # "buy" or "sell"
+    order_type: str  # "limit" or "stop"
+    quantity: float
+    trigger_price: float
+
+
+class OrderResponse(BaseModel):
+    id: str
+    ticker: str
+    side: str
+    order_type: str
+    quantity: float
+    trigger_price: float
+    status: str  # "open", "filled", "cancelled" or "rejected"
+    created_at: str
+    filled_at: str | None = None
+    fill_price: float | None = None
+    detail: str | None = None
+
+
+@dataclass(slots=True)
+class RestingOrder:
+    id: str
+    ticker: str
+    side: str
+    order_type: str
+    quantity: float
+    trigger_price: float
+
+    @property
+    def fires_on_rise(self) -> bool:
+        """Sell limits and buy stops fire when the price reaches the trigger from below."""
+        return (self.side == "sell") == (self.order_type == "limit")
+
+
+class _Book:
+    """Order ids sorted by key; orders with key >= threshold are crossed."""
+
+    __slots__ = ("keys", "ids")
+
+    def __init__(self):
+        self.keys: list[float] = []
+        self.ids: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: float, order_id: str) -> None:
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.ids.insert(i, order_id)
+
+    def remove(self, key: float, order_id: str) -> bool:
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.ids[i] == order_id:
+                del self.keys[i], self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def pop_crossed(self, threshold: float) -> list[str]:
+        i = bisect_left(self.keys, threshold)
+        if i == len(self.keys):
+            return []
+        crossed = self.ids[i:]
+        del self.keys[i:], self.ids[i:]
+        return crossed
+
+
+class OrderEngine:
+    """In-memory trigger index over open orders, fed by price cache updates."""
+
+    def __init__(self):
+        # ticker -> (fires on fall, fires on rise)
+        self._books: dict[str, tuple[_Book, _Book]] = {}
+        self._orders: dict[str, RestingOrder] = {}
+        self._pending: list[tuple[RestingOrder, float]] = []
+        self._lock = threading.Lock()
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def add(self, order: RestingOrder) -> None:
+        with self._lock:
+            books = self._books.get(order.ticker)
+            if books is None:
+                books = self._books[order.ticker] = (_Book(), _Book())
+            if order.fires_on_rise:
+                books[1].add(-order.trigger_price, order.id)
+            else:
+                books[0].add(order.trigger_price, order.id)
+            self._orders[order.id] = order
+
+    def cancel(self, order_id: str) -> bool:
+        """Drop an order from the index; False if it is not resting."""
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                return False
+            books = self._books[order.ticker]
+            if order.fires_on_rise:
+                books[1].remove(-order.trigger_price, order_id)
+            else:
+                books[0].remove(order.trigger_price, order_id)
+            if not books[0] and not books[1]:
+                del self._books[order.ticker]
+            return True
+
+    def on_prices(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Price cache listener: pull crossed orders out and queue them for filling."""
+        if not self._books:
+            return
+        crossed = []
+        with self._lock:
+            for u in updates:
+                books = self._books.get(u.ticker)
+                if books is None:
+                    continue
+                ids = books[0].pop_crossed(u.price) + books[1].pop_crossed(-u.price)
+                if not ids:
+                    continue
+                orders = self._orders
+                crossed.extend((orders.pop(order_id), u.price) for order_id in ids)
+                if not books[0] and not books[1]:
+                    del self._books[u.ticker]
+            if not crossed:
+                return
+            self._pending.extend(crossed)
+        if self._wake is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def take_pending(self) -> list[tuple[RestingOrder, float]]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    async def start(self) -> None:
+        """Load open orders, subscribe to prices and start the fill task."""
+        db = await get_db()
+        try:
+            cursor = await db.execute(
+                "SELECT id, ticker, side, order_type, quantity, trigger_price FROM orders "
+                "WHERE user_id = 'default' AND status = 'open'"
+            )
+            for row in await cursor.fetchall():
+                self.add(RestingOrder(*row))
+        finally:
+            await db.close()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._wake = asyncio.Event()
+        price_cache.add_listener(self.on_prices)
+        self._task = asyncio.create_task(self._fill_loop())
+        log.info("Order engine started with %d open orders", len(self))
+
+    async def stop(self) -> None:
+        price_cache.remove_listener(self.on_prices)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        with self._lock:
+            self._books.clear()
+            self._orders.clear()
+            self._pending.clear()
+
+    async def _fill_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            for order, price in self.take_pending():
+                try:
+                    await fill_order(order, price)
+                except Exception:
+                    # Rolled back, so still open in the table: rest it again and
+                    # retry on the next crossing tick (the fill is idempotent).
+                    log.exception("Filling order %s failed; back on the book", order.id)
+                    self.add(order)
+
+
+async def fill_order(order: RestingOrder, price: float) -> None:
+    """Execute a triggered order, or mark it rejected if it cannot be filled."""
+    now = datetime.now(timezone.utc).isoformat()
+    db = await get_db()
+    try:
+        cursor = await db.execute(
+            "UPDATE orders SET status = 'filled', filled_at = ?, fill_price = ? "
+            "WHERE id = ? AND status = 'open'",
+            (now, price, order.id),
+        )
+        if cursor.rowcount == 0:  # cancelled in the meantime
+            await db.rollback()
+            return
+        try:
+            await apply_trade(db, order.ticker, order.side, order.quantity, price)
+        except HTTPException as e:
+            await db.rollback()
+            await db.execute(
+                "UPDATE orders SET status = 'rejected', detail = ? WHERE id = ? AND status = 'open'",
+                (e.detail, order.id),
+            )
+            await db.commit()
+            log.info("Order %s rejected: %s", order.id, e.detail)
+            return
+        await db.commit()
+        portfolio_changed()
+    finally:
+        await db.close()
+
+
+order_engine = OrderEngine()
+
+
+def _order_response(row) -> OrderResponse:
+    return OrderResponse(**dict(row))
+
+
+@router.post("", response_model=OrderResponse)
+async def place_order(body: OrderRequest):
+    """Place a resting limit or stop order."""
+    ticker = body.ticker.upper().strip()
+    side = body.side.lower()
+    order_type = body.order_type.lower()
+
+    if side not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="side must be 'buy' or 'sell'")
+    if order_type not in ORDER_TYPES:
+        raise HTTPException(status_code=400, detail="order_type must be 'limit' or 'stop'")
+    if body.quantity <= 0:
+        raise HTTPException(status_code=400, detail="quantity must be positive")
+    if body.trigger_price <= 0:
+        raise HTTPException(status_code=400, detail="trigger_price must be positive")
+    if price_cache.get(ticker) is None:
+        raise HTTPException(status_code=400, detail=f"No price available for {ticker}")
+
+    order = RestingOrder(
+        str(uuid.uuid4()), ticker, side, order_type, body.quantity, body.trigger_price
+    )
+    now = datetime.now(timezone.utc).isoformat()
+    db = await get_db()
+    try:
+        await db.execute(
+            "INSERT INTO orders (id, user_id, ticker, side, order_type, quantity, trigger_price, status, created_at) "
+            "VALUES (?, 'default', ?, ?, ?, ?, ?, 'open', ?)",
+            (order.id, ticker, side, order_type, order.quantity, order.trigger_price, now),
+        )
+        await db.commit()
+    finally:
+        await db.close()
+
+    order_engine.add(order)
+    return OrderResponse(
+        id=order.id,
+        ticker=ticker,
+        side=side,
+        order_type=order_type,
+        quantity=order.quantity,
+        trigger_price=order.trigger_price,
+        status="open",
+        created_at=now,
+    )
+
+
+@router.get("", response_model=list[OrderResponse])
+async def list_orders(status: str | None = None):
+    """Return orders, newest first, optionally filtered by status."""
+    query = "SELECT * FROM orders WHERE user_id = 'default'"
+    params: tuple = ()
+    if status:
+        query += " AND status = ?"
+        params = (status,)
+    db = await get_db()
+    try:
+        cursor = await db.execute(query + " ORDER BY created_at DESC", params)
+        return [_order_response(row) for row in await cursor.fetchall()]
+    finally:
+        await db.close()
+
+
+@router.delete("/{order_id}", response_model=OrderResponse)
+async def cancel_order(order_id: str):
+    """Cancel an open order."""
+    db = await get_db()
+    try:
+        cursor = await db.execute(
+            "UPDATE orders SET status = 'cancelled' WHERE id = ? AND user_id = 'default' AND status = 'open'",
+            (order_id,),
+        )
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail=f"No open order {order_id}")
+        await db.commit()
+        order_engine.cancel(order_id)
+        cursor = await db.execute("SELECT * FROM orders WHERE id = ?", (order_id,))
+        return _order_response(await cursor.fetchone())
+    finally:
+        await db.close()
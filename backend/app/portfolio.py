@@ -1,12 +1,22 @@
-"""Portfolio API routes: positions, trading, snapshots."""
+"""Portfolio API routes: positions, trading, trade blotter, snapshots."""
 
+import base64
+import binascii
+import csv
+import io
+import json
 import uuid
+from collections.abc import Callable
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, iso_sql, iso_to_ms, ms_to_iso, now_ms
+from app.httpcache import ResponseCache
+from app.ledger import close_lots, cost_basis_method, open_lot
 from app.market.cache import price_cache
 
 router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
@@ -40,6 +50,26 @@ class TradeResponse(BaseModel):
     quantity: float
     price: float
     executed_at: str
+    realized_pnl: float | None = None  # sells only
+
+
+class TickerPnl(BaseModel):
+    ticker: str
+    quantity: float
+    realized_pnl: float
+    unrealized_pnl: float
+
+
+class PnlResponse(BaseModel):
+    method: str
+    realized_pnl: float
+    unrealized_pnl: float
+    tickers: list[TickerPnl]
+
+
+class TradePage(BaseModel):
+    trades: list[TradeResponse]
+    next_cursor: str | None = None
 
 
 class SnapshotResponse(BaseModel):
@@ -47,35 +77,119 @@ class SnapshotResponse(BaseModel):
     recorded_at: str
 
 
-async def take_snapshot(db):
-    """Calculate portfolio value and insert a snapshot row."""
+# Called after every committed change to cash or positions
+_change_listeners: list[Callable[[], None]] = []
+_version = 0
+
+
+def add_change_listener(listener: Callable[[], None]) -> None:
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
+
+def remove_change_listener(listener: Callable[[], None]) -> None:
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+
+def portfolio_version() -> int:
+    """Counter bumped by every ``portfolio_changed()``, for cache keys."""
+    return _version
+
+
+def portfolio_changed() -> None:
+    """Tell listeners (snapshot recorder, caches) that holdings changed."""
+    global _version
+    _version += 1
+    for listener in _change_listeners:
+        listener()
+
+
+_snapshot_version = 0
+
+
+def snapshot_version() -> int:
+    """Counter bumped by every ``snapshot_recorded()``, for cache keys."""
+    return _snapshot_version
+
+
+def snapshot_recorded() -> None:
+    """Call after committing a ``take_snapshot`` write."""
+    global _snapshot_version
+    _snapshot_version += 1
+
+
+def apply_fills(quantity, avg_cost, fills, price):
+    """Average-cost position math for signed fills (buys > 0, sells < 0).
+
+    Works elementwise on scalars or aligned arrays, so trades and the
+    backtester share it. Returns (quantity, average cost, realized P&L,
+    cash change). Buys blend into the average cost; sells realize against
+    it and leave it unchanged.
+    """
+    quantity, avg_cost, fills, price = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (quantity, avg_cost, fills, price))
+    )
+    bought = np.maximum(fills, 0.0)
+    sold = np.maximum(-fills, 0.0)
+    new_qty = quantity + fills
+    held_after_buy = quantity + bought
+    blended = np.divide(
+        quantity * avg_cost + bought * price, held_after_buy,
+        out=np.zeros_like(held_after_buy), where=held_after_buy > 0,
+    )
+    new_avg = np.where(bought > 0, blended, np.where(new_qty > 0, avg_cost, 0.0))
+    realized = sold * (price - avg_cost)
+    return new_qty, new_avg, realized, -fills * price
+
+
+async def load_holdings(db) -> tuple[float, list]:
+    """Cash balance and (ticker, quantity, avg_cost) rows."""
     cursor = await db.execute(
         "SELECT cash_balance FROM users_profile WHERE id = 'default'"
     )
     user = await cursor.fetchone()
-    cash = user["cash_balance"]
-
     cursor = await db.execute(
         "SELECT ticker, quantity, avg_cost FROM positions WHERE user_id = 'default'"
     )
-    positions = await cursor.fetchall()
+    return user["cash_balance"], await cursor.fetchall()
 
+
+def portfolio_value(cash: float, positions) -> float:
+    """Cash plus positions marked at cached prices (avg cost if unpriced)."""
+    quotes = price_cache.get_many(pos["ticker"] for pos in positions)
     total = cash
     for pos in positions:
-        update = price_cache.get(pos["ticker"])
+        update = quotes.get(pos["ticker"])
         price = update.price if update else pos["avg_cost"]
         total += pos["quantity"] * price
+    return total
+
+
+async def take_snapshot(db, total: float | None = None):
+    """Insert a snapshot row, valuing the portfolio unless ``total`` is given."""
+    if total is None:
+        total = portfolio_value(*await load_holdings(db))
 
-    now = datetime.now(timezone.utc).isoformat()
     await db.execute(
-        "INSERT INTO portfolio_snapshots (id, user_id, total_value, recorded_at) VALUES (?, 'default', ?, ?)",
-        (str(uuid.uuid4()), round(total, 2), now),
+        "INSERT INTO portfolio_snapshots (user_id, total_value, recorded_at) VALUES ('default', ?, ?)",
+        (round(total, 2), now_ms()),
     )
 
 
+_portfolio_cache = ResponseCache(
+    "portfolio", PortfolioResponse, strict=portfolio_version, loose=lambda: price_cache.generation
+)
+_history_cache = ResponseCache("portfolio_history", list[SnapshotResponse], strict=snapshot_version)
+
+
 @router.get("", response_model=PortfolioResponse)
-async def get_portfolio():
+async def get_portfolio(request: Request):
     """Return current positions, cash, total value, unrealized P&L."""
+    return await _portfolio_cache.respond(request, _load_portfolio)
+
+
+async def _load_portfolio() -> PortfolioResponse:
     db = await get_db()
     try:
         cursor = await db.execute(
@@ -89,13 +203,14 @@ async def get_portfolio():
         )
         rows = await cursor.fetchall()
 
+        quotes = price_cache.get_many(row["ticker"] for row in rows)
         positions = []
         total_value = cash
         for row in rows:
             ticker = row["ticker"]
             qty = row["quantity"]
             avg_cost = row["avg_cost"]
-            update = price_cache.get(ticker)
+            update = quotes.get(ticker)
             current_price = update.price if update else avg_cost
             unrealized_pnl = (current_price - avg_cost) * qty
             pnl_percent = ((current_price - avg_cost) / avg_cost * 100) if avg_cost else 0
@@ -118,6 +233,109 @@ async def get_portfolio():
         await db.close()
 
 
+async def apply_trade(db, ticker: str, side: str, quantity: float, price: float) -> TradeResponse:
+    """Apply a fill to cash, positions and the trade log without committing.
+
+    Raises HTTPException(400) when cash or shares are insufficient. Shared by
+    market orders and triggered limit/stop orders. Callers should call
+    ``portfolio_changed()`` once the transaction commits.
+    """
+    cursor = await db.execute(
+        "SELECT cash_balance FROM users_profile WHERE id = 'default'"
+    )
+    user = await cursor.fetchone()
+    cash = user["cash_balance"]
+
+    executed_ms = now_ms()
+    now = datetime.fromtimestamp(executed_ms / 1000, timezone.utc).isoformat()
+    realized = None
+
+    if side == "buy":
+        total_cost = quantity * price
+        if cash < total_cost:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient cash: need ${total_cost:.2f}, have ${cash:.2f}",
+            )
+
+        # Update or create position
+        cursor = await db.execute(
+            "SELECT quantity, avg_cost FROM positions WHERE user_id = 'default' AND ticker = ?",
+            (ticker,),
+        )
+        existing = await cursor.fetchone()
+        if existing:
+            new_qty, new_avg, _, _ = apply_fills(existing["quantity"], existing["avg_cost"], quantity, price)
+            new_qty, new_avg = float(new_qty), float(new_avg)
+            await db.execute(
+                "UPDATE positions SET quantity = ?, avg_cost = ?, updated_at = ? WHERE user_id = 'default' AND ticker = ?",
+                (new_qty, new_avg, now, ticker),
+            )
+        else:
+            await db.execute(
+                "INSERT INTO positions (id, user_id, ticker, quantity, avg_cost, updated_at) VALUES (?, 'default', ?, ?, ?, ?)",
+                (str(uuid.uuid4()), ticker, quantity, price, now),
+            )
+        await open_lot(db, ticker, quantity, price, now)
+
+        # Deduct cash
+        await db.execute(
+            "UPDATE users_profile SET cash_balance = cash_balance - ? WHERE id = 'default'",
+            (total_cost,),
+        )
+
+    else:  # sell
+        cursor = await db.execute(
+            "SELECT quantity, avg_cost FROM positions WHERE user_id = 'default' AND ticker = ?",
+            (ticker,),
+        )
+        existing = await cursor.fetchone()
+        if not existing or existing["quantity"] < quantity:
+            held = existing["quantity"] if existing else 0
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient shares: want to sell {quantity}, hold {held}",
+            )
+
+        realized, new_avg = await close_lots(
+            db, ticker, quantity, price, existing["avg_cost"], existing["quantity"], now
+        )
+        new_qty = existing["quantity"] - quantity
+        if new_qty == 0:
+            await db.execute(
+                "DELETE FROM positions WHERE user_id = 'default' AND ticker = ?",
+                (ticker,),
+            )
+        else:
+            await db.execute(
+                "UPDATE positions SET quantity = ?, avg_cost = ?, updated_at = ? WHERE user_id = 'default' AND ticker = ?",
+                (new_qty, new_avg, now, ticker),
+            )
+
+        # Add proceeds to cash
+        proceeds = quantity * price
+        await db.execute(
+            "UPDATE users_profile SET cash_balance = cash_balance + ? WHERE id = 'default'",
+            (proceeds,),
+        )
+
+    # Log the trade
+    cursor = await db.execute(
+        "INSERT INTO trades (user_id, ticker, side, quantity, price, executed_at) VALUES ('default', ?, ?, ?, ?, ?)",
+        (ticker, side, quantity, price, executed_ms),
+    )
+
+    return TradeResponse(
+        id=str(cursor.lastrowid),
+        ticker=ticker,
+        side=side,
+        quantity=quantity,
+        price=price,
+        executed_at=ms_to_iso(executed_ms),
+        realized_pnl=round(realized, 2) if realized is not None else None,
+    )
+
+
 @router.post("/trade", response_model=TradeResponse)
 async def execute_trade(body: TradeRequest):
     """Execute a market order at current cached price."""
@@ -133,120 +351,208 @@ async def execute_trade(body: TradeRequest):
     update = price_cache.get(ticker)
     if update is None:
         raise HTTPException(status_code=400, detail=f"No price available for {ticker}")
-    current_price = update.price
 
+    db = await get_db()
+    try:
+        trade = await apply_trade(db, ticker, side, quantity, update.price)
+        await db.commit()
+        portfolio_changed()
+        return trade
+    finally:
+        await db.close()
+
+
+@router.get("/pnl", response_model=PnlResponse)
+async def get_pnl():
+    """Realized and unrealized P&L per ticker and overall.
+
+    Realized P&L comes from the running totals kept by the lot ledger, so
+    this reads one row per ticker held or ever sold, not the trade history.
+    """
     db = await get_db()
     try:
         cursor = await db.execute(
-            "SELECT cash_balance FROM users_profile WHERE id = 'default'"
+            "SELECT ticker, realized FROM realized_pnl WHERE user_id = 'default'"
         )
-        user = await cursor.fetchone()
-        cash = user["cash_balance"]
+        realized = {row["ticker"]: row["realized"] for row in await cursor.fetchall()}
+        cursor = await db.execute(
+            "SELECT ticker, quantity, avg_cost FROM positions WHERE user_id = 'default'"
+        )
+        positions = {row["ticker"]: row for row in await cursor.fetchall()}
+    finally:
+        await db.close()
 
-        now = datetime.now(timezone.utc).isoformat()
-        trade_id = str(uuid.uuid4())
+    quotes = price_cache.get_many(positions)
+    tickers = []
+    for ticker in sorted(realized.keys() | positions.keys()):
+        pos = positions.get(ticker)
+        unrealized = 0.0
+        if pos:
+            update = quotes.get(ticker)
+            price = update.price if update else pos["avg_cost"]
+            unrealized = (price - pos["avg_cost"]) * pos["quantity"]
+        tickers.append(TickerPnl(
+            ticker=ticker,
+            quantity=pos["quantity"] if pos else 0.0,
+            realized_pnl=round(realized.get(ticker, 0.0), 2),
+            unrealized_pnl=round(unrealized, 2),
+        ))
+    return PnlResponse(
+        method=cost_basis_method(),
+        realized_pnl=round(sum(realized.values()), 2),
+        unrealized_pnl=round(sum(t.unrealized_pnl for t in tickers), 2),
+        tickers=tickers,
+    )
 
-        if side == "buy":
-            total_cost = quantity * current_price
-            if cash < total_cost:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Insufficient cash: need ${total_cost:.2f}, have ${cash:.2f}",
-                )
 
-            # Update or create position
-            cursor = await db.execute(
-                "SELECT quantity, avg_cost FROM positions WHERE user_id = 'default' AND ticker = ?",
-                (ticker,),
-            )
-            existing = await cursor.fetchone()
-            if existing:
-                old_qty = existing["quantity"]
-                old_avg = existing["avg_cost"]
-                new_qty = old_qty + quantity
-                new_avg = ((old_qty * old_avg) + (quantity * current_price)) / new_qty
-                await db.execute(
-                    "UPDATE positions SET quantity = ?, avg_cost = ?, updated_at = ? WHERE user_id = 'default' AND ticker = ?",
-                    (new_qty, new_avg, now, ticker),
-                )
-            else:
-                await db.execute(
-                    "INSERT INTO positions (id, user_id, ticker, quantity, avg_cost, updated_at) VALUES (?, 'default', ?, ?, ?, ?)",
-                    (str(uuid.uuid4()), ticker, quantity, current_price, now),
-                )
+TRADE_COLUMNS = ("id", "ticker", "side", "quantity", "price", "executed_at")
+# API shape of a trade row: text id, ISO-8601 time. ORDER BY and WHERE use
+# trades.-qualified columns so they hit the integer index, not the aliases.
+TRADE_SELECT = (
+    f"CAST(id AS TEXT) AS id, ticker, side, quantity, price, {iso_sql('trades.executed_at')} AS executed_at"
+)
+EXPORT_BATCH = 1000
 
-            # Deduct cash
-            await db.execute(
-                "UPDATE users_profile SET cash_balance = cash_balance - ? WHERE id = 'default'",
-                (total_cost,),
-            )
 
-        else:  # sell
-            cursor = await db.execute(
-                "SELECT quantity FROM positions WHERE user_id = 'default' AND ticker = ?",
-                (ticker,),
-            )
-            existing = await cursor.fetchone()
-            if not existing or existing["quantity"] < quantity:
-                held = existing["quantity"] if existing else 0
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Insufficient shares: want to sell {quantity}, hold {held}",
-                )
-
-            new_qty = existing["quantity"] - quantity
-            if new_qty == 0:
-                await db.execute(
-                    "DELETE FROM positions WHERE user_id = 'default' AND ticker = ?",
-                    (ticker,),
-                )
-            else:
-                await db.execute(
-                    "UPDATE positions SET quantity = ?, updated_at = ? WHERE user_id = 'default' AND ticker = ?",
-                    (new_qty, now, ticker),
-                )
+def _encode_cursor(executed_ms: int, trade_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([executed_ms, trade_id]).encode()).decode()
 
-            # Add proceeds to cash
-            proceeds = quantity * current_price
-            await db.execute(
-                "UPDATE users_profile SET cash_balance = cash_balance + ? WHERE id = 'default'",
-                (proceeds,),
-            )
 
-        # Log the trade
-        await db.execute(
-            "INSERT INTO trades (id, user_id, ticker, side, quantity, price, executed_at) VALUES (?, 'default', ?, ?, ?, ?, ?)",
-            (trade_id, ticker, side, quantity, current_price, now),
-        )
+def _decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        executed_ms, trade_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(executed_ms), int(trade_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        # Take post-trade snapshot
-        await take_snapshot(db)
 
-        await db.commit()
-        return TradeResponse(
-            id=trade_id,
-            ticker=ticker,
-            side=side,
-            quantity=quantity,
-            price=current_price,
-            executed_at=now,
+def _parse_time(name: str, value: str) -> int:
+    try:
+        return iso_to_ms(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+
+
+def _trade_filters(
+    ticker: str | None, side: str | None, since: str | None, until: str | None
+) -> tuple[str, list]:
+    """WHERE clause and parameters for the blotter filters."""
+    where = ["user_id = 'default'"]
+    params: list = []
+    if ticker:
+        where.append("ticker = ?")
+        params.append(ticker.upper().strip())
+    if side:
+        where.append("side = ?")
+        params.append(side.lower())
+    if since:
+        where.append("trades.executed_at >= ?")
+        params.append(_parse_time("since", since))
+    if until:
+        where.append("trades.executed_at < ?")
+        params.append(_parse_time("until", until))
+    return " AND ".join(where), params
+
+
+@router.get("/trades", response_model=TradePage)
+async def get_trades(
+    ticker: str | None = None,
+    side: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Return trades newest first, one page at a time.
+
+    Pages are keyed on (executed_at, id) of the last row rather than an
+    offset, so each page is an index range scan no matter how deep it is.
+    Pass ``next_cursor`` back as ``cursor`` for the following page.
+    """
+    where, params = _trade_filters(ticker, side, since, until)
+    if cursor:
+        where += " AND (trades.executed_at, trades.id) < (?, ?)"
+        params.extend(_decode_cursor(cursor))
+    db = await get_db()
+    try:
+        rows = await (await db.execute(
+            f"SELECT {TRADE_SELECT}, trades.executed_at AS executed_ms FROM trades WHERE {where} "
+            "ORDER BY trades.executed_at DESC, trades.id DESC LIMIT ?",
+            (*params, limit + 1),
+        )).fetchall()
+    finally:
+        await db.close()
+
+    trades = [TradeResponse(**{c: row[c] for c in TRADE_COLUMNS}) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last["executed_ms"], int(last["id"]))
+    return TradePage(trades=trades, next_cursor=next_cursor)
+
+
+async def _export_rows(where: str, params: list, fmt: str):
+    """Yield the filtered trades as CSV or NDJSON, one batch at a time."""
+    db = await get_db()
+    try:
+        cursor = await db.execute(
+            f"SELECT {TRADE_SELECT} FROM trades WHERE {where} ORDER BY trades.executed_at, trades.id",
+            params,
         )
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(TRADE_COLUMNS)
+            yield buf.getvalue()
+        while rows := await cursor.fetchmany(EXPORT_BATCH):
+            if fmt == "csv":
+                buf.seek(0)
+                buf.truncate()
+                writer.writerows(rows)
+                yield buf.getvalue()
+            else:
+                yield "".join(json.dumps(dict(row)) + "\n" for row in rows)
     finally:
         await db.close()
 
 
+@router.get("/trades/export")
+async def export_trades(
+    format: str = "csv",
+    ticker: str | None = None,
+    side: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+):
+    """Stream the full (filtered) trade history, oldest first, as CSV or NDJSON."""
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    where, params = _trade_filters(ticker, side, since, until)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(where, params, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="trades.{format}"'},
+    )
+
+
 @router.get("/history", response_model=list[SnapshotResponse])
-async def get_portfolio_history():
+async def get_portfolio_history(request: Request):
     """Return portfolio snapshots for P&L chart."""
+    return await _history_cache.respond(request, _load_history)
+
+
+async def _load_history() -> bytes:
+    # SQLite renders the JSON (SnapshotResponse fields) itself, so a long
+    # history never turns into per-row Python objects
     db = await get_db()
     try:
         cursor = await db.execute(
-            "SELECT total_value, recorded_at FROM portfolio_snapshots WHERE user_id = 'default' ORDER BY recorded_at"
+            "SELECT json_group_array(json_object("
+            f"'total_value', total_value, 'recorded_at', {iso_sql('recorded_at')})) "
+            "FROM (SELECT total_value, recorded_at FROM portfolio_snapshots "
+            "WHERE user_id = 'default' ORDER BY recorded_at)"
         )
-        rows = await cursor.fetchall()
-        return [
-            SnapshotResponse(total_value=row["total_value"], recorded_at=row["recorded_at"])
-            for row in rows
-        ]
+        return (await cursor.fetchone())[0].encode()
     finally:
         await db.close()
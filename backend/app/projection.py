@@ -0,0 +1,241 @@
+"""POST /api/portfolio/projection — Monte Carlo projection of current holdings.
+
+Held tickers are simulated forward with the simulator's GBM parameters
+(annual drift and volatility per ticker) and its sector correlation
+matrix, through the same Cholesky factor. Paths are drawn in log space
+with exact GBM increments, in batches of as many paths as fit in
+``BATCH_BYTES`` of normals, so a batch's memory doesn't grow with the
+step or ticker count. Only the portfolio value of each path is kept,
+and ``MAX_PATH_STEPS`` caps that value matrix at ``MAX_VALUE_BYTES``.
+
+Small requests run in a worker thread. Requests above ``INLINE_LIMIT``
+path-steps are split into chunks that run in a process pool, so they
+don't contend for the GIL either. Each chunk writes its paths into one
+shared memory matrix, and the per-step percentiles and means are then
+computed in the pool too, one column slice per task. Only the bands come
+back to the event loop. Each chunk gets its own child ``SeedSequence``,
+so a seeded request gives the same bands however the pool is sized.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.market.simulator import TICKER_CONFIG, _build_correlation_matrix
+from app.portfolio import load_holdings
+
+router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
+
+TRADING_DAYS = 252
+DEFAULT_PARAMS = {"drift": 0.08, "vol": 0.30}  # tickers outside the simulator universe
+DEFAULT_PERCENTILES = [5.0, 25.0, 50.0, 75.0, 95.0]
+BATCH_BYTES = 32 * 2**20  # normals per batch, matmul temporary included
+INLINE_LIMIT = 500_000  # path-steps simulated in a thread rather than the pool
+CHUNK_PATHS = 5_000  # paths per process pool task
+MAX_VALUE_BYTES = 160 * 10**6  # the (paths, steps + 1) float64 value matrix
+MAX_PATH_STEPS = MAX_VALUE_BYTES // 8
+
+
+class ProjectionRequest(BaseModel):
+    horizon_days: float = Field(30.0, gt=0, le=3650)
+    steps: int = Field(30, ge=1, le=2520)
+    paths: int = Field(2000, ge=10, le=200_000)
+    percentiles: list[float] = Field(default_factory=lambda: list(DEFAULT_PERCENTILES))
+    seed: int | None = None
+
+
+class ProjectionResponse(BaseModel):
+    start_value: float
+    days: list[float]  # trading days from now, one per step including 0
+    percentiles: dict[str, list[float]]  # percentile -> portfolio value per step
+    mean: list[float]
+    paths: int
+
+
+def gbm_params(tickers: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(drift, vol, Cholesky factor) for ``tickers`` from the simulator config."""
+    params = [TICKER_CONFIG.get(t, DEFAULT_PARAMS) for t in tickers]
+    drift = np.array([p["drift"] for p in params])
+    vol = np.array([p["vol"] for p in params])
+    cholesky = np.linalg.cholesky(_build_correlation_matrix(tickers))
+    return drift, vol, cholesky
+
+
+def batch_paths(steps: int, tickers: int) -> int:
+    """Paths per batch that keep the normals and their correlated copy within ``BATCH_BYTES``."""
+    return max(1, BATCH_BYTES // (2 * steps * tickers * 8))
+
+
+def simulate_values(
+    cash: float,
+    quantities: np.ndarray,
+    prices: np.ndarray,
+    drift: np.ndarray,
+    vol: np.ndarray,
+    cholesky: np.ndarray,
+    dt: float,
+    steps: int,
+    paths: int,
+    seed: np.random.SeedSequence | int | None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Simulate ``paths`` GBM paths; return (paths, steps + 1) portfolio values.
+
+    ``out``, if given, is filled in place and returned.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(prices)
+    mu = (drift - 0.5 * vol**2) * dt
+    sigma = vol * math.sqrt(dt)
+    values = np.empty((paths, steps + 1)) if out is None else out
+    values[:, 0] = cash + quantities @ prices
+    batch = batch_paths(steps, n)
+    for lo in range(0, paths, batch):
+        m = min(batch, paths - lo)
+        # One 2-D matmul is much faster than a batched (m, steps, n) one
+        z = (rng.standard_normal((m * steps, n)) @ cholesky.T).reshape(m, steps, n)
+        z *= sigma
+        z += mu
+        np.cumsum(z, axis=1, out=z)
+        np.exp(z, out=z)
+        # Growth factors weighted by position value, summed over tickers
+        values[lo:lo + m, 1:] = cash + z @ (quantities * prices)
+    return values
+
+
+def summarize(values: np.ndarray, percentiles: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    """Percentile bands and mean per step of a (paths, steps) value matrix."""
+    return np.percentile(values, percentiles, axis=0), values.mean(axis=0)
+
+
+def _project_inline(args: tuple, paths: int, seed: np.random.SeedSequence, percentiles: list[float]):
+    return summarize(simulate_values(*args, paths, seed), percentiles)
+
+
+def _simulate_into(name: str, shape: tuple[int, int], lo: int, args: tuple, count: int, seed) -> None:
+    """Pool task: simulate rows ``lo:lo + count`` of the shared value matrix."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        simulate_values(*args, count, seed, out=values[lo:lo + count])
+        del values
+    finally:
+        shm.close()
+
+
+def _summarize_columns(name: str, shape: tuple[int, int], lo: int, hi: int, percentiles: list[float]):
+    """Pool task: bands and mean for steps ``lo:hi`` of the shared value matrix."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        result = summarize(values[:, lo:hi], percentiles)
+        del values
+        return result
+    finally:
+        shm.close()
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _pool_size() -> int:
+    return int(os.environ.get("PROJECTION_WORKERS", 0)) or min(os.cpu_count() or 1, 8)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process with a running event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(_pool_size(), mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_projection_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def project(
+    cash: float,
+    quantities: np.ndarray,
+    prices: np.ndarray,
+    tickers: list[str],
+    body: ProjectionRequest,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Percentile bands and mean per step, from a worker thread or the process pool."""
+    drift, vol, cholesky = gbm_params(tickers)
+    dt = body.horizon_days / TRADING_DAYS / body.steps
+    args = (cash, quantities, prices, drift, vol, cholesky, dt, body.steps)
+    seq = np.random.SeedSequence(body.seed)
+    if body.paths * body.steps <= INLINE_LIMIT:
+        return await asyncio.to_thread(_project_inline, args, body.paths, seq, body.percentiles)
+
+    shape = (body.paths, body.steps + 1)
+    starts = range(0, body.paths, CHUNK_PATHS)
+    counts = [min(CHUNK_PATHS, body.paths - lo) for lo in starts]
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 8)
+    try:
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _simulate_into, shm.name, shape, lo, args, count, child)
+            for lo, count, child in zip(starts, counts, seq.spawn(len(counts)))
+        ))
+        edges = np.linspace(0, shape[1], min(_pool_size(), shape[1]) + 1).astype(int)
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, _summarize_columns, shm.name, shape, lo, hi, body.percentiles)
+            for lo, hi in zip(edges[:-1], edges[1:])
+        ))
+    finally:
+        shm.close()
+        shm.unlink()
+    bands = np.concatenate([b for b, _ in parts], axis=1)
+    mean = np.concatenate([m for _, m in parts])
+    return bands, mean
+
+
+@router.post("/projection", response_model=ProjectionResponse)
+async def project_portfolio(body: ProjectionRequest):
+    """Percentile bands of projected portfolio value over the horizon."""
+    if body.paths * body.steps > MAX_PATH_STEPS:
+        raise HTTPException(status_code=400, detail=f"paths x steps must be at most {MAX_PATH_STEPS}")
+    if any(not 0 <= p <= 100 for p in body.percentiles):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+
+    db = await get_db()
+    try:
+        cash, positions = await load_holdings(db)
+    finally:
+        await db.close()
+
+    tickers = [pos["ticker"] for pos in positions]
+    quotes = price_cache.get_many(tickers)
+    prices = np.array([
+        quotes[pos["ticker"]].price if pos["ticker"] in quotes else pos["avg_cost"] for pos in positions
+    ])
+    quantities = np.array([pos["quantity"] for pos in positions])
+
+    if tickers:
+        bands, mean = await project(cash, quantities, prices, tickers, body)
+    else:  # all cash: a flat line
+        mean = np.full(body.steps + 1, cash)
+        bands = np.tile(mean, (len(body.percentiles), 1))
+    days = np.linspace(0, body.horizon_days, body.steps + 1)
+    return ProjectionResponse(
+        start_value=round(float(cash + quantities @ prices), 2),
+        days=np.round(days, 4).tolist(),
+        percentiles={f"{p:g}": np.round(band, 2).tolist() for p, band in zip(body.percentiles, bands)},
+        mean=np.round(mean, 2).tolist(),
+        paths=body.paths,
+    )
@@ -0,0 +1,124 @@
+"""POST /api/portfolio/rebalance — trade to target weights in one transaction.
+
+The orders are planned in one vectorized pass over the held and targeted
+tickers. Targets are fractions of total portfolio value (the rest stays
+in cash), and held tickers without a target are sold. Target quantities
+are rounded down to whole shares, or to ``FRACTIONAL_STEP`` when
+fractional shares are allowed, so the buys always fit in the cash left
+after the sells. Sells execute first, then buys, all through
+``portfolio.apply_trade`` in a single transaction. Either every order
+fills or none does.
+"""
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.portfolio import TradeResponse, apply_trade, load_holdings, portfolio_changed
+
+router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
+
+FRACTIONAL_STEP = 1e-4  # smallest fractional share traded
+MIN_ORDER_VALUE = 0.01  # skip dust orders below one cent
+
+
+class RebalanceRequest(BaseModel):
+    weights: dict[str, float]  # ticker -> fraction of total value
+    fractional: bool = True
+
+
+class RebalanceResponse(BaseModel):
+    trades: list[TradeResponse]
+    cash_balance: float
+    total_value: float
+
+
+def plan_rebalance(
+    cash: float,
+    quantities: np.ndarray,
+    prices: np.ndarray,
+    weights: np.ndarray,
+    step: float = FRACTIONAL_STEP,
+) -> np.ndarray:
+    """Signed quantity deltas that move holdings to ``weights`` of total value.
+
+    All arrays are aligned by ticker. Target quantities are floored to
+    ``step`` and buys are trimmed to the cash freed up by sells, filled
+    sells first and then buys in ticker order as the endpoint does.
+    """
+    total = cash + quantities @ prices
+    scale = round(1 / step)  # steps per share
+    target = np.floor(weights * total / prices * scale + 1e-9) / scale
+    target[weights == 0] = 0.0
+    delta = target - quantities
+    delta[np.abs(delta * prices) < MIN_ORDER_VALUE] = 0.0
+    # Float rounding can leave the buys a hair above the cash; only check
+    # the exact fill sequence when the slack is too thin to rule that out
+    if cash - delta @ prices <= 1e-9 * (cash + np.abs(delta) @ prices):
+        _fit_buys_to_cash(cash, delta, prices, scale)
+    return delta
+
+
+def _fit_buys_to_cash(cash: float, delta: np.ndarray, prices: np.ndarray, scale: int) -> None:
+    """Trim buys, in place, until each one passes apply_trade's cash check."""
+    remaining = cash
+    for i in np.flatnonzero(delta < 0).tolist():
+        remaining += float(-delta[i]) * float(prices[i])
+    for i in np.flatnonzero(delta > 0).tolist():
+        price = float(prices[i])
+        units = round(float(delta[i]) * scale)
+        while units > 0 and units / scale * price > remaining:
+            units -= 1
+        quantity = units / scale
+        delta[i] = quantity if quantity * price >= MIN_ORDER_VALUE else 0.0
+        remaining -= float(delta[i]) * price
+
+
+@router.post("/rebalance", response_model=RebalanceResponse)
+async def rebalance(body: RebalanceRequest):
+    """Trade the portfolio to target weights, sells first, in one transaction."""
+    targets = {t.upper().strip(): w for t, w in body.weights.items()}
+    if any(w < 0 for w in targets.values()):
+        raise HTTPException(status_code=400, detail="weights must be non-negative")
+    if sum(targets.values()) > 1 + 1e-9:
+        raise HTTPException(status_code=400, detail="weights must sum to at most 1")
+
+    db = await get_db()
+    try:
+        cash, positions = await load_holdings(db)
+        held = {pos["ticker"]: pos["quantity"] for pos in positions}
+        tickers = sorted(held.keys() | targets.keys())
+        quotes = price_cache.get_many(tickers)
+        missing = sorted(t for t in tickers if t not in quotes)
+        if missing:
+            raise HTTPException(status_code=400, detail=f"No price available for {', '.join(missing)}")
+
+        prices = np.array([quotes[t].price for t in tickers])
+        deltas = plan_rebalance(
+            cash,
+            np.array([held.get(t, 0.0) for t in tickers]),
+            prices,
+            np.array([targets.get(t, 0.0) for t in tickers]),
+            step=FRACTIONAL_STEP if body.fractional else 1.0,
+        )
+
+        trades = []
+        # Sells first so their proceeds fund the buys
+        for i in np.argsort(deltas > 0, kind="stable").tolist():
+            delta = float(deltas[i])
+            if delta == 0:
+                continue
+            side = "buy" if delta > 0 else "sell"
+            trades.append(await apply_trade(db, tickers[i], side, abs(delta), float(prices[i])))
+
+        cash, positions = await load_holdings(db)
+        await db.commit()
+    finally:
+        await db.close()
+
+    if trades:
+        portfolio_changed()
+    total = cash + sum(pos["quantity"] * quotes[pos["ticker"]].price for pos in positions)
+    return RebalanceResponse(trades=trades, cash_balance=round(cash, 2), total_value=round(total, 2))
@@ -0,0 +1,193 @@
+"""GET /api/portfolio/risk — concentration, volatility, beta, correlation and VaR.
+
+Prices of every ticker with tick history are sampled onto a common time
+grid (last price at or before each grid point), giving a time × ticker
+matrix. Tickers whose history doesn't cover the grid are left out and
+listed in ``excluded``. Everything else is NumPy over that matrix and its simple returns:
+
+- weights of each position (and cash) in total value; HHI over the
+  invested weights and its inverse, the effective number of positions
+- annualized volatility per ticker and for the portfolio, plus a rolling
+  portfolio volatility series
+- beta of each ticker and of the portfolio to an equal-weight index of
+  every ticker in the history
+- pairwise correlation of held tickers
+- one-interval historical VaR (95% and 99%) in dollars
+
+Volatility is annualized over trading time (252 days × 6.5 hours), the
+same clock the simulator uses. Results are cached on the price cache
+generation and portfolio version, so repeat calls between ticks are free.
+"""
+
+import math
+
+import numpy as np
+from fastapi import APIRouter
+from numpy.lib.stride_tricks import sliding_window_view
+from pydantic import BaseModel
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.market.history import parse_interval, tick_history
+from app.portfolio import load_holdings, portfolio_version
+
+router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
+
+TRADING_SECONDS_PER_YEAR = 252 * 6.5 * 3600
+ROLLING_POINTS = 20  # returns per rolling volatility window
+MIN_RETURNS = 3
+
+
+class Correlation(BaseModel):
+    tickers: list[str]
+    matrix: list[list[float]]
+
+
+class RiskResponse(BaseModel):
+    total_value: float
+    cash_weight: float
+    weights: dict[str, float]
+    hhi: float
+    effective_positions: float
+    lookback: str
+    interval: str
+    samples: int  # returns used for the statistics below
+    volatility: dict[str, float] = {}
+    portfolio_volatility: float | None = None
+    rolling_volatility: list[float] = []
+    beta: dict[str, float] = {}
+    portfolio_beta: float | None = None
+    correlation: Correlation | None = None
+    var_95: float | None = None
+    var_99: float | None = None
+    excluded: list[str] = []  # tickers with too little history to sample
+
+
+def sample_prices(
+    tickers: list[str], lookback: float, interval: float
+) -> tuple[list[str], np.ndarray, list[str]]:
+    """Sample tick history onto a shared grid ending at the latest tick.
+
+    The grid starts where the longest histories start (at most
+    ``lookback`` back). Returns the tickers priced over that whole grid,
+    their (points, tickers) price matrix, and the tickers left out because
+    their history is shorter or missing, so one new ticker doesn't shrink
+    the sample for every other one.
+    """
+    series = {t: s for t in tickers if (s := tick_history.series(t)) is not None and len(s[0])}
+    missing = [t for t in tickers if t not in series]
+    if not series:
+        return [], np.empty((0, 0)), missing
+    end = max(float(ts[-1]) for ts, _ in series.values())
+    grid = end - interval * np.arange(int(lookback // interval), -1, -1)
+
+    names = list(series)
+    prices = np.full((len(grid), len(names)), np.nan)
+    for j, (ts, px) in enumerate(series.values()):
+        idx = np.searchsorted(ts, grid, side="right") - 1
+        ok = idx >= 0
+        prices[ok, j] = px[idx[ok]]
+    # Each series is forward-filled, so it is complete from its first priced point on
+    priced = np.isfinite(prices)
+    first = np.where(priced.any(axis=0), priced.argmax(axis=0), len(grid))
+    start = int(first.min())
+    keep = first <= start
+    excluded = [t for t, k in zip(names, keep) if not k]
+    return [t for t, k in zip(names, keep) if k], prices[start:, keep], excluded + missing
+
+
+def compute_risk(
+    cash: float,
+    quantities: dict[str, float],
+    prices: dict[str, float],
+    universe: list[str],
+    matrix: np.ndarray,
+    interval: float,
+) -> dict:
+    """Risk statistics for holdings over a (points, universe) price matrix."""
+    held = list(quantities)
+    values = np.array([quantities[t] * prices[t] for t in held])
+    total = cash + values.sum()
+    weights = values / total if total else np.zeros(len(held))
+    invested = values.sum()
+    invested_w = values / invested if invested else np.zeros(len(held))
+    hhi = float((invested_w**2).sum())
+    result = {
+        "total_value": round(float(total), 2),
+        "cash_weight": round(cash / total, 6) if total else 1.0,
+        "weights": {t: round(float(w), 6) for t, w in zip(held, weights)},
+        "hhi": round(hhi, 6),
+        "effective_positions": round(1 / hhi, 4) if hhi else 0.0,
+        "samples": 0,
+    }
+
+    returns = matrix[1:] / matrix[:-1] - 1 if len(matrix) > 1 else np.empty((0, len(universe)))
+    if len(returns) < MIN_RETURNS:
+        return result
+    result["samples"] = len(returns)
+    annualize = math.sqrt(TRADING_SECONDS_PER_YEAR / interval)
+    col = {t: j for j, t in enumerate(universe)}
+    modeled = [t for t in held if t in col]
+    cols = [col[t] for t in modeled]
+    r_held = returns[:, cols]
+    w_held = np.array([weights[held.index(t)] for t in modeled])
+    r_port = r_held @ w_held
+    r_index = returns.mean(axis=1)
+
+    vols = r_held.std(axis=0, ddof=1) * annualize
+    result["volatility"] = {t: round(float(v), 6) for t, v in zip(modeled, vols)}
+    result["portfolio_volatility"] = round(float(r_port.std(ddof=1) * annualize), 6)
+    if len(r_port) >= ROLLING_POINTS:
+        rolling = sliding_window_view(r_port, ROLLING_POINTS).std(axis=1, ddof=1) * annualize
+        result["rolling_volatility"] = np.round(rolling, 6).tolist()
+
+    index_dev = r_index - r_index.mean()
+    index_var = float(index_dev @ index_dev)
+    if index_var > 0:
+        betas = (r_held - r_held.mean(axis=0)).T @ index_dev / index_var
+        result["beta"] = {t: round(float(b), 4) for t, b in zip(modeled, betas)}
+        result["portfolio_beta"] = round(float((r_port - r_port.mean()) @ index_dev / index_var), 4)
+
+    if len(modeled) > 1:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.nan_to_num(np.corrcoef(r_held, rowvar=False))
+        result["correlation"] = {"tickers": modeled, "matrix": np.round(corr, 4).tolist()}
+    elif modeled:
+        result["correlation"] = {"tickers": modeled, "matrix": [[1.0]]}
+
+    q95, q99 = np.quantile(r_port, [0.05, 0.01])
+    result["var_95"] = round(float(max(-q95, 0.0) * total), 2)
+    result["var_99"] = round(float(max(-q99, 0.0) * total), 2)
+    return result
+
+
+_cache: tuple[tuple, RiskResponse] | None = None
+
+
+@router.get("/risk", response_model=RiskResponse)
+async def get_risk(lookback: str = "15m", interval: str = "5s"):
+    """Portfolio risk from recent tick history, cached until the next tick or trade."""
+    global _cache
+    lookback_s = parse_interval(lookback)
+    interval_s = parse_interval(interval)
+    key = (price_cache.generation, portfolio_version(), lookback_s, interval_s)
+    if _cache is not None and _cache[0] == key:
+        return _cache[1]
+
+    db = await get_db()
+    try:
+        cash, positions = await load_holdings(db)
+    finally:
+        await db.close()
+
+    quotes = price_cache.get_many(pos["ticker"] for pos in positions)
+    quantities = {pos["ticker"]: pos["quantity"] for pos in positions}
+    prices = {
+        pos["ticker"]: quotes[pos["ticker"]].price if pos["ticker"] in quotes else pos["avg_cost"]
+        for pos in positions
+    }
+    universe, matrix, excluded = sample_prices(tick_history.tickers(), lookback_s, interval_s)
+    stats = compute_risk(cash, quantities, prices, universe, matrix, interval_s)
+    response = RiskResponse(lookback=lookback, interval=interval, excluded=excluded, **stats)
+    _cache = (key, response)
+    return response
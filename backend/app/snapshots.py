@@ -1,40 +1,165 @@
-"""Background portfolio snapshot recorder (every 30 seconds)."""
+"""Change-driven portfolio snapshot recorder.
+
+Instead of writing a row on a fixed timer, the recorder keeps the current
+holdings in memory and re-values them once per check interval, but only
+if a held ticker has ticked or the portfolio changed since the last
+write. A snapshot is written when:
+
+- the value moved more than ``SNAPSHOT_CHANGE_PCT`` percent from the
+  last snapshot (catching swings a fixed timer would miss), or
+- ``SNAPSHOT_MAX_INTERVAL`` seconds passed and the value differs at all, or
+- the portfolio changed (trades, order fills). Every change within one
+  check interval is coalesced into a single snapshot.
+
+An idle market (no held ticker moving, no trades) writes nothing.
+"""
 
 import asyncio
 import logging
+import os
+import time
 
 from app.database import get_db
-from app.portfolio import take_snapshot
+from app.market.cache import price_cache
+from app.market.models import PriceUpdate
+from app.portfolio import (
+    add_change_listener,
+    load_holdings,
+    portfolio_value,
+    remove_change_listener,
+    snapshot_recorded,
+    take_snapshot,
+)
 
 log = logging.getLogger(__name__)
 
-_task: asyncio.Task | None = None
+DEFAULT_CHANGE_PCT = 0.1
+DEFAULT_MAX_INTERVAL = 60.0  # seconds
+DEFAULT_CHECK_INTERVAL = 1.0  # seconds
+
+
+class SnapshotRecorder:
+    """Writes portfolio snapshots when the value changes meaningfully."""
+
+    def __init__(
+        self,
+        change_pct: float = DEFAULT_CHANGE_PCT,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+    ):
+        self.threshold = change_pct / 100
+        self.max_interval = max_interval
+        self.check_interval = check_interval
+        self.writes = 0
+        self._cash = 0.0
+        self._positions: list = []
+        self._held: frozenset[str] = frozenset()
+        self._moved = False
+        self._portfolio_changed = True  # load holdings on the first check
+        self._last_value: float | None = None
+        self._last_write = 0.0
+        self._task: asyncio.Task | None = None
+
+    def on_prices(self, updates: list[PriceUpdate], ts: float) -> None:
+        """Price cache listener: note that a held ticker moved."""
+        if self._moved or not self._held:
+            return
+        held = self._held
+        for u in updates:
+            if u.ticker in held:
+                self._moved = True
+                return
+
+    def on_portfolio_change(self) -> None:
+        self._portfolio_changed = True
 
+    async def check(self) -> bool:
+        """Re-value if anything changed and write a snapshot if one is due.
 
-async def _snapshot_loop():
-    """Periodically snapshot portfolio value."""
-    while True:
-        await asyncio.sleep(30)
+        Values come from the holdings kept in memory; the database is only
+        opened to reload them after a portfolio change, or to write.
+        """
+        traded = self._portfolio_changed
+        if not traded and not self._moved:
+            return False  # idle
+
+        # Cleared before the reload so a change committed meanwhile isn't
+        # lost, and raised again if this check fails
+        self._portfolio_changed = False
         try:
+            if traded:
+                db = await get_db()
+                try:
+                    self._cash, self._positions = await load_holdings(db)
+                finally:
+                    await db.close()
+                self._held = frozenset(pos["ticker"] for pos in self._positions)
+            value = round(portfolio_value(self._cash, self._positions), 2)
+            now = time.monotonic()
+            last = self._last_value
+            due = (
+                traded
+                or last is None
+                or abs(value - last) > self.threshold * abs(last)
+                or (now - self._last_write >= self.max_interval and value != last)
+            )
+            if not due:
+                return False
             db = await get_db()
             try:
-                await take_snapshot(db)
+                await take_snapshot(db, value)
                 await db.commit()
             finally:
                 await db.close()
-        except Exception:
-            log.exception("Snapshot failed")
+        except BaseException:
+            self._portfolio_changed |= traded
+            raise
+        snapshot_recorded()
+
+        self._last_value = value
+        self._last_write = now
+        self._moved = False
+        self.writes += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except Exception:
+                log.exception("Snapshot failed")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        price_cache.add_listener(self.on_prices)
+        add_change_listener(self.on_portfolio_change)
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        price_cache.remove_listener(self.on_prices)
+        remove_change_listener(self.on_portfolio_change)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+_recorder: SnapshotRecorder | None = None
 
 
 def start_snapshot_recorder():
-    """Start the background snapshot task."""
-    global _task
-    _task = asyncio.create_task(_snapshot_loop())
+    """Start the background snapshot recorder."""
+    global _recorder
+    _recorder = SnapshotRecorder(
+        change_pct=float(os.environ.get("SNAPSHOT_CHANGE_PCT", DEFAULT_CHANGE_PCT)),
+        max_interval=float(os.environ.get("SNAPSHOT_MAX_INTERVAL", DEFAULT_MAX_INTERVAL)),
+        check_interval=float(os.environ.get("SNAPSHOT_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)),
+    )
+    _recorder.start()
 
 
 def stop_snapshot_recorder():
-    """Cancel the background snapshot task."""
-    global _task
-    if _task:
-        _task.cancel()
-        _task = None
+    """Stop the background snapshot recorder."""
+    global _recorder
+    if _recorder:
+        _recorder.stop()
+        _recorder = None
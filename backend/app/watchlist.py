@@ -3,11 +3,13 @@
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 from app.database import get_db
+from app.httpcache import ResponseCache
 from app.market.cache import price_cache
+from app.market.history import tick_history
 
 router = APIRouter(prefix="/api/watchlist", tags=["watchlist"])
 
@@ -23,19 +25,57 @@ class WatchlistItem(BaseModel):
     change_percent: float | None = None
 
 
+_version = 0
+
+
+def watchlist_version() -> int:
+    """Counter bumped by every ``watchlist_changed()``, for cache keys."""
+    return _version
+
+
+def watchlist_changed() -> None:
+    """Call after committing a watchlist add or remove."""
+    global _version
+    _version += 1
+
+
+async def untrack_ticker(db, ticker: str) -> None:
+    """Stop streaming a ticker just removed from the watchlist, unless it is still held.
+
+    Its tick history is dropped too, so bars and risk sampling only see
+    tracked tickers.
+    """
+    cursor = await db.execute(
+        "SELECT 1 FROM positions WHERE user_id = 'default' AND ticker = ?", (ticker,)
+    )
+    if await cursor.fetchone() is None:
+        price_cache.remove_ticker(ticker)
+        tick_history.drop(ticker)
+
+
+_watchlist_cache = ResponseCache(
+    "watchlist", list[WatchlistItem], strict=watchlist_version, loose=lambda: price_cache.generation
+)
+
+
 @router.get("", response_model=list[WatchlistItem])
-async def get_watchlist():
+async def get_watchlist(request: Request):
     """Return watchlist tickers with latest prices from price cache."""
+    return await _watchlist_cache.respond(request, _load_watchlist)
+
+
+async def _load_watchlist() -> list[WatchlistItem]:
     db = await get_db()
     try:
         cursor = await db.execute(
             "SELECT ticker FROM watchlist WHERE user_id = 'default' ORDER BY added_at"
         )
         rows = await cursor.fetchall()
+        quotes = price_cache.get_many(row["ticker"] for row in rows)
         items = []
         for row in rows:
             ticker = row["ticker"]
-            update = price_cache.get(ticker)
+            update = quotes.get(ticker)
             if update:
                 prev = update.previous_price
                 change_pct = ((update.price - prev) / prev * 100) if prev else None
@@ -74,6 +114,8 @@ async def add_ticker(body: AddTickerRequest):
             (str(uuid.uuid4()), ticker, now),
         )
         await db.commit()
+        watchlist_changed()
+        price_cache.add_ticker(ticker)
         update = price_cache.get(ticker)
         return WatchlistItem(ticker=ticker, price=update.price if update else None)
     finally:
@@ -93,6 +135,8 @@ async def remove_ticker(ticker: str):
         await db.commit()
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"{ticker} not in watchlist")
+        watchlist_changed()
+        await untrack_ticker(db, ticker)
         return {"ok": True}
     finally:
         await db.close()
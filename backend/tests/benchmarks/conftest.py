@@ -0,0 +1,134 @@
+"""Offline benchmark harness for backend hot paths.
+
+Benchmarks are skipped unless ``BENCHMARK=1``. Each test takes the
+``benchmark`` fixture and calls it with the code under test, in the style
+of pytest-benchmark. The fixture calibrates a round count, records
+min/median/mean timings and compares the median against a stored baseline.
+
+    BENCHMARK=1 pytest tests/benchmarks                   # run and compare
+    BENCHMARK=1 BENCHMARK_SAVE=1 pytest tests/benchmarks  # refresh baseline
+
+A benchmark fails when its median exceeds the baseline median by more than
+``BENCHMARK_TOLERANCE`` (default 1.5x). Baselines are machine-specific, so
+they live in the git-ignored ``.benchmarks/`` directory.
+"""
+
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+RUN = os.environ.get("BENCHMARK", "") == "1"
+SAVE = os.environ.get("BENCHMARK_SAVE", "") == "1"
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "1.5"))
+BASELINE_PATH = Path(
+    os.environ.get("BENCHMARK_BASELINE")
+    or Path(__file__).resolve().parents[2] / ".benchmarks" / "baseline.json"
+)
+
+MIN_TIME = 0.5  # seconds of measurement per benchmark when calibrating
+MIN_ROUNDS = 5
+MAX_ROUNDS = 100_000
+
+_results: dict[str, dict] = {}
+
+
+def _load_baseline() -> dict[str, dict]:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+_baseline = _load_baseline()
+
+
+class Benchmark:
+    """Times a callable over calibrated rounds and checks it against the baseline."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats: dict | None = None
+
+    def _rounds(self, first_call: float, rounds: int | None) -> int:
+        if rounds is not None:
+            return rounds
+        return max(MIN_ROUNDS, min(MAX_ROUNDS, int(MIN_TIME / max(first_call, 1e-9))))
+
+    def __call__(self, fn, *args, rounds: int | None = None, **kwargs):
+        """Benchmark a synchronous callable; returns its last result."""
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)  # warm-up, also used for calibration
+        times = []
+        for _ in range(self._rounds(time.perf_counter() - start, rounds)):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+        self._finish(times)
+        return result
+
+    async def run_async(self, fn, *args, rounds: int | None = None, **kwargs):
+        """Benchmark a coroutine function; returns its last result."""
+        start = time.perf_counter()
+        result = await fn(*args, **kwargs)
+        times = []
+        for _ in range(self._rounds(time.perf_counter() - start, rounds)):
+            start = time.perf_counter()
+            result = await fn(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+        self._finish(times)
+        return result
+
+    def rate(self, count: float, unit: str) -> None:
+        """Report throughput as ``count`` units per median round."""
+        self.stats["rate"] = f"{count / self.stats['median']:,.0f} {unit}/s"
+
+    def _finish(self, times: list[float]) -> None:
+        self.stats = {
+            "rounds": len(times),
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        }
+        _results[self.name] = self.stats
+        base = _baseline.get(self.name)
+        if base and not SAVE and self.stats["median"] > base["median"] * TOLERANCE:
+            pytest.fail(
+                f"{self.name}: median {self.stats['median'] * 1e6:.1f}us regressed past "
+                f"{TOLERANCE}x baseline {base['median'] * 1e6:.1f}us"
+            )
+
+
+@pytest.fixture(autouse=True)
+def _require_benchmark_flag():
+    if not RUN:
+        pytest.skip("set BENCHMARK=1 to run benchmarks")
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    return Benchmark(request.node.nodeid.split("::", 1)[-1])
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if SAVE and _results:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        merged = {**_baseline, **_results}
+        BASELINE_PATH.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmarks")
+    width = max(len(name) for name in _results)
+    terminalreporter.write_line(f"{'name':<{width}}  {'median':>12}  {'min':>12}  {'rounds':>7}  vs baseline")
+    for name, stats in sorted(_results.items()):
+        base = _baseline.get(name)
+        ratio = f"{stats['median'] / base['median']:.2f}x" if base else "-"
+        terminalreporter.write_line(
+            f"{name:<{width}}  {stats['median'] * 1e6:>10.1f}us  {stats['min'] * 1e6:>10.1f}us"
+            f"  {stats['rounds']:>7}  {ratio}" + (f"  {stats['rate']}" if "rate" in stats else "")
+        )
@@ -0,0 +1,109 @@
+"""Benchmarks for portfolio, history and chat request round-trips."""
+
+import sqlite3
+
+import pytest
+
+import app.database as database
+from app.httpcache import clear_response_caches
+from app.market.cache import price_cache
+from app.market.history import DEFAULT_CAPACITY, tick_history
+
+
+@pytest.fixture
+def rich_user(db):
+    """Give the default user effectively unlimited cash."""
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.execute("UPDATE users_profile SET cash_balance = 1e12 WHERE id = 'default'")
+    conn.commit()
+    conn.close()
+    price_cache.update("AAPL", 150.0)
+    yield
+    price_cache.clear()
+
+
+async def test_execute_trade_round_trip(benchmark, client, rich_user):
+    async def buy():
+        resp = await client.post(
+            "/api/portfolio/trade", json={"ticker": "AAPL", "quantity": 1, "side": "buy"}
+        )
+        assert resp.status_code == 200
+
+    await benchmark.run_async(buy)
+
+
+async def test_get_portfolio_500_positions(benchmark, client, db):
+    tickers = [f"T{i:03d}" for i in range(500)]
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.executemany(
+        "INSERT INTO positions (id, user_id, ticker, quantity, avg_cost, updated_at) "
+        "VALUES (?, 'default', ?, 10, 100.0, '2026-01-01T00:00:00+00:00')",
+        [(t, t) for t in tickers],
+    )
+    conn.commit()
+    conn.close()
+    price_cache.update_many({t: 101.0 for t in tickers})
+    try:
+
+        async def get():
+            resp = await client.get("/api/portfolio")
+            assert len(resp.json()["positions"]) == 500
+
+        await benchmark.run_async(get)
+    finally:
+        price_cache.clear()
+
+
+async def test_get_portfolio_history_1m_snapshots(benchmark, client, db):
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.executemany(
+        "INSERT INTO portfolio_snapshots (user_id, total_value, recorded_at) VALUES ('default', ?, ?)",
+        ((10000.0 + i % 100, 1767225600000 + i) for i in range(1_000_000)),
+    )
+    conn.commit()
+    conn.close()
+
+    async def get():
+        clear_response_caches()  # time the query, not the cached body
+        resp = await client.get("/api/portfolio/history")
+        assert resp.status_code == 200
+
+    await benchmark.run_async(get, rounds=3)
+
+
+async def test_get_portfolio_etag_revalidation(benchmark, client, rich_user):
+    etag = (await client.get("/api/portfolio")).headers["etag"]
+
+    async def revalidate():
+        resp = await client.get("/api/portfolio", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+
+    await benchmark.run_async(revalidate)
+
+
+async def test_chat_mock_mode(benchmark, client, monkeypatch):
+    monkeypatch.setenv("LLM_MOCK", "true")
+
+    async def chat():
+        resp = await client.post("/api/chat", json={"message": "show my portfolio"})
+        assert resp.status_code == 200
+
+    await benchmark.run_async(chat)
+
+
+async def test_get_prices_50_tickers_full_history(benchmark, client):
+    tickers = [f"T{i:03d}" for i in range(50)]
+    price_cache.add_listener(tick_history.record)
+    try:
+        for i in range(DEFAULT_CAPACITY):
+            price_cache.update_many({t: 100.0 + i % 7 for t in tickers})
+
+        async def get():
+            resp = await client.get("/api/prices?points=60")
+            assert len(resp.json()["series_price"][0]) == 60
+
+        await benchmark.run_async(get)
+    finally:
+        price_cache.remove_listener(tick_history.record)
+        price_cache.clear()
+        tick_history.clear()
@@ -0,0 +1,23 @@
+"""Benchmarks for the backtest engine (one simulated year x 50 tickers)."""
+
+import pytest
+
+from app.backtest import equal_weight, momentum, run_backtest, simulated_prices
+
+
+@pytest.fixture(scope="module")
+def year():
+    return simulated_prices(tickers=50, days=252, seed=1)
+
+
+def test_simulated_year(benchmark):
+    tickers, prices = benchmark(simulated_prices, 50, 252, rounds=3)
+    benchmark.rate(prices.size, "prices")
+
+
+@pytest.mark.parametrize("every", [390, 1])
+def test_backtest_year(benchmark, year, every):
+    tickers, prices = year
+    strategy = momentum if every > 1 else equal_weight
+    benchmark(lambda: run_backtest(prices, strategy(), tickers, every=every), rounds=3)
+    benchmark.rate(len(prices), "bars")
@@ -0,0 +1,63 @@
+"""Benchmarks for the integer-timestamp migration of time-series tables."""
+
+import os
+import shutil
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app.database as database
+from app.database import init_db
+
+SNAPSHOTS = 1_000_000
+TRADES = 100_000
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """A pre-migration database: TEXT uuid ids and ISO timestamps."""
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE trades (
+            id TEXT PRIMARY KEY, user_id TEXT DEFAULT 'default', ticker TEXT, side TEXT,
+            quantity REAL, price REAL, executed_at TEXT
+        );
+        CREATE INDEX idx_trades_user_time ON trades (user_id, executed_at, id);
+        CREATE TABLE portfolio_snapshots (
+            id TEXT PRIMARY KEY, user_id TEXT DEFAULT 'default', total_value REAL, recorded_at TEXT
+        );
+        """
+    )
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    conn.executemany(
+        "INSERT INTO portfolio_snapshots VALUES (?, 'default', ?, ?)",
+        (
+            (str(uuid.uuid4()), 10000.0 + i % 100, (start + timedelta(seconds=30 * i)).isoformat())
+            for i in range(SNAPSHOTS)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO trades VALUES (?, 'default', 'AAPL', 'buy', 1, 150.0, ?)",
+        ((str(uuid.uuid4()), (start + timedelta(seconds=i)).isoformat()) for i in range(TRADES)),
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return path
+
+
+async def test_migrate_1m_snapshots_to_integer_time(benchmark, db, legacy_db):
+    async def migrate():
+        shutil.copyfile(legacy_db, database.DB_PATH)
+        await init_db()
+
+    await benchmark.run_async(migrate, rounds=1)
+    benchmark.rate(SNAPSHOTS + TRADES, "rows")
+
+    legacy_size = os.path.getsize(legacy_db)
+    migrated_size = os.path.getsize(database.DB_PATH)
+    assert migrated_size < legacy_size * 0.6
@@ -0,0 +1,134 @@
+"""Benchmarks for the price cache, simulator, SSE serialization and order/alert ticks."""
+
+import statistics
+import time
+
+import pytest
+
+from app.market.cache import PriceCache, price_cache
+from app.market.simulator import Simulator
+from app.market.stream import _price_events
+
+
+def _universe(n: int) -> dict[str, float]:
+    return {f"T{i:05d}": 100.0 + i % 50 for i in range(n)}
+
+
+def _config(n: int) -> dict[str, dict]:
+    return {f"T{i:05d}": {"seed": 100.0, "drift": 0.08, "vol": 0.25} for i in range(n)}
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 10_000])
+def test_cache_update_many(benchmark, n):
+    cache = PriceCache()
+    prices = _universe(n)
+    benchmark(cache.update_many, prices)
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 10_000])
+def test_cache_update_single(benchmark, n):
+    cache = PriceCache()
+    cache.update_many(_universe(n))
+    benchmark(cache.update, "T00000", 101.0)
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 10_000])
+def test_cache_get_all_after_write(benchmark, n):
+    """Worst case: every call follows a write, so the snapshot is rebuilt."""
+    cache = PriceCache()
+    cache.update_many(_universe(n))
+
+    def write_then_read():
+        cache.update("T00000", 101.0)
+        return cache.get_all()
+
+    benchmark(write_then_read)
+
+
+@pytest.mark.parametrize("n", [10, 100, 1_000])
+def test_simulator_step(benchmark, n):
+    sim = Simulator(seed=1, config=_config(n))
+    try:
+        benchmark(sim._step)
+    finally:
+        price_cache.clear()
+
+
+def test_simulator_fast_forward_trading_day(benchmark):
+    sim = Simulator(seed=1)
+    benchmark(sim.fast_forward, 46_800, rounds=5)
+
+
+@pytest.mark.parametrize("n", [10, 1_000])
+def test_sse_serialization_per_tick(benchmark, n):
+    cache = PriceCache()
+    cache.update_many(_universe(n))
+    benchmark(_price_events, cache.get_all())
+
+
+def _median_tick(engine, updates, rounds: int = 500) -> float:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        engine.on_prices(updates, 0.0)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _order_book(n: int):
+    """An order engine with ``n`` resting orders and a tick that crosses none of them."""
+    from app.orders import OrderEngine, RestingOrder
+
+    tickers = [f"T{i:05d}" for i in range(50)]
+    engine = OrderEngine()
+    for i in range(n):
+        side, kind = [("buy", "limit"), ("sell", "stop"), ("sell", "limit"), ("buy", "stop")][i % 4]
+        order = RestingOrder(str(i), tickers[i % 50], side, kind, 1.0, 0.0)
+        # Resting on the far side of the current price of 100
+        order.trigger_price = 160.0 + i % 40 if order.fires_on_rise else 50.0 + i % 40
+        engine.add(order)
+    cache = PriceCache()
+    cache.update_many({t: 100.0 for t in tickers})
+    return engine, [cache.get(t) for t in tickers]
+
+
+def _alert_book(n: int):
+    """An alert engine with ``n`` active alerts and a tick that fires none of them."""
+    from app.alerts import Alert, AlertEngine
+
+    tickers = [f"T{i:05d}" for i in range(50)]
+    engine = AlertEngine()
+    for i in range(n):
+        condition = ("above", "below", "move")[i % 3]
+        value = {"above": 150.0 + i % 40, "below": 50.0 - i % 40, "move": 20.0 + i % 10}[condition]
+        engine.add(Alert(str(i), tickers[i % 50], condition, value, base_price=100.0))
+    cache = PriceCache()
+    cache.update_many({t: 100.0 for t in tickers})
+    return engine, [cache.get(t) for t in tickers]
+
+
+@pytest.mark.parametrize("n", [1_000, 10_000, 100_000])
+def test_order_trigger_tick(benchmark, n):
+    """A tick that crosses nothing should cost the same at any book depth."""
+    engine, updates = _order_book(n)
+    benchmark(engine.on_prices, updates, 0.0)
+    assert len(engine) == n
+
+
+def test_order_trigger_tick_stays_flat():
+    small, large = (_median_tick(*_order_book(n)) for n in (1_000, 100_000))
+    # A linear scan would be ~100x; allow noise and the log factor
+    assert large < 3 * small, f"1k: {small * 1e6:.1f}us, 100k: {large * 1e6:.1f}us"
+
+
+@pytest.mark.parametrize("n", [1_000, 10_000, 100_000])
+def test_alert_tick(benchmark, n):
+    """Per-tick alert evaluation should not grow with the total alert count."""
+    engine, updates = _alert_book(n)
+    benchmark(engine.on_prices, updates, 0.0)
+    assert len(engine) == n
+
+
+def test_alert_tick_stays_flat():
+    small, large = (_median_tick(*_alert_book(n)) for n in (1_000, 100_000))
+    assert large < 3 * small, f"1k: {small * 1e6:.1f}us, 100k: {large * 1e6:.1f}us"
@@ -0,0 +1,33 @@
+"""Benchmarks for Monte Carlo portfolio projection (paths/sec)."""
+
+import numpy as np
+import pytest
+
+from app.market.simulator import TICKER_CONFIG
+from app.projection import ProjectionRequest, gbm_params, project, simulate_values
+
+TICKERS = list(TICKER_CONFIG)
+
+
+def _holdings():
+    return np.full(len(TICKERS), 10.0), np.array([TICKER_CONFIG[t]["seed"] for t in TICKERS])
+
+
+@pytest.mark.parametrize("steps", [30, 252])
+def test_simulate_values(benchmark, steps):
+    quantities, prices = _holdings()
+    drift, vol, chol = gbm_params(TICKERS)
+    paths = 2000
+    benchmark(
+        simulate_values, 1000.0, quantities, prices, drift, vol, chol,
+        1 / 252, steps, paths, 1,
+    )
+    benchmark.rate(paths, "paths")
+
+
+async def test_project_process_pool(benchmark):
+    quantities, prices = _holdings()
+    body = ProjectionRequest(horizon_days=252, steps=252, paths=40_000, seed=1)
+    await project(1000.0, quantities, prices, TICKERS, body)  # start the pool
+    await benchmark.run_async(project, 1000.0, quantities, prices, TICKERS, body, rounds=3)
+    benchmark.rate(body.paths, "paths")
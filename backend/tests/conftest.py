@@ -10,8 +10,11 @@ from httpx import ASGITransport, AsyncClient
 _tmpdir = tempfile.mkdtemp()
 _db_path = os.path.join(_tmpdir, "test.db")
 os.environ["DB_PATH"] = _db_path
+# Tests move prices between requests and expect to see them immediately
+os.environ.setdefault("RESPONSE_CACHE_TTL", "0")
 
 from app.database import init_db  # noqa: E402
+from app.httpcache import clear_response_caches  # noqa: E402
 from app.main import app  # noqa: E402
 import app.database as database  # noqa: E402
 
@@ -22,6 +25,7 @@ async def db():
     database.DB_PATH = _db_path
     if os.path.exists(_db_path):
         os.remove(_db_path)
+    clear_response_caches()
     await init_db()
     yield
     if os.path.exists(_db_path):
@@ -0,0 +1,140 @@
+"""Tests for the price alert engine, API and SSE delivery."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.alerts import Alert, AlertEngine, alert_engine
+from app.market.cache import price_cache
+from app.market.stream import _price_event_generator
+
+
+@pytest.fixture(autouse=True)
+def seed_prices():
+    price_cache.update("AAPL", 150.0)
+    yield
+    price_cache.clear()
+
+
+def _tick(engine, ticker, price):
+    cursor = engine.cursor
+    price_cache.update(ticker, price)
+    engine.on_prices([price_cache.get(ticker)], 0.0)
+    fired, _ = engine.fired_since(cursor)
+    return sorted(e["id"] for e in fired)
+
+
+def test_level_alerts_fire_once():
+    engine = AlertEngine()
+    engine.add(Alert("up", "AAPL", "above", 155.0))
+    engine.add(Alert("down", "AAPL", "below", 145.0))
+
+    assert _tick(engine, "AAPL", 154.0) == []
+    assert _tick(engine, "AAPL", 155.0) == ["up"]
+    assert _tick(engine, "AAPL", 160.0) == []
+    assert _tick(engine, "AAPL", 140.0) == ["down"]
+    assert len(engine) == 0
+
+
+def test_only_crossed_levels_fire():
+    engine = AlertEngine()
+    for i in range(100):
+        engine.add(Alert(f"a{i}", "AAPL", "above", 151.0 + i))
+    assert _tick(engine, "AAPL", 160.5) == sorted(f"a{i}" for i in range(10))
+    assert len(engine) == 90
+
+
+def test_move_alert_fires_either_way_and_clears_other_level():
+    engine = AlertEngine()
+    engine.add(Alert("m1", "AAPL", "move", 3.0, base_price=100.0))
+    engine.add(Alert("m2", "AAPL", "move", 3.0, base_price=100.0))
+    assert _tick(engine, "AAPL", 102.0) == []
+    assert _tick(engine, "AAPL", 96.9) == ["m1", "m2"]
+    assert _tick(engine, "AAPL", 104.0) == []
+    assert len(engine) == 0
+
+
+def test_remove_alert():
+    engine = AlertEngine()
+    engine.add(Alert("a", "AAPL", "above", 155.0))
+    assert engine.remove("a")
+    assert not engine.remove("a")
+    assert _tick(engine, "AAPL", 160.0) == []
+
+
+def test_feed_includes_prices():
+    engine = AlertEngine()
+    engine.add(Alert("a", "AAPL", "above", 155.0))
+    price_cache.update("AAPL", 156.0)
+    engine.on_prices([price_cache.get("AAPL")], 0.0)
+    (event,), cursor = engine.fired_since(0)
+    assert event["price"] == 156.0
+    assert event["previous_price"] == 150.0
+    assert engine.fired_since(cursor) == ([], cursor)
+
+
+@pytest.fixture
+async def engine(db):
+    await alert_engine.start()
+    yield alert_engine
+    await alert_engine.stop()
+
+
+async def test_alert_api_and_persistence(client, engine):
+    resp = await client.post("/api/alerts", json={"ticker": "aapl", "condition": "move", "value": 3})
+    assert resp.status_code == 200
+    alert = resp.json()
+    assert alert["ticker"] == "AAPL"
+    assert alert["base_price"] == 150.0
+
+    price_cache.update("AAPL", 155.0)
+    for _ in range(50):
+        rows = (await client.get("/api/alerts?status=triggered")).json()
+        if rows:
+            break
+        await asyncio.sleep(0.01)
+    assert rows[0]["id"] == alert["id"]
+    assert rows[0]["trigger_price"] == 155.0
+
+
+async def test_active_alerts_reloaded_on_start(client, engine):
+    await client.post("/api/alerts", json={"ticker": "AAPL", "condition": "above", "value": 200})
+    await engine.stop()
+    await engine.start()
+    assert len(engine) == 1
+
+
+async def test_delete_alert(client, engine):
+    alert = (await client.post("/api/alerts", json={"ticker": "AAPL", "condition": "below", "value": 100})).json()
+    assert (await client.delete(f"/api/alerts/{alert['id']}")).status_code == 200
+    assert len(engine) == 0
+    assert (await client.delete(f"/api/alerts/{alert['id']}")).status_code == 404
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"ticker": "AAPL", "condition": "near", "value": 1},
+        {"ticker": "AAPL", "condition": "above", "value": 0},
+        {"ticker": "ZZZZ", "condition": "move", "value": 5},
+    ],
+)
+async def test_invalid_alerts(client, payload):
+    assert (await client.post("/api/alerts", json=payload)).status_code == 400
+
+
+async def test_fired_alerts_are_streamed_over_sse():
+    alert_engine.add(Alert("sse", "AAPL", "above", 151.0))
+    events = _price_event_generator()
+    try:
+        first = await anext(events)
+        assert first["event"] == "price"
+        price_cache.update("AAPL", 152.0)
+        alert_engine.on_prices([price_cache.get("AAPL")], 0.0)
+        event = await anext(events)
+        assert event["event"] == "alert"
+        assert json.loads(event["data"])["id"] == "sse"
+    finally:
+        await events.aclose()
+        alert_engine.remove("sse")
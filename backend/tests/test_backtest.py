@@ -0,0 +1,133 @@
+"""Tests for the strategy backtest engine."""
+
+import numpy as np
+import pytest
+
+from app.backtest import (
+    buy_and_hold,
+    equal_weight,
+    mean_reversion,
+    momentum,
+    recorded_prices,
+    run_backtest,
+    simulated_prices,
+    universe_config,
+)
+from app.portfolio import apply_fills
+
+
+def test_apply_fills_average_cost_and_realized():
+    qty, avg, realized, cash = apply_fills(
+        [10.0, 10.0, 0.0], [100.0, 100.0, 0.0], [10.0, -4.0, 0.0], [120.0, 130.0, 50.0]
+    )
+    assert qty.tolist() == [20.0, 6.0, 0.0]
+    assert avg.tolist() == [110.0, 100.0, 0.0]
+    assert realized.tolist() == [0.0, 120.0, 0.0]
+    assert cash.tolist() == [-1200.0, 520.0, 0.0]
+
+
+def test_apply_fills_full_sell_resets_cost():
+    qty, avg, realized, _ = apply_fills(5.0, 80.0, -5.0, 90.0)
+    assert (float(qty), float(avg), float(realized)) == (0.0, 0.0, 50.0)
+
+
+def test_universe_config_pads_synthetic_tickers():
+    config = universe_config(12)
+    assert len(config) == 12
+    assert "AAPL" in config and "SIM011" in config
+
+
+def test_simulated_prices_are_seeded():
+    tickers, a = simulated_prices(tickers=3, days=1, seed=7)
+    _, b = simulated_prices(tickers=3, days=1, seed=7)
+    assert tickers == ["AAPL", "GOOGL", "MSFT"]
+    assert a.shape == (391, 3)  # 6.5h of one-minute bars plus the start row
+    np.testing.assert_array_equal(a, b)
+
+
+def test_buy_and_hold_marks_to_market():
+    prices = np.array([[100.0, 50.0], [110.0, 40.0], [120.0, 60.0]])
+    result = run_backtest(prices, buy_and_hold(), cash=1000.0)
+    np.testing.assert_allclose(result.quantities, [5.0, 10.0])
+    np.testing.assert_allclose(result.equity, [1000.0, 950.0, 1200.0])
+    assert result.trades == 2
+    assert result.realized_pnl == 0.0
+
+
+def test_equal_weight_realizes_gains_and_pays_fees():
+    prices = np.array([[100.0, 100.0], [200.0, 100.0]])
+    result = run_backtest(prices, equal_weight(), cash=1000.0, fee_bps=10)
+    assert result.realized_pnl > 0
+    assert result.fees > 0
+    assert result.cash >= 0
+    assert result.equity[-1] < 1500.0
+
+
+def _schedule(*weights):
+    targets = iter(np.array(w, dtype=float) for w in weights)
+    return lambda history: next(targets)
+
+
+def test_fees_on_both_legs_keep_cash_non_negative():
+    prices = np.full((3, 2), 100.0)
+    result = run_backtest(prices, _schedule([1, 0], [0, 1], [1, 0]), cash=10000.0, fee_bps=50)
+    assert result.cash >= 0
+    assert result.equity[-1] == pytest.approx(result.cash + result.quantities @ prices[-1])
+    assert result.fees == pytest.approx(result.turnover * 0.005)
+
+
+@pytest.mark.parametrize("cost_basis, realized", [("fifo", 2650.0), ("average", 2400.0)])
+def test_realized_pnl_follows_cost_basis(cost_basis, realized):
+    # A is bought 10 @ 100 then 16 @ 150 (B sold for +1500); selling 13 A
+    # @ 200 realizes 1150 against the oldest lots, or 900 at the average
+    prices = np.array([[100.0, 100.0], [150.0, 250.0], [200.0, 200.0]])
+    strategy = _schedule([0.5, 0.5], [1, 0], [0.5, 0.5])
+    result = run_backtest(prices, strategy, cash=2000.0, fractional=False, cost_basis=cost_basis)
+    assert result.quantities.tolist() == [13.0, 13.0]
+    assert result.realized_pnl == pytest.approx(realized)
+
+
+def test_rank_strategies_pick_winners_and_losers():
+    history = np.array([[100.0, 100.0, 100.0], [90.0, 120.0, 105.0]])
+    assert momentum(lookback=1, top=1)(history).tolist() == [0.0, 1.0, 0.0]
+    assert mean_reversion(lookback=1, top=1)(history).tolist() == [1.0, 0.0, 0.0]
+    assert momentum(lookback=5)(history) is None
+
+
+def test_every_limits_strategy_calls():
+    calls = []
+
+    def strategy(history):
+        calls.append(len(history))
+        return None
+
+    run_backtest(np.ones((10, 2)), strategy, every=4)
+    assert calls == [1, 5, 9]
+
+
+def test_stats():
+    prices = np.array([[100.0], [120.0], [90.0], [150.0]])
+    stats = run_backtest(prices, buy_and_hold(), cash=1000.0).stats()
+    assert stats["total_return"] == pytest.approx(0.5)
+    assert stats["max_drawdown"] == pytest.approx(0.25)
+    assert stats["trades"] == 1
+
+
+def test_recorded_prices_resample_and_forward_fill(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text(
+        "timestamp,ticker,price\n"
+        "0,AAPL,100.0\n"
+        "30,AAPL,101.0\n"
+        "45,MSFT,400.0\n"
+        "130,MSFT,410.0\n"
+        "200,AAPL,105.0\n"
+    )
+    tickers, prices = recorded_prices(path, interval=60)
+    assert tickers == ["AAPL", "MSFT"]
+    assert prices.tolist() == [
+        [101.0, 400.0],
+        [101.0, 400.0],
+        [101.0, 410.0],
+        [105.0, 410.0],
+    ]
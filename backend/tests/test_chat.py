@@ -4,10 +4,12 @@ import os
 
 os.environ["LLM_MOCK"] = "true"
 
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 
 from app.main import app
+from app.market.cache import price_cache
 
 
 @pytest_asyncio.fixture
@@ -24,6 +26,14 @@ async def client(tmp_path):
         yield c
 
 
+@pytest.fixture(autouse=True)
+def seed_prices():
+    """Chat trades fill at the cached price."""
+    price_cache.update_many({"AAPL": 150.0, "TSLA": 150.0})
+    yield
+    price_cache.clear()
+
+
 async def test_health(client):
     resp = await client.get("/api/health")
     assert resp.status_code == 200
@@ -40,7 +50,7 @@ async def test_chat_greeting(client):
 
 
 async def test_chat_buy_aapl(client):
-    """Mock buy always buys 10 shares of the matched ticker at $150."""
+    """Mock buy always buys 10 shares of the matched ticker, here at $150."""
     resp = await client.post("/api/chat", json={"message": "buy some AAPL"})
     assert resp.status_code == 200
     data = resp.json()
@@ -77,6 +87,18 @@ async def test_chat_buy_then_sell(client):
     assert "Insufficient" not in data["message"]
 
 
+async def test_chat_sell_goes_through_lot_ledger(client):
+    await client.post("/api/chat", json={"message": "buy some TSLA"})
+    price_cache.update("TSLA", 160.0)
+    await client.post("/api/chat", json={"message": "sell some TSLA"})
+
+    pnl = (await client.get("/api/portfolio/pnl")).json()
+    assert pnl["realized_pnl"] == 100.0  # 10 shares bought at 150, sold at 160
+    portfolio = (await client.get("/api/portfolio")).json()
+    assert portfolio["positions"] == []
+    assert portfolio["cash_balance"] == 10100.0
+
+
 async def test_chat_buy_insufficient_cash(client):
     """Buying more than cash allows should fail. 10 * $150 = $1500, so
     need to exhaust cash first."""
@@ -105,6 +127,7 @@ async def test_chat_watchlist_remove(client):
     assert data["watchlist_changes"] is not None
     assert data["watchlist_changes"][0]["ticker"] == "NFLX"
     assert data["watchlist_changes"][0]["action"] == "remove"
+    assert "NFLX" not in price_cache.tickers
 
 
 async def test_chat_portfolio_query(client):
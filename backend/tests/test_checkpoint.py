@@ -0,0 +1,147 @@
+"""Tests for warm-restart market checkpoints."""
+
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from app.market.cache import PriceCache, price_cache
+from app.market import checkpoint
+from app.market.checkpoint import MarketCheckpointer, load_checkpoint, save_checkpoint
+from app.market.simulator import Simulator
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    yield
+    price_cache.clear()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    cache = PriceCache()
+    cache.update("AAPL", 150.0)
+    cache.update("AAPL", 151.5)
+    cache.update("MSFT", 420.0)
+    path = tmp_path / "state.npz"
+    save_checkpoint(path, cache.get_all(), {"seed": 1})
+    updates, state = load_checkpoint(path)
+    assert updates == list(cache.get_all())
+    assert state == {"seed": 1}
+    assert not (tmp_path / "state.npz.tmp").exists()
+
+
+def test_missing_or_corrupt_checkpoint_is_ignored(tmp_path):
+    assert load_checkpoint(tmp_path / "missing.npz") is None
+    bad = tmp_path / "bad.npz"
+    bad.write_bytes(b"not a zip")
+    assert load_checkpoint(bad) is None
+
+
+def test_cache_restore_keeps_quotes_and_skips_listeners():
+    source = PriceCache()
+    source.update("AAPL", 150.0)
+    source.update("AAPL", 149.0)
+    cache = PriceCache()
+    seen = []
+    cache.add_listener(lambda updates, ts: seen.append(updates))
+    generation = cache.generation
+    cache.restore(source.get_all())
+    quote = cache.get("AAPL")
+    assert (quote.price, quote.previous_price, quote.direction) == (149.0, 150.0, "down")
+    assert "AAPL" in cache.tickers
+    assert cache.generation > generation
+    assert seen == []
+
+
+def test_simulator_restore_continues_same_path():
+    original = Simulator(seed=3)
+    original.fast_forward(50)
+    state = original.checkpoint_state()
+    expected = original.fast_forward(20)
+
+    restarted = Simulator(seed=3)
+    restarted.restore_state(state)
+    np.testing.assert_array_equal(restarted.fast_forward(20), expected)
+
+
+def test_simulator_restore_with_new_seed_keeps_prices_only():
+    original = Simulator(seed=3)
+    original.fast_forward(50)
+    state = original.checkpoint_state()
+
+    reseeded = Simulator(seed=4)
+    reseeded.restore_state(state)
+    assert reseeded.checkpoint_state()["prices"] == state["prices"]
+    assert reseeded.checkpoint_state()["shock_rng"] != state["shock_rng"]
+
+
+async def test_checkpointer_restores_cache_and_simulator(tmp_path):
+    path = tmp_path / "state.npz"
+    sim = Simulator(seed=1)
+    sim.fast_forward(100)
+    price_cache.update_many(sim.checkpoint_state()["prices"])
+    MarketCheckpointer(path, sim).save()
+    price_cache.clear()
+
+    restarted = Simulator(seed=1)
+    assert MarketCheckpointer(path, restarted).restore() == len(sim.tickers)
+    assert restarted.checkpoint_state() == sim.checkpoint_state()
+    assert price_cache.get("AAPL").price == round(sim.checkpoint_state()["prices"]["AAPL"], 2)
+
+
+async def test_checkpointer_saves_periodically_and_on_stop(tmp_path):
+    path = tmp_path / "state.npz"
+    checkpointer = MarketCheckpointer(path, Simulator(seed=1), interval=0.01)
+    checkpointer.start()
+    price_cache.update("AAPL", 123.0)
+    for _ in range(100):
+        if path.exists():
+            break
+        await asyncio.sleep(0.01)
+    assert [u.price for u in load_checkpoint(path)[0]] == [123.0]
+
+    price_cache.update("AAPL", 124.0)
+    await checkpointer.stop()
+    assert [u.price for u in load_checkpoint(path)[0]] == [124.0]
+
+
+class _Reader(Simulator):
+    """A worker mirroring another worker's prices."""
+
+    @property
+    def is_producer(self) -> bool:
+        return False
+
+    def checkpoint_state(self) -> dict | None:
+        return None
+
+
+async def test_only_the_producer_writes_checkpoints(tmp_path):
+    path = tmp_path / "state.npz"
+    sim = Simulator(seed=1)
+    price_cache.update("AAPL", 123.0)
+    MarketCheckpointer(path, sim).save()
+
+    price_cache.update("AAPL", 124.0)
+    reader = MarketCheckpointer(path, _Reader(seed=1), interval=0.01)
+    reader.start()
+    await asyncio.sleep(0.05)
+    await reader.stop()
+    updates, state = load_checkpoint(path)
+    assert [u.price for u in updates] == [123.0]
+    assert state == sim.checkpoint_state()
+
+
+def test_temporary_file_is_unique_per_process(tmp_path, monkeypatch):
+    replaced = []
+    real_replace = os.replace
+
+    def replace(src, dst):
+        replaced.append(src)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(checkpoint.os, "replace", replace)
+    save_checkpoint(tmp_path / "state.npz", [], None)
+    assert replaced == [tmp_path / f"state.npz.{os.getpid()}.tmp"]
+    assert list(tmp_path.iterdir()) == [tmp_path / "state.npz"]
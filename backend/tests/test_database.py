@@ -1,9 +1,13 @@
 """Tests for database initialization and schema."""
 
+import os
+import sqlite3
+
 import pytest
 import aiosqlite
 
-from app.database import DB_PATH, DEFAULT_TICKERS, get_db, init_db
+import app.database as database
+from app.database import DEFAULT_TICKERS, get_db, init_db, iso_sql, iso_to_ms, ms_to_iso
 
 
 @pytest.mark.asyncio
@@ -15,9 +19,13 @@ async def test_schema_creates_all_tables(db):
         )
         tables = [row[0] for row in await cursor.fetchall()]
         expected = [
+            "alerts",
             "chat_messages",
+            "lots",
+            "orders",
             "portfolio_snapshots",
             "positions",
+            "realized_pnl",
             "trades",
             "users_profile",
             "watchlist",
@@ -104,12 +112,12 @@ async def test_trades_table_accepts_buy_and_sell(db):
     conn = await get_db()
     try:
         await conn.execute(
-            "INSERT INTO trades (id, user_id, ticker, side, quantity, price, executed_at) "
-            "VALUES ('t1', 'default', 'AAPL', 'buy', 10, 150.0, '2026-01-01T00:00:00Z')"
+            "INSERT INTO trades (user_id, ticker, side, quantity, price, executed_at) "
+            "VALUES ('default', 'AAPL', 'buy', 10, 150.0, 1767225600000)"
         )
         await conn.execute(
-            "INSERT INTO trades (id, user_id, ticker, side, quantity, price, executed_at) "
-            "VALUES ('t2', 'default', 'AAPL', 'sell', 5, 160.0, '2026-01-01T00:00:00Z')"
+            "INSERT INTO trades (user_id, ticker, side, quantity, price, executed_at) "
+            "VALUES ('default', 'AAPL', 'sell', 5, 160.0, 1767225600000)"
         )
         await conn.commit()
 
@@ -118,3 +126,91 @@ async def test_trades_table_accepts_buy_and_sell(db):
         assert row[0] == 2
     finally:
         await conn.close()
+
+
+LEGACY_SQL = """
+CREATE TABLE trades (
+    id TEXT PRIMARY KEY, user_id TEXT DEFAULT 'default', ticker TEXT, side TEXT,
+    quantity REAL, price REAL, executed_at TEXT
+);
+CREATE INDEX idx_trades_user_time ON trades (user_id, executed_at, id);
+CREATE TABLE portfolio_snapshots (
+    id TEXT PRIMARY KEY, user_id TEXT DEFAULT 'default', total_value REAL, recorded_at TEXT
+);
+CREATE TABLE chat_messages (
+    id TEXT PRIMARY KEY, user_id TEXT DEFAULT 'default', role TEXT, content TEXT,
+    actions TEXT, created_at TEXT
+);
+INSERT INTO trades VALUES
+    ('b', 'default', 'MSFT', 'sell', 1, 410.0, '2026-01-01T00:00:02.500000+00:00'),
+    ('a', 'default', 'AAPL', 'buy', 2, 150.0, '2026-01-01T00:00:01+00:00'),
+    ('c', 'default', 'TSLA', 'buy', 3, 250.0, 'garbage');
+INSERT INTO portfolio_snapshots VALUES
+    ('s2', 'default', 10100.0, '2026-01-01T01:00:00+01:00'),
+    ('s1', 'default', 10000.0, '2025-12-31T23:59:00Z'),
+    ('s3', 'default', 10200.0, 'not a time');
+INSERT INTO chat_messages VALUES
+    ('m1', 'default', 'user', 'hi', NULL, '2026-01-01T00:00:00+00:00'),
+    ('m2', 'default', 'assistant', 'hello', NULL, '2026-01-01T00:00:00+00:00');
+"""
+
+
+async def _migrate_legacy_db():
+    os.remove(database.DB_PATH)
+    legacy = sqlite3.connect(database.DB_PATH)
+    legacy.executescript(LEGACY_SQL)
+    legacy.close()
+    await init_db()
+
+
+@pytest.mark.asyncio
+async def test_init_db_migrates_text_time_series(db):
+    await _migrate_legacy_db()
+    await init_db()  # already migrated: no-op
+
+    conn = sqlite3.connect(database.DB_PATH)
+    try:
+        assert conn.execute("SELECT id, ticker, executed_at FROM trades ORDER BY id").fetchall() == [
+            (1, "AAPL", 1767225601000),
+            (2, "MSFT", 1767225602500),
+            (3, "TSLA", 1767225602500),  # unparseable: latest time before it
+        ]
+        assert conn.execute(
+            "SELECT total_value, recorded_at FROM portfolio_snapshots ORDER BY id"
+        ).fetchall() == [(10000.0, 1767225540000), (10100.0, 1767225600000), (10200.0, 1767225600000)]
+        assert conn.execute("SELECT id, role FROM chat_messages ORDER BY id").fetchall() == [
+            (1, "user"),
+            (2, "assistant"),
+        ]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_trades_user_time", "idx_snapshots_user_time", "idx_chat_user_time"} <= indexes
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert not any(t.endswith("_legacy") for t in tables)
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_blotter_and_history_after_migrating_bad_timestamps(client):
+    await _migrate_legacy_db()
+
+    page = (await client.get("/api/portfolio/trades", params={"limit": 2})).json()
+    assert [(t["ticker"], t["executed_at"]) for t in page["trades"]] == [
+        ("TSLA", "2026-01-01T00:00:02.500Z"),
+        ("MSFT", "2026-01-01T00:00:02.500Z"),
+    ]
+    rest = (await client.get("/api/portfolio/trades", params={"cursor": page["next_cursor"]})).json()
+    assert [t["ticker"] for t in rest["trades"]] == ["AAPL"]
+
+    history = (await client.get("/api/portfolio/history")).json()
+    assert [s["recorded_at"] for s in history][-2:] == ["2026-01-01T00:00:00.000Z"] * 2
+
+
+def test_timestamp_helpers():
+    ms = 1767225601234
+    assert ms_to_iso(ms) == "2026-01-01T00:00:01.234Z"
+    assert iso_to_ms(ms_to_iso(ms)) == ms
+    assert iso_to_ms("2026-01-01T01:00:01.234+01:00") == ms
+    assert iso_to_ms("2026-01-01T00:00:01.234") == ms  # naive is UTC
+    conn = sqlite3.connect(":memory:")
+    assert conn.execute(f"SELECT {iso_sql('?')}", (ms,)).fetchone()[0] == ms_to_iso(ms)
@@ -0,0 +1,188 @@
+"""Tests for the tick history ring buffer and OHLC bar endpoints."""
+
+import numpy as np
+import pytest
+
+from app.market.cache import PriceCache, price_cache
+from app.market.history import TickHistory, TickRing, aggregate_ohlc, downsample, tick_history
+
+
+def test_ring_keeps_ticks_in_order_before_wrap():
+    ring = TickRing(4)
+    for i in range(3):
+        ring.append(float(i), 100.0 + i)
+    ts, px = ring.series()
+    assert ts.tolist() == [0.0, 1.0, 2.0]
+    assert px.tolist() == [100.0, 101.0, 102.0]
+
+
+def test_ring_overwrites_oldest_when_full():
+    ring = TickRing(3)
+    for i in range(5):
+        ring.append(float(i), float(i))
+    ts, _ = ring.series()
+    assert len(ring) == 3
+    assert ts.tolist() == [2.0, 3.0, 4.0]
+
+
+def test_ring_series_since():
+    ring = TickRing(10)
+    for i in range(6):
+        ring.append(float(i), float(i))
+    ts, _ = ring.series(since=3.5)
+    assert ts.tolist() == [4.0, 5.0]
+
+
+def test_aggregate_ohlc():
+    ts = np.array([0.0, 10.0, 59.0, 60.0, 61.0, 130.0])
+    px = np.array([10.0, 12.0, 9.0, 11.0, 13.0, 8.0])
+    bars = aggregate_ohlc(ts, px, 60)
+    assert bars["time"].tolist() == [0, 60, 120]
+    assert bars["open"].tolist() == [10.0, 11.0, 8.0]
+    assert bars["high"].tolist() == [12.0, 13.0, 8.0]
+    assert bars["low"].tolist() == [9.0, 11.0, 8.0]
+    assert bars["close"].tolist() == [9.0, 13.0, 8.0]
+    assert bars["ticks"].tolist() == [3, 2, 1]
+
+
+def test_downsample_keeps_endpoints():
+    ts = np.arange(100.0)
+    out_ts, out_px = downsample(ts, ts * 2, 5)
+    assert out_ts.tolist() == [0.0, 25.0, 50.0, 74.0, 99.0]
+    assert out_px.tolist() == [0.0, 50.0, 100.0, 148.0, 198.0]
+    assert downsample(ts[:3], ts[:3], 5)[0].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_history_records_cache_updates():
+    cache = PriceCache()
+    history = TickHistory(capacity=8)
+    cache.add_listener(history.record)
+    cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    cache.update("AAPL", 151.0)
+    _, px = history.series("AAPL")
+    assert px.tolist() == [150.0, 151.0]
+    assert history.series("ZZZZ") is None
+
+
+@pytest.fixture
+def seeded_history():
+    for i, price in enumerate([100.0, 105.0, 95.0, 101.0]):
+        tick_history._rings.setdefault("AAPL", TickRing(16)).append(60.0 * (i // 2) + i, price)
+    yield
+    tick_history.clear()
+
+
+@pytest.mark.asyncio
+async def test_bars_endpoint(client, seeded_history):
+    resp = await client.get("/api/prices/AAPL/bars?interval=1m")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["ticker"] == "AAPL"
+    assert [b["open"] for b in data["bars"]] == [100.0, 95.0]
+    assert [b["high"] for b in data["bars"]] == [105.0, 101.0]
+    assert [b["close"] for b in data["bars"]] == [105.0, 101.0]
+
+
+@pytest.mark.asyncio
+async def test_bars_endpoint_unknown_ticker(client, seeded_history):
+    resp = await client.get("/api/prices/ZZZZ/bars")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bars_endpoint_invalid_interval(client, seeded_history):
+    resp = await client.get("/api/prices/AAPL/bars?interval=soon")
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_bars_endpoint(client, seeded_history):
+    resp = await client.get("/api/prices/bars?interval=1h")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [d["ticker"] for d in data] == ["AAPL"]
+    assert len(data[0]["bars"]) == 1
+    assert data[0]["bars"][0]["ticks"] == 4
+
+
+@pytest.mark.asyncio
+async def test_bulk_bars_default_to_the_watchlist(client, seeded_history):
+    tick_history._rings.setdefault("ZZZZ", TickRing(16)).append(0.0, 1.0)
+    resp = await client.get("/api/prices/bars?interval=1h")
+    assert [d["ticker"] for d in resp.json()] == ["AAPL"]
+    resp = await client.get("/api/prices/bars?interval=1h&tickers=ZZZZ")
+    assert [d["ticker"] for d in resp.json()] == ["ZZZZ"]
+
+
+@pytest.mark.asyncio
+async def test_removed_tickers_drop_their_history(client, streamed_prices):
+    assert (await client.delete("/api/watchlist/MSFT")).status_code == 200
+    assert tick_history.series("MSFT") is None
+    # Still priced while hidden, but no longer recorded
+    price_cache.update_many({"AAPL": 120.0, "MSFT": 380.0})
+    assert tick_history.series("MSFT") is None
+    assert price_cache.get("MSFT").price == 380.0
+    assert "MSFT" not in tick_history.tickers()
+
+    assert (await client.post("/api/watchlist", json={"ticker": "MSFT"})).status_code in (200, 201)
+    price_cache.update("MSFT", 381.0)
+    assert tick_history.series("MSFT")[1].tolist() == [381.0]
+
+
+@pytest.fixture
+def streamed_prices():
+    price_cache.add_listener(tick_history.record)
+    for i in range(10):
+        price_cache.update_many({"AAPL": 100.0 + i, "MSFT": 400.0 - i})
+    yield
+    price_cache.remove_listener(tick_history.record)
+    price_cache.clear()
+    tick_history.clear()
+
+
+@pytest.mark.asyncio
+async def test_prices_endpoint_columnar(client, streamed_prices):
+    resp = await client.get("/api/prices?tickers=msft,AAPL,ZZZZ&points=4")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["tickers"] == ["AAPL", "MSFT"]
+    assert data["price"] == [109.0, 391.0]
+    assert data["previous_price"] == [108.0, 392.0]
+    assert data["direction"] == ["up", "down"]
+    assert data["series_price"][0] == [100.0, 103.0, 106.0, 109.0]
+    assert len(data["series_time"][1]) == 4
+
+
+@pytest.mark.asyncio
+async def test_prices_endpoint_etag(client, streamed_prices):
+    resp = await client.get("/api/prices?tickers=AAPL")
+    etag = resp.headers["etag"]
+    resp = await client.get("/api/prices?tickers=AAPL", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    # Other tickers ticking leaves the ETag alone
+    price_cache.update("MSFT", 1.0)
+    resp = await client.get("/api/prices?tickers=AAPL", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    price_cache.update("AAPL", 1.0)
+    resp = await client.get("/api/prices?tickers=AAPL", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert resp.json()["series_price"][0][-1] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_prices_etag_follows_returned_tickers(client, streamed_prices):
+    resp = await client.get("/api/prices")
+    assert resp.json()["tickers"] == ["AAPL", "MSFT"]
+    etag = resp.headers["etag"]
+
+    price_cache.remove_ticker("MSFT")
+    resp = await client.get("/api/prices", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["tickers"] == ["AAPL"]
+
+    # Unpriced tickers add nothing to the body, so they leave the ETag alone
+    only = (await client.get("/api/prices?tickers=AAPL")).headers["etag"]
+    assert (await client.get("/api/prices?tickers=AAPL,ZZZZ")).headers["etag"] == only
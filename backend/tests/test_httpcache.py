@@ -0,0 +1,138 @@
+"""Tests for version-keyed response caching, ETags and single flight."""
+
+import asyncio
+
+import pytest
+
+from app.httpcache import ResponseCache
+from app.market.cache import price_cache
+from app.snapshots import SnapshotRecorder
+
+
+@pytest.fixture
+def prices():
+    price_cache.update("AAPL", 100.0)
+    yield
+    price_cache.clear()
+
+
+async def test_cache_rebuilds_only_when_versions_move():
+    version = [0]
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"n": len(builds)}
+
+    cache = ResponseCache("test", dict, strict=lambda: version[0], ttl=0)
+    first = await cache.get(build)
+    assert (await cache.get(build)) is first
+    version[0] += 1
+    assert (await cache.get(build)).body == b'{"n":2}'
+    assert len(builds) == 2
+
+
+async def test_cache_rebuilds_every_request_with_shared_prices(monkeypatch):
+    # Other workers' writes don't move this process's versions
+    monkeypatch.setenv("SHARED_PRICES", "true")
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"n": len(builds)}
+
+    cache = ResponseCache("test", dict, strict=lambda: 0, ttl=60)
+    assert (await cache.get(build)).body == b'{"n":1}'
+    assert (await cache.get(build)).body == b'{"n":2}'
+    assert cache._entry is None
+
+
+async def test_loose_versions_tolerated_within_ttl():
+    generation = [0]
+
+    async def build():
+        return generation[0]
+
+    cache = ResponseCache("test", int, strict=lambda: 0, loose=lambda: generation[0], ttl=60)
+    await cache.get(build)
+    generation[0] += 1
+    assert (await cache.get(build)).body == b"0"
+    cache.ttl = 0
+    assert (await cache.get(build)).body == b"1"
+
+
+async def test_concurrent_misses_share_one_build():
+    builds = 0
+    gate = asyncio.Event()
+
+    async def build():
+        nonlocal builds
+        builds += 1
+        await gate.wait()
+        return [1, 2, 3]
+
+    cache = ResponseCache("test", list[int], strict=lambda: 0, ttl=0)
+    tasks = [asyncio.create_task(cache.get(build)) for _ in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+    entries = await asyncio.gather(*tasks)
+    assert builds == 1
+    assert all(e is entries[0] for e in entries)
+
+
+async def test_build_errors_reach_every_waiter():
+    gate = asyncio.Event()
+
+    async def build():
+        await gate.wait()
+        raise RuntimeError("boom")
+
+    cache = ResponseCache("test", int, strict=lambda: 0, ttl=0)
+    tasks = [asyncio.create_task(cache.get(build)) for _ in range(3)]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert not cache._inflight
+
+
+async def test_portfolio_etag_and_invalidation(client, prices):
+    resp = await client.get("/api/portfolio")
+    etag = resp.headers["etag"]
+    resp = await client.get("/api/portfolio", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+    await client.post("/api/portfolio/trade", json={"ticker": "AAPL", "quantity": 1, "side": "buy"})
+    resp = await client.get("/api/portfolio", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["positions"][0]["ticker"] == "AAPL"
+
+    # A price move revalues the holding
+    etag = resp.headers["etag"]
+    price_cache.update("AAPL", 110.0)
+    resp = await client.get("/api/portfolio", headers={"If-None-Match": etag})
+    assert resp.json()["positions"][0]["current_price"] == 110.0
+
+
+async def test_watchlist_invalidated_by_add_and_remove(client):
+    resp = await client.get("/api/watchlist")
+    etag = resp.headers["etag"]
+    await client.post("/api/watchlist", json={"ticker": "PYPL"})
+    resp = await client.get("/api/watchlist", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert "PYPL" in [item["ticker"] for item in resp.json()]
+
+    etag = resp.headers["etag"]
+    await client.delete("/api/watchlist/PYPL")
+    resp = await client.get("/api/watchlist", headers={"If-None-Match": etag})
+    assert "PYPL" not in [item["ticker"] for item in resp.json()]
+
+
+async def test_history_invalidated_by_snapshot(client, prices):
+    resp = await client.get("/api/portfolio/history")
+    assert resp.json() == []
+    assert await SnapshotRecorder().check()
+    resp = await client.get("/api/portfolio/history", headers={"If-None-Match": resp.headers["etag"]})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 1
@@ -0,0 +1,44 @@
+"""Import-time benchmark: app.main must stay cheap to import."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Generous ceiling for `import app.main` on a slow CI box; LiteLLM alone
+# takes several seconds, so pulling it back in trips this.
+IMPORT_BUDGET_SECONDS = 2.0
+
+# Modules that must only load on first use
+LAZY_MODULES = ("litellm", "openai", "tiktoken", "pyarrow")
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Return {module: cumulative microseconds} from ``python -X importtime``."""
+    env = dict(os.environ, LLM_MOCK="true")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_app_main_import_is_fast_and_skips_heavy_modules():
+    timings = _importtime("app.main")
+    loaded = {name.split(".")[0] for name in timings}
+    for module in LAZY_MODULES:
+        assert module not in loaded, f"{module} is imported eagerly by app.main"
+    seconds = timings["app.main"] / 1e6
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import app.main took {seconds:.2f}s"
@@ -0,0 +1,99 @@
+"""Tests for the lot ledger and realized P&L."""
+
+import sqlite3
+
+import pytest
+
+import app.database as database
+from app.market.cache import price_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_prices():
+    yield
+    price_cache.clear()
+
+
+async def _trade(client, side, qty, price, ticker="AAPL"):
+    price_cache.update(ticker, price)
+    resp = await client.post(
+        "/api/portfolio/trade", json={"ticker": ticker, "quantity": qty, "side": side}
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+async def _two_lots_then_sell(client):
+    await _trade(client, "buy", 10, 100.0)
+    await _trade(client, "buy", 10, 120.0)
+    return await _trade(client, "sell", 15, 130.0)
+
+
+async def test_fifo_realized_and_remaining_cost(client, monkeypatch):
+    monkeypatch.setenv("COST_BASIS_METHOD", "fifo")
+    sell = await _two_lots_then_sell(client)
+    # 15 @ 130 against 10 @ 100 + 5 @ 120
+    assert sell["realized_pnl"] == 350.0
+
+    position = (await client.get("/api/portfolio")).json()["positions"][0]
+    assert position["quantity"] == 5
+    assert position["avg_cost"] == 120.0
+
+    conn = sqlite3.connect(database.DB_PATH)
+    lots = conn.execute("SELECT quantity, cost FROM lots").fetchall()
+    conn.close()
+    assert lots == [(5.0, 120.0)]
+
+
+async def test_average_cost_realized(client, monkeypatch):
+    monkeypatch.setenv("COST_BASIS_METHOD", "average")
+    sell = await _two_lots_then_sell(client)
+    assert sell["realized_pnl"] == 300.0
+    position = (await client.get("/api/portfolio")).json()["positions"][0]
+    assert position["avg_cost"] == 110.0
+
+
+async def test_pnl_endpoint_accumulates_per_ticker(client):
+    await _two_lots_then_sell(client)
+    await _trade(client, "sell", 5, 110.0)  # closes AAPL at a 50 loss
+    await _trade(client, "buy", 2, 50.0, ticker="TSLA")
+    price_cache.update("TSLA", 60.0)
+
+    pnl = (await client.get("/api/portfolio/pnl")).json()
+    assert pnl["method"] == "fifo"
+    assert pnl["realized_pnl"] == 300.0
+    assert pnl["unrealized_pnl"] == 20.0
+    assert pnl["tickers"] == [
+        {"ticker": "AAPL", "quantity": 0.0, "realized_pnl": 300.0, "unrealized_pnl": 0.0},
+        {"ticker": "TSLA", "quantity": 2.0, "realized_pnl": 0.0, "unrealized_pnl": 20.0},
+    ]
+
+
+async def test_untracked_shares_use_average_cost(client):
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.execute(
+        "INSERT INTO positions (id, user_id, ticker, quantity, avg_cost, updated_at) "
+        "VALUES ('p', 'default', 'AAPL', 10, 90.0, '')"
+    )
+    conn.commit()
+    conn.close()
+    sell = await _trade(client, "sell", 4, 100.0)
+    assert sell["realized_pnl"] == 40.0
+
+
+async def test_untracked_shares_are_sold_first(client, monkeypatch):
+    monkeypatch.setenv("COST_BASIS_METHOD", "fifo")
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.execute(
+        "INSERT INTO positions (id, user_id, ticker, quantity, avg_cost, updated_at) "
+        "VALUES ('p', 'default', 'AAPL', 10, 100.0, '')"
+    )
+    conn.commit()
+    conn.close()
+    await _trade(client, "buy", 10, 200.0)
+    sell = await _trade(client, "sell", 10, 200.0)
+    assert sell["realized_pnl"] == 1000.0
+
+    position = (await client.get("/api/portfolio")).json()["positions"][0]
+    assert position["quantity"] == 10
+    assert position["avg_cost"] == 200.0
@@ -0,0 +1,43 @@
+"""Tests for the bundled load generator."""
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.loadgen import LoadConfig, parse_mix, parse_sse_price, percentiles, run_load, summarize
+from app.main import app
+from app.market.cache import price_cache
+
+
+def test_parse_mix():
+    assert parse_mix("portfolio=5,trade=1") == {"portfolio": 5, "trade": 1}
+    with pytest.raises(ValueError):
+        parse_mix("delete=1")
+
+
+def test_parse_sse_price():
+    line = 'data: {"ticker": "AAPL", "price": 1.0, "timestamp": "2026-01-01T00:00:00+00:00"}'
+    assert parse_sse_price(line) == ("AAPL", "2026-01-01T00:00:00+00:00")
+    assert parse_sse_price("event: price") is None
+    assert parse_sse_price("data: not json") is None
+
+
+def test_percentiles():
+    stats = percentiles([0.001 * i for i in range(1, 101)])
+    assert stats["p50_ms"] == pytest.approx(50.5)
+    assert stats["max_ms"] == pytest.approx(100.0)
+    assert percentiles([]) == {}
+
+
+async def test_run_load_against_app(db):
+    price_cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    config = LoadConfig(streams=0, workers=2, duration=0.3, mix={"portfolio": 1, "watchlist": 1})
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            stats = await run_load(client, config)
+    finally:
+        price_cache.clear()
+    summary = summarize(stats)
+    assert summary["requests"] > 0
+    assert summary["errors"] == 0
+    assert set(summary["by_kind"]) <= {"portfolio", "watchlist"}
+    assert summary["server_rss_mb"]["after"] > 0
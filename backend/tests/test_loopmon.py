@@ -0,0 +1,52 @@
+"""Tests for the event-loop lag monitor and slow-callback detector."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.loopmon import LoopMonitor
+
+
+def _blocking_handler():
+    time.sleep(0.25)
+
+
+async def test_lag_samples_are_recorded():
+    monitor = LoopMonitor(threshold=1.0, interval=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+    stats = monitor.lag_percentiles()
+    assert stats["samples"] > 0
+    assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert len(monitor.stalls) == 0
+
+
+async def test_stall_reports_blocking_stack():
+    monitor = LoopMonitor(threshold=0.05, interval=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _blocking_handler()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+    assert len(monitor.stalls) == 1
+    report = monitor.stalls[0]
+    assert report["blocked_ms"] >= 50
+    assert "test_stall_reports_blocking_stack" in (report["coroutine"] or "")
+    assert any("_blocking_handler" in line for line in report["stack"])
+
+
+def test_percentiles_empty():
+    assert LoopMonitor(threshold=0.1).lag_percentiles() == {"samples": 0}
+
+
+@pytest.mark.asyncio
+async def test_loop_endpoint_disabled_by_default(client):
+    resp = await client.get("/api/debug/loop")
+    assert resp.status_code == 200
+    assert resp.json() == {"enabled": False}
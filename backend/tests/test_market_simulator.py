@@ -99,3 +99,48 @@ def test_simulator_price_floor():
     sim._step()
     for ticker in sim._prices:
         assert sim._prices[ticker] >= 0.01
+
+
+def test_same_seed_replays_same_path():
+    a = Simulator(seed=42)
+    b = Simulator(seed=42)
+    for _ in range(5):
+        a._step()
+        b._step()
+    assert a._prices == b._prices
+
+
+def test_different_seeds_diverge():
+    a = Simulator(seed=1)
+    b = Simulator(seed=2)
+    a._step()
+    b._step()
+    assert a._prices != b._prices
+
+
+def test_fast_forward_shape_and_final_state():
+    sim = Simulator(seed=7)
+    path = sim.fast_forward(1000)
+    assert path.shape == (1000, len(TICKER_CONFIG))
+    assert (path >= 0.01).all()
+    assert [sim._prices[t] for t in sim.tickers] == path[-1].tolist()
+
+
+def test_fast_forward_matches_stepping():
+    """A vectorized fast-forward follows the same path as individual steps."""
+    stepped = Simulator(seed=123)
+    rows = []
+    for _ in range(50):
+        stepped._step()
+        rows.append([stepped._prices[t] for t in stepped.tickers])
+
+    path = Simulator(seed=123).fast_forward(50)
+    np.testing.assert_allclose(path, np.array(rows), rtol=1e-12)
+
+
+def test_fast_forward_respects_price_floor():
+    sim = Simulator(seed=3)
+    for ticker in sim._prices:
+        sim._prices[ticker] = 0.0100001
+    path = sim.fast_forward(200)
+    assert (path >= 0.01).all()
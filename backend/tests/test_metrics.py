@@ -0,0 +1,139 @@
+"""Tests for the in-process metrics registry and /metrics endpoint."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.database import get_db
+from app.market.cache import price_cache
+from app.market.simulator import Simulator
+from app.market.stream import _price_event_generator
+from app.metrics import (
+    DB_QUERY_SECONDS,
+    PRICE_UPDATES,
+    SIMULATOR_STEP_SECONDS,
+    SSE_PASS_SECONDS,
+    Counter,
+    Gauge,
+    Histogram,
+    _registry,
+)
+
+
+@pytest.fixture
+def local_metrics():
+    """Metrics created in a test are dropped from the global registry afterwards."""
+    before = list(_registry)
+    yield
+    _registry[:] = before
+
+
+def test_counter_and_gauge(local_metrics):
+    c = Counter("test_total", "help", ("kind",))
+    c.inc(1, "a")
+    c.inc(2, "a")
+    assert c.value("a") == 3
+    g = Gauge("test_gauge", "help")
+    g.inc()
+    g.inc()
+    g.dec()
+    assert g.value() == 1
+    assert 'test_total{kind="a"} 3.0' in c.render()
+
+
+def test_histogram_buckets_are_cumulative(local_metrics):
+    h = Histogram("test_seconds", "help", buckets=(0.1, 1.0))
+    h.observe(0.05)
+    h.observe(0.5)
+    h.observe(5.0)
+    lines = h.render()
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_count 3" in lines
+    assert h.count() == 3
+
+
+def test_simulator_step_is_instrumented():
+    before_steps = SIMULATOR_STEP_SECONDS.count()
+    before_updates = PRICE_UPDATES.value()
+    sim = Simulator(seed=1)
+    sim._step()
+    assert SIMULATOR_STEP_SECONDS.count() == before_steps + 1
+    assert PRICE_UPDATES.value() == before_updates + len(sim.tickers)
+
+
+def test_function_backed_counter(local_metrics):
+    c = Counter("test_fn_total", "help")
+    c.set_function(lambda: 42)
+    assert c.render()[-1] == "test_fn_total 42.0"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    await client.get("/api/portfolio")
+    resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/portfolio"}' in body
+    assert 'db_query_seconds_count{route="/api/portfolio"}' in body
+
+
+@pytest.mark.asyncio
+async def test_timed_connection_keeps_context_manager_form(db):
+    before = DB_QUERY_SECONDS.count("background")
+    conn = await get_db()
+    try:
+        async with conn.execute("SELECT cash_balance FROM users_profile") as cursor:
+            assert (await cursor.fetchone())[0] == 10000.0
+    finally:
+        await conn.close()
+    assert DB_QUERY_SECONDS.count("background") == before + 2  # journal_mode pragma and the select
+
+
+@pytest.mark.asyncio
+async def test_sse_pass_time_includes_a_slow_client():
+    price_cache.clear()
+    price_cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    before = SSE_PASS_SECONDS.count()
+    events = _price_event_generator()
+    try:
+        await anext(events)
+        await asyncio.sleep(0.05)  # the client is slow to take the next event
+        await anext(events)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(events), 0.05)  # pass done, now pacing
+    finally:
+        await events.aclose()
+        price_cache.clear()
+    assert SSE_PASS_SECONDS.count() == before + 1
+    assert SSE_PASS_SECONDS._series[()].sum >= 0.05
+
+
+def _best_per_call(fn, calls: int, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def test_step_instrumentation_overhead_below_one_percent(local_metrics):
+    """Benchmark: the metric calls made per simulator step cost <1% of the step."""
+    sim = Simulator(seed=1)
+    step = _best_per_call(sim._step, 500)
+
+    h = Histogram("bench_seconds", "help")
+    perf_counter = time.perf_counter
+
+    def instrumentation():
+        start = perf_counter()
+        h.observe(perf_counter() - start)
+
+    overhead = _best_per_call(instrumentation, 5000)
+    assert overhead / step < 0.01, f"{overhead * 1e6:.2f}us per {step * 1e6:.1f}us step"
@@ -0,0 +1,183 @@
+"""Tests for resting limit/stop orders and the trigger engine."""
+
+import asyncio
+
+import pytest
+
+from app.market.cache import price_cache
+from app.orders import OrderEngine, RestingOrder, order_engine
+
+
+def _order(order_id, side, order_type, trigger, ticker="AAPL", qty=1.0):
+    return RestingOrder(order_id, ticker, side, order_type, qty, trigger)
+
+
+def _tick(engine, ticker, price):
+    price_cache.update(ticker, price)
+    engine.on_prices([price_cache.get(ticker)], 0.0)
+    return sorted(o.id for o, _ in engine.take_pending())
+
+
+@pytest.fixture(autouse=True)
+def seed_prices():
+    price_cache.update("AAPL", 150.0)
+    yield
+    price_cache.clear()
+
+
+def test_trigger_directions():
+    engine = OrderEngine()
+    engine.add(_order("buy-limit", "buy", "limit", 145.0))
+    engine.add(_order("sell-stop", "sell", "stop", 140.0))
+    engine.add(_order("sell-limit", "sell", "limit", 155.0))
+    engine.add(_order("buy-stop", "buy", "stop", 160.0))
+
+    assert _tick(engine, "AAPL", 150.0) == []
+    assert _tick(engine, "AAPL", 145.0) == ["buy-limit"]
+    assert _tick(engine, "AAPL", 139.0) == ["sell-stop"]
+    assert _tick(engine, "AAPL", 161.0) == ["buy-stop", "sell-limit"]
+    assert len(engine) == 0
+
+
+def test_only_crossed_orders_fire():
+    engine = OrderEngine()
+    for i in range(100):
+        engine.add(_order(f"o{i}", "buy", "limit", 100.0 + i))
+    fired = _tick(engine, "AAPL", 189.5)
+    assert fired == sorted(f"o{i}" for i in range(90, 100))
+    assert len(engine) == 90
+
+
+def test_cancel_removes_from_book():
+    engine = OrderEngine()
+    engine.add(_order("a", "buy", "limit", 145.0))
+    engine.add(_order("b", "buy", "limit", 145.0))
+    assert engine.cancel("a")
+    assert not engine.cancel("a")
+    assert _tick(engine, "AAPL", 140.0) == ["b"]
+
+
+def test_other_tickers_ignored():
+    engine = OrderEngine()
+    engine.add(_order("a", "buy", "limit", 500.0, ticker="MSFT"))
+    assert _tick(engine, "AAPL", 100.0) == []
+    assert len(engine) == 1
+
+
+@pytest.fixture
+async def engine(db):
+    await order_engine.start()
+    yield order_engine
+    await order_engine.stop()
+
+
+async def _wait_for_status(client, status):
+    for _ in range(50):
+        orders = (await client.get("/api/orders")).json()
+        if orders and orders[0]["status"] == status:
+            return orders[0]
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"order never reached {status}: {orders}")
+
+
+async def test_limit_buy_fills_on_cross(client, engine):
+    resp = await client.post(
+        "/api/orders",
+        json={"ticker": "aapl", "side": "buy", "order_type": "limit", "quantity": 2, "trigger_price": 140},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "open"
+
+    price_cache.update("AAPL", 145.0)
+    await asyncio.sleep(0.02)
+    assert (await client.get("/api/orders?status=open")).json()[0]["ticker"] == "AAPL"
+
+    price_cache.update("AAPL", 139.5)
+    order = await _wait_for_status(client, "filled")
+    assert order["fill_price"] == 139.5
+
+    portfolio = (await client.get("/api/portfolio")).json()
+    assert portfolio["cash_balance"] == 10000.0 - 2 * 139.5
+    assert portfolio["positions"][0]["quantity"] == 2
+
+
+async def test_stop_sell_without_shares_is_rejected(client, engine):
+    await client.post(
+        "/api/orders",
+        json={"ticker": "AAPL", "side": "sell", "order_type": "stop", "quantity": 1, "trigger_price": 149},
+    )
+    price_cache.update("AAPL", 148.0)
+    order = await _wait_for_status(client, "rejected")
+    assert "Insufficient shares" in order["detail"]
+
+
+async def test_cancel_order(client, engine):
+    resp = await client.post(
+        "/api/orders",
+        json={"ticker": "AAPL", "side": "buy", "order_type": "limit", "quantity": 1, "trigger_price": 140},
+    )
+    order_id = resp.json()["id"]
+    resp = await client.delete(f"/api/orders/{order_id}")
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "cancelled"
+    assert len(engine) == 0
+    assert (await client.delete(f"/api/orders/{order_id}")).status_code == 404
+
+
+async def test_open_orders_reloaded_on_start(client, engine):
+    await client.post(
+        "/api/orders",
+        json={"ticker": "AAPL", "side": "buy", "order_type": "stop", "quantity": 1, "trigger_price": 160},
+    )
+    await engine.stop()
+    assert len(engine) == 0
+    await engine.start()
+    assert len(engine) == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"side": "hold", "order_type": "limit", "quantity": 1, "trigger_price": 1},
+        {"side": "buy", "order_type": "market", "quantity": 1, "trigger_price": 1},
+        {"side": "buy", "order_type": "limit", "quantity": 0, "trigger_price": 1},
+        {"side": "buy", "order_type": "limit", "quantity": 1, "trigger_price": 0},
+        {"ticker": "ZZZZ", "side": "buy", "order_type": "limit", "quantity": 1, "trigger_price": 1},
+    ],
+)
+async def test_invalid_orders(client, payload):
+    resp = await client.post("/api/orders", json={"ticker": "AAPL", **payload})
+    assert resp.status_code == 400
+
+
+async def test_failed_fill_puts_order_back_on_book(client, engine, monkeypatch):
+    import sqlite3
+
+    import app.orders as orders
+
+    real_apply = orders.apply_trade
+    calls = 0
+
+    async def flaky_apply(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return await real_apply(*args)
+
+    monkeypatch.setattr(orders, "apply_trade", flaky_apply)
+    await client.post(
+        "/api/orders",
+        json={"ticker": "AAPL", "side": "buy", "order_type": "limit", "quantity": 1, "trigger_price": 140},
+    )
+    price_cache.update("AAPL", 139.0)
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if calls and len(engine) == 1:
+            break
+    assert len(engine) == 1
+    assert (await client.get("/api/orders")).json()[0]["status"] == "open"
+
+    price_cache.update("AAPL", 138.0)
+    order = await _wait_for_status(client, "filled")
+    assert order["fill_price"] == 138.0
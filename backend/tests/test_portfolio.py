@@ -3,6 +3,8 @@
 import pytest
 
 from app.market.cache import price_cache
+from app.portfolio import add_change_listener, remove_change_listener
+from app.snapshots import SnapshotRecorder
 
 
 @pytest.fixture(autouse=True)
@@ -13,7 +15,7 @@ def seed_prices():
     price_cache.update("TSLA", 250.0)
     yield
     # Clean up
-    price_cache._prices.clear()
+    price_cache.clear()
 
 
 @pytest.mark.asyncio
@@ -134,10 +136,17 @@ async def test_no_price_available(client):
 
 @pytest.mark.asyncio
 async def test_trade_creates_snapshot(client):
-    await client.post(
-        "/api/portfolio/trade",
-        json={"ticker": "AAPL", "quantity": 1, "side": "buy"},
-    )
+    recorder = SnapshotRecorder()
+    add_change_listener(recorder.on_portfolio_change)
+    try:
+        await recorder.check()  # baseline
+        await client.post(
+            "/api/portfolio/trade",
+            json={"ticker": "AAPL", "quantity": 1, "side": "buy"},
+        )
+        assert await recorder.check()
+    finally:
+        remove_change_listener(recorder.on_portfolio_change)
     resp = await client.get("/api/portfolio/history")
     assert resp.status_code == 200
     data = resp.json()
@@ -158,3 +167,18 @@ async def test_pnl_calculation(client):
     # Current price == avg_cost == 150, so PnL should be 0
     assert pos["unrealized_pnl"] == 0.0
     assert pos["pnl_percent"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_watchlist_remove_untracks_unless_held(client):
+    await client.post("/api/portfolio/trade", json={"ticker": "AAPL", "quantity": 1, "side": "buy"})
+    await client.post("/api/watchlist", json={"ticker": "TSLA"})
+
+    assert (await client.delete("/api/watchlist/AAPL")).status_code == 200
+    assert (await client.delete("/api/watchlist/TSLA")).status_code == 200
+    assert "AAPL" in price_cache.tickers  # still streamed for the position
+    assert "TSLA" not in price_cache.tickers
+
+    # Hidden from the stream, but still priced and tradable
+    resp = await client.post("/api/portfolio/trade", json={"ticker": "TSLA", "quantity": 1, "side": "buy"})
+    assert resp.status_code == 200
@@ -1,6 +1,7 @@
 """Tests for the in-memory price cache."""
 
 from app.market.cache import PriceCache
+from app.market.models import PriceUpdate
 
 
 def test_update_and_get():
@@ -46,3 +47,100 @@ def test_update_stores_timestamp():
     entry = cache.get("AAPL")
     assert entry.timestamp is not None
     assert len(entry.timestamp) > 0
+
+
+def test_update_many_shares_one_generation():
+    cache = PriceCache()
+    updates = cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    assert [u.ticker for u in updates] == ["AAPL", "MSFT"]
+    assert cache.generation == 1
+    assert updates[0].timestamp == updates[1].timestamp
+
+
+def test_update_many_tracks_direction():
+    cache = PriceCache()
+    cache.update_many([("AAPL", 150.0), ("MSFT", 420.0)])
+    cache.update_many([("AAPL", 151.0), ("MSFT", 419.0)])
+    assert cache.get("AAPL").direction == "up"
+    assert cache.get("MSFT").direction == "down"
+
+
+def test_get_many_omits_missing():
+    cache = PriceCache()
+    cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    quotes = cache.get_many(["AAPL", "ZZZZ"])
+    assert list(quotes) == ["AAPL"]
+    assert quotes["AAPL"].price == 150.0
+
+
+def test_per_ticker_versions():
+    cache = PriceCache()
+    assert cache.version("AAPL") == 0
+    cache.update("AAPL", 150.0)
+    cache.update("AAPL", 151.0)
+    cache.update("MSFT", 420.0)
+    assert cache.version("AAPL") == 2
+    assert cache.version("MSFT") == 1
+    assert cache.generation == 3
+
+
+def test_get_all_reuses_snapshot_until_next_write():
+    cache = PriceCache()
+    cache.update("AAPL", 150.0)
+    first = cache.get_all()
+    assert cache.get_all() is first
+    cache.update("AAPL", 151.0)
+    second = cache.get_all()
+    assert second is not first
+    assert second[0].price == 151.0
+
+
+def test_add_and_remove_ticker():
+    cache = PriceCache()
+    cache.add_ticker("PYPL")
+    assert "PYPL" in cache.tickers
+    assert cache.get("PYPL") is None
+
+    cache.update("PYPL", 60.0)
+    cache.remove_ticker("PYPL")
+    assert "PYPL" not in cache.tickers
+    assert cache.get("PYPL").price == 60.0  # still priced, just not streamed
+    assert cache.get_all() == ()
+
+
+def test_removed_tickers_stay_priced_but_hidden_until_added_again():
+    cache = PriceCache()
+    cache.update_many({"NFLX": 600.0, "AAPL": 150.0})
+    cache.remove_ticker("NFLX")
+    cache.update_many({"NFLX": 601.0, "AAPL": 151.0})
+    assert [u.ticker for u in cache.get_all()] == ["AAPL"]
+    assert cache.tickers == {"AAPL"}
+    assert cache.universe == {"AAPL", "NFLX"}
+    assert cache.get("NFLX").price == 601.0
+
+    cache.add_ticker("NFLX")
+    assert {u.ticker for u in cache.get_all()} == {"AAPL", "NFLX"}
+
+
+def test_clear_resets_versions_and_bumps_epoch():
+    cache = PriceCache()
+    cache.update("AAPL", 150.0)
+    epoch = cache.epoch
+    cache.clear()
+    assert cache.version("AAPL") == 0
+    assert cache.epoch == epoch + 1
+
+
+def test_publish_keeps_given_previous_price_and_timestamp():
+    cache = PriceCache()
+    cache.update("AAPL", 100.0)
+    seen = []
+    cache.add_listener(lambda updates, ts: seen.append((updates, ts)))
+    quote = PriceUpdate(
+        ticker="AAPL", price=151.0, previous_price=150.0,
+        timestamp="2026-01-01T00:00:00+00:00", direction="up",
+    )
+    cache.publish([quote], 1767225600.0)
+    assert cache.get("AAPL") == quote
+    assert cache.version("AAPL") == 2
+    assert seen == [([quote], 1767225600.0)]
@@ -0,0 +1,93 @@
+"""Tests for the Monte Carlo portfolio projection."""
+
+import numpy as np
+import pytest
+
+import app.projection as projection
+from app.market.cache import price_cache
+from app.projection import ProjectionRequest, gbm_params, project, simulate_values, summarize
+
+
+@pytest.fixture(autouse=True)
+def seed_prices():
+    price_cache.update_many({"AAPL": 190.0, "TSLA": 250.0})
+    yield
+    price_cache.clear()
+
+
+def test_simulate_values_matches_gbm_moments():
+    drift, vol, chol = gbm_params(["AAPL"])
+    values = simulate_values(
+        0.0, np.array([1.0]), np.array([100.0]), drift, vol, chol,
+        dt=1 / 252, steps=252, paths=20_000, seed=7,
+    )
+    assert values.shape == (20_000, 253)
+    assert (values[:, 0] == 100.0).all()
+    # E[S_T] = S_0 * exp(mu * T) for GBM
+    assert values[:, -1].mean() == pytest.approx(100.0 * np.exp(drift[0]), rel=0.01)
+
+
+def test_seeded_projection_is_reproducible():
+    drift, vol, chol = gbm_params(["AAPL", "TSLA"])
+    args = (500.0, np.array([1.0, 2.0]), np.array([190.0, 250.0]), drift, vol, chol, 0.01, 10, 100)
+    np.testing.assert_array_equal(simulate_values(*args, 3), simulate_values(*args, 3))
+
+
+def test_batches_fit_byte_budget_and_keep_results(monkeypatch):
+    m = projection.batch_paths(steps=2520, tickers=10)
+    assert 2 * m * 2520 * 10 * 8 <= projection.BATCH_BYTES
+    assert projection.batch_paths(steps=10**9, tickers=10) == 1
+
+    drift, vol, chol = gbm_params(["AAPL", "TSLA"])
+    args = (500.0, np.array([1.0, 2.0]), np.array([190.0, 250.0]), drift, vol, chol, 0.01, 10, 100)
+    whole = simulate_values(*args, 3)
+    monkeypatch.setattr(projection, "BATCH_BYTES", 2 * 7 * 10 * 2 * 8)  # 7 paths per batch
+    np.testing.assert_array_equal(simulate_values(*args, 3), whole)
+
+
+async def test_large_requests_use_process_pool(monkeypatch):
+    monkeypatch.setattr(projection, "INLINE_LIMIT", 100)
+    monkeypatch.setattr(projection, "CHUNK_PATHS", 50)
+    body = ProjectionRequest(steps=5, paths=120, seed=1, percentiles=[5, 50, 95])
+    try:
+        bands, mean = await project(0.0, np.array([1.0]), np.array([100.0]), ["AAPL"], body)
+        assert projection._pool is not None
+    finally:
+        projection.shutdown_projection_pool()
+
+    # Same chunks and seeds, summarized in one piece
+    drift, vol, chol = gbm_params(["AAPL"])
+    args = (0.0, np.array([1.0]), np.array([100.0]), drift, vol, chol, 30 / 252 / 5, 5)
+    children = np.random.SeedSequence(1).spawn(3)
+    values = np.vstack([simulate_values(*args, n, c) for n, c in zip([50, 50, 20], children)])
+    expected_bands, expected_mean = summarize(values, [5, 50, 95])
+    np.testing.assert_allclose(bands, expected_bands)
+    np.testing.assert_allclose(mean, expected_mean)
+
+
+async def test_projection_endpoint(client):
+    await client.post("/api/portfolio/trade", json={"ticker": "AAPL", "quantity": 10, "side": "buy"})
+    resp = await client.post(
+        "/api/portfolio/projection",
+        json={"horizon_days": 20, "steps": 4, "paths": 500, "seed": 1, "percentiles": [5, 50, 95]},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["start_value"] == 10000.0
+    assert data["days"] == [0.0, 5.0, 10.0, 15.0, 20.0]
+    low, mid, high = data["percentiles"]["5"], data["percentiles"]["50"], data["percentiles"]["95"]
+    assert low[0] == mid[0] == high[0] == 10000.0
+    assert all(lo <= m <= hi for lo, m, hi in zip(low, mid, high))
+    assert high[-1] > low[-1]
+
+
+async def test_all_cash_projection_is_flat(client):
+    resp = await client.post("/api/portfolio/projection", json={"steps": 3})
+    assert resp.json()["percentiles"]["50"] == [10000.0] * 4
+
+
+async def test_projection_validation(client):
+    resp = await client.post("/api/portfolio/projection", json={"steps": 2520, "paths": 200_000})
+    assert resp.status_code == 400
+    resp = await client.post("/api/portfolio/projection", json={"percentiles": [150]})
+    assert resp.status_code == 400
@@ -0,0 +1,91 @@
+"""Tests for target-weight rebalancing."""
+
+import numpy as np
+import pytest
+
+from app.market.cache import price_cache
+from app.rebalance import plan_rebalance
+
+
+@pytest.fixture(autouse=True)
+def seed_prices():
+    price_cache.update_many({"AAPL": 100.0, "MSFT": 400.0, "TSLA": 250.0})
+    yield
+    price_cache.clear()
+
+
+def test_plan_rebalance_whole_shares_fit_cash():
+    deltas = plan_rebalance(
+        cash=1000.0,
+        quantities=np.array([10.0, 0.0]),
+        prices=np.array([100.0, 300.0]),
+        weights=np.array([0.25, 0.75]),
+        step=1.0,
+    )
+    # total 2000: 5 x 100 = 500, floor(1500 / 300) = 5
+    assert deltas.tolist() == [-5.0, 5.0]
+
+
+def test_plan_rebalance_skips_dust():
+    deltas = plan_rebalance(0.0, np.array([1.0]), np.array([100.0]), np.array([1.0]))
+    assert deltas.tolist() == [0.0]
+
+
+def test_plan_rebalance_full_weight_buy_fits_cash():
+    # 7054.19 / 4 floors to 1763.5475 shares, which used to cost 7054.1900000000005
+    deltas = plan_rebalance(7054.19, np.array([0.0]), np.array([4.0]), np.array([1.0]))
+    assert deltas.tolist() == [1763.5475]
+    assert deltas[0] * 4.0 <= 7054.19
+
+
+def test_plan_rebalance_buys_never_exceed_cash():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        cash = round(float(rng.uniform(1, 20000)), 2)
+        price = round(float(rng.uniform(1, 500)), 2)
+        deltas = plan_rebalance(cash, np.array([0.0]), np.array([price]), np.array([1.0]))
+        assert deltas[0] * price <= cash
+
+
+async def _positions(client) -> dict[str, float]:
+    data = (await client.get("/api/portfolio")).json()
+    return {p["ticker"]: p["quantity"] for p in data["positions"]}
+
+
+async def test_rebalance_executes_sells_first_in_one_call(client):
+    await client.post("/api/portfolio/trade", json={"ticker": "TSLA", "quantity": 36, "side": "buy"})
+    # 1000 cash + 9000 TSLA; target needs the TSLA proceeds to fund the buys
+    resp = await client.post(
+        "/api/portfolio/rebalance",
+        json={"weights": {"aapl": 0.5, "MSFT": 0.4}, "fractional": False},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [(t["side"], t["ticker"]) for t in data["trades"]] == [
+        ("sell", "TSLA"), ("buy", "AAPL"), ("buy", "MSFT"),
+    ]
+    assert await _positions(client) == {"AAPL": 50.0, "MSFT": 10.0}
+    assert data["cash_balance"] == 1000.0
+    assert data["total_value"] == 10000.0
+
+
+async def test_fractional_rebalance(client):
+    resp = await client.post("/api/portfolio/rebalance", json={"weights": {"MSFT": 0.333}})
+    assert resp.status_code == 200
+    assert await _positions(client) == {"MSFT": pytest.approx(8.325)}
+
+
+async def test_rebalance_is_noop_when_on_target(client):
+    await client.post("/api/portfolio/rebalance", json={"weights": {"AAPL": 1.0}})
+    resp = await client.post("/api/portfolio/rebalance", json={"weights": {"AAPL": 1.0}})
+    assert resp.json()["trades"] == []
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [{"AAPL": 0.7, "MSFT": 0.4}, {"AAPL": -0.1}, {"ZZZZ": 0.1}],
+)
+async def test_rebalance_validation(client, weights):
+    resp = await client.post("/api/portfolio/rebalance", json={"weights": weights})
+    assert resp.status_code == 400
+    assert await _positions(client) == {}
@@ -0,0 +1,88 @@
+"""Tests for the historical replay market data provider."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.market.cache import price_cache
+from app.market.models import PriceUpdate
+from app.market.replay import ReplayProvider, _parse_speed, iter_ticks
+from app.market.tickstore import TickRecorder
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    price_cache.clear()
+    yield
+    price_cache.clear()
+
+
+def _write_csv(path):
+    path.write_text(
+        "timestamp,ticker,price\n"
+        "1000.0,AAPL,150.0\n"
+        "1000.0,MSFT,420.0\n"
+        "1000.5,AAPL,151.0\n"
+        "2024-01-02T00:00:00Z,AAPL,152.0\n"
+    )
+
+
+def test_iter_csv_parses_epoch_and_iso(tmp_path):
+    path = tmp_path / "ticks.csv"
+    _write_csv(path)
+    ticks = list(iter_ticks(path))
+    assert ticks[0] == (1000.0, "AAPL", 150.0)
+    assert ticks[3][0] == 1704153600.0
+
+
+def test_iter_npz(tmp_path):
+    path = tmp_path / "ticks.npz"
+    np.savez(path, ts=np.array([1.0, 2.0]), ticker=np.array(["AAPL", "V"]), price=np.array([1.5, 2.5]))
+    assert list(iter_ticks(path)) == [(1.0, "AAPL", 1.5), (2.0, "V", 2.5)]
+
+
+def test_iter_tick_store_directory(tmp_path):
+    rec = TickRecorder(tmp_path)
+    update = PriceUpdate(ticker="AAPL", price=150.0, previous_price=150.0, timestamp="", direction="flat")
+    rec.record([update], 1000.0)
+    rec.flush()
+    assert list(iter_ticks(tmp_path)) == [(1000.0, "AAPL", 150.0)]
+
+
+def test_unsupported_extension(tmp_path):
+    with pytest.raises(ValueError):
+        iter_ticks(tmp_path / "ticks.xlsx")
+
+
+def test_parse_speed():
+    assert _parse_speed("1") == 1.0
+    assert _parse_speed("10") == 10.0
+    assert _parse_speed("max") == 0.0
+
+
+async def test_replay_as_fast_as_possible_batches_by_timestamp(tmp_path):
+    path = tmp_path / "ticks.csv"
+    _write_csv(path)
+    provider = ReplayProvider(path, speed=0)
+    generation = price_cache.generation
+    await provider.start()
+    await asyncio.wait_for(provider._task, timeout=2)
+
+    assert provider.ticks_replayed == 4
+    assert price_cache.get("AAPL").price == 152.0
+    assert price_cache.get("MSFT").price == 420.0
+    # Three distinct timestamps -> three batches
+    assert price_cache.generation - generation == 3
+
+
+async def test_replay_accelerated_respects_spacing(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text("timestamp,ticker,price\n0,AAPL,1\n10,AAPL,2\n")
+    provider = ReplayProvider(path, speed=100)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await provider.start()
+    await asyncio.wait_for(provider._task, timeout=2)
+    assert loop.time() - started >= 0.09
+    assert price_cache.get("AAPL").price == 2.0
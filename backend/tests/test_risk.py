@@ -0,0 +1,107 @@
+"""Tests for the portfolio risk endpoint."""
+
+import numpy as np
+import pytest
+
+import app.risk as risk
+from app.market.cache import price_cache
+from app.market.history import tick_history
+from app.risk import compute_risk, sample_prices
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    tick_history.clear()
+    risk._cache = None
+    yield
+    tick_history.clear()
+    price_cache.clear()
+
+
+def _record_ticks(paths: dict[str, np.ndarray], start: float = 1_000_000.0, step: float = 1.0):
+    for k in range(len(next(iter(paths.values())))):
+        batch = price_cache.update_many({t: float(p[k]) for t, p in paths.items()})
+        tick_history.record(batch, start + k * step)
+
+
+def test_compute_risk_weights_and_beta():
+    rng = np.random.default_rng(0)
+    base = 100 * np.cumprod(1 + rng.normal(0, 0.01, 200))
+    matrix = np.column_stack((base, base * 2))  # identical returns
+    stats = compute_risk(
+        cash=1000.0,
+        quantities={"A": 10, "B": 5},
+        prices={"A": 100.0, "B": 200.0},
+        universe=["A", "B"],
+        matrix=matrix,
+        interval=1.0,
+    )
+    assert stats["total_value"] == 3000.0
+    assert stats["weights"] == {"A": pytest.approx(1 / 3, abs=1e-6), "B": pytest.approx(1 / 3, abs=1e-6)}
+    assert stats["hhi"] == 0.5
+    assert stats["effective_positions"] == 2.0
+    assert stats["beta"] == {"A": 1.0, "B": 1.0}
+    assert stats["portfolio_beta"] == pytest.approx(2 / 3, abs=1e-4)
+    assert stats["correlation"]["matrix"] == [[1.0, 1.0], [1.0, 1.0]]
+    assert stats["volatility"]["A"] == pytest.approx(stats["volatility"]["B"])
+    assert stats["var_99"] >= stats["var_95"] > 0
+    assert len(stats["rolling_volatility"]) == 199 - risk.ROLLING_POINTS + 1
+
+
+def test_compute_risk_without_history():
+    stats = compute_risk(500.0, {"A": 1}, {"A": 100.0}, [], np.empty((0, 0)), 1.0)
+    assert stats["samples"] == 0
+    assert "volatility" not in stats
+
+
+def test_sample_prices_aligns_series():
+    _record_ticks({"A": np.arange(1.0, 11.0), "B": np.arange(11.0, 21.0)})
+    names, matrix, excluded = sample_prices(["A", "B", "C"], lookback=4, interval=2)
+    assert names == ["A", "B"]
+    assert matrix.tolist() == [[6.0, 16.0], [8.0, 18.0], [10.0, 20.0]]
+    assert excluded == ["C"]
+
+
+def test_sample_prices_drops_short_history_tickers_not_rows():
+    _record_ticks({"A": np.arange(1.0, 11.0), "B": np.arange(11.0, 21.0)})
+    _record_ticks({"NEW": np.array([5.0, 6.0])}, start=1_000_008.0)
+    names, matrix, excluded = sample_prices(["A", "B", "NEW"], lookback=8, interval=2)
+    assert names == ["A", "B"]
+    assert len(matrix) == 5
+    assert excluded == ["NEW"]
+
+
+def test_sample_prices_starts_at_longest_history():
+    _record_ticks({"A": np.arange(1.0, 5.0), "B": np.arange(11.0, 15.0)})
+    names, matrix, excluded = sample_prices(["A", "B"], lookback=60, interval=1)
+    assert names == ["A", "B"]
+    assert matrix[0].tolist() == [1.0, 11.0]
+    assert excluded == []
+
+
+async def test_risk_endpoint_is_cached_per_generation(client):
+    rng = np.random.default_rng(1)
+    paths = {t: 100 * np.cumprod(1 + rng.normal(0, 0.002, 400)) for t in ("AAPL", "MSFT", "TSLA")}
+    _record_ticks(paths)
+    await client.post("/api/portfolio/trade", json={"ticker": "AAPL", "quantity": 10, "side": "buy"})
+    await client.post("/api/portfolio/trade", json={"ticker": "TSLA", "quantity": 5, "side": "buy"})
+
+    first = await client.get("/api/portfolio/risk", params={"lookback": "5m", "interval": "5s"})
+    assert first.status_code == 200
+    data = first.json()
+    assert data["samples"] == 60
+    assert set(data["weights"]) == {"AAPL", "TSLA"}
+    assert data["correlation"]["tickers"] == ["AAPL", "TSLA"]
+    assert data["portfolio_beta"] is not None
+
+    cached = risk._cache
+    await client.get("/api/portfolio/risk", params={"lookback": "5m", "interval": "5s"})
+    assert risk._cache is cached
+
+    price_cache.update("AAPL", 101.0)
+    await client.get("/api/portfolio/risk", params={"lookback": "5m", "interval": "5s"})
+    assert risk._cache is not cached
+
+
+async def test_risk_rejects_bad_interval(client):
+    assert (await client.get("/api/portfolio/risk", params={"interval": "soon"})).status_code == 400
@@ -0,0 +1,219 @@
+"""Tests for the shared-memory price table used across uvicorn workers."""
+
+import asyncio
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from app.market.cache import price_cache
+from app.market.interface import MarketDataProvider
+from app.market.models import PriceUpdate
+from app.market.shared import (
+    POLL_INTERVAL,
+    SharedMarket,
+    SharedPriceTable,
+    _lock_path,
+    _slots_lock_path,
+    _try_lock,
+)
+
+
+def _update(ticker: str, price: float, prev: float | None = None) -> PriceUpdate:
+    return PriceUpdate(
+        ticker=ticker,
+        price=price,
+        previous_price=price if prev is None else prev,
+        timestamp="",
+        direction="flat",
+    )
+
+
+@pytest.fixture
+def table_name():
+    name = f"finally_test_{uuid.uuid4().hex[:8]}"
+    yield name
+    try:
+        table = SharedPriceTable.open(name)
+    except FileNotFoundError:
+        return
+    table.unlink()
+    table.close()
+
+
+def test_writer_and_reader_share_slots(table_name):
+    writer = SharedPriceTable.open(table_name, capacity=8, create=True)
+    reader = SharedPriceTable.open(table_name)
+    try:
+        writer.write([_update("AAPL", 150.0), _update("MSFT", 420.0)], 1.0)
+        last_seq = np.zeros(reader.capacity, dtype="<u8")
+        tickers, prices, _ = reader.read_changed(last_seq)
+        assert tickers == ["AAPL", "MSFT"]
+        assert prices.tolist() == [150.0, 420.0]
+
+        writer.write([_update("MSFT", 421.0, 420.0)], 2.0)
+        tickers, prices, _ = reader.read_changed(last_seq)
+        assert tickers == ["MSFT"]
+        assert prices.tolist() == [421.0]
+        assert reader.generation == 2
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_read_updates_keep_producer_quotes(table_name):
+    writer = SharedPriceTable.open(table_name, capacity=8, create=True)
+    reader = SharedPriceTable.open(table_name)
+    try:
+        writer.write([_update("AAPL", 151.0, 150.0)], 1767225600.0)
+        writer.write([_update("MSFT", 419.0, 420.0)], 1767225600.5)
+        batches = reader.read_updates(np.zeros(reader.capacity, dtype="<u8"))
+        assert sorted(batches) == [1767225600.0, 1767225600.5]
+        (aapl,) = batches[1767225600.0]
+        assert (aapl.ticker, aapl.price, aapl.previous_price, aapl.direction) == (
+            "AAPL", 151.0, 150.0, "up",
+        )
+        assert aapl.timestamp == "2026-01-01T00:00:00+00:00"
+        assert batches[1767225600.5][0].direction == "down"
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_skips_slot_mid_write(table_name):
+    writer = SharedPriceTable.open(table_name, capacity=4, create=True)
+    try:
+        writer.write([_update("AAPL", 150.0)], 1.0)
+        writer._seq[0] += 1  # simulate a writer paused mid-update
+        last_seq = np.zeros(writer.capacity, dtype="<u8")
+        tickers, _, _ = writer.read_changed(last_seq)
+        assert tickers == []
+    finally:
+        writer.close()
+
+
+def test_table_full(table_name):
+    writer = SharedPriceTable.open(table_name, capacity=1, create=True)
+    try:
+        writer.write([_update("AAPL", 150.0)], 1.0)
+        with pytest.raises(RuntimeError):
+            writer.write([_update("MSFT", 420.0)], 1.0)
+    finally:
+        writer.close()
+
+
+def test_attach_without_segment_raises(table_name):
+    with pytest.raises(FileNotFoundError):
+        SharedPriceTable.open(table_name)
+
+
+def test_lock_is_exclusive(tmp_path):
+    path = tmp_path / "market.lock"
+    fd = _try_lock(path)
+    assert fd is not None
+    try:
+        assert _try_lock(path) is None
+    finally:
+        os.close(fd)
+    fd = _try_lock(path)
+    assert fd is not None
+    os.close(fd)
+
+
+class _FakeProvider(MarketDataProvider):
+    started = False
+
+    async def start(self) -> None:
+        self.started = True
+        price_cache.update("AAPL", 150.0)
+
+    async def stop(self) -> None:
+        self.started = False
+
+
+async def test_first_worker_becomes_producer(table_name, db):
+    producer = SharedMarket(_FakeProvider, name=table_name, capacity=8)
+    reader = SharedMarket(_FakeProvider, name=table_name, capacity=8)
+    try:
+        await producer.start()
+        await reader.start()
+        assert producer.is_producer
+        assert not reader.is_producer
+        assert _lock_path().exists()
+
+        table = SharedPriceTable.open(table_name)
+        tickers, prices, _ = table.read_changed(np.zeros(table.capacity, dtype="<u8"))
+        table.close()
+        assert tickers == ["AAPL"]
+        assert prices.tolist() == [150.0]
+    finally:
+        await reader.stop()
+        await producer.stop()
+        price_cache.clear()
+
+
+async def test_producer_tracks_tickers_registered_by_readers(table_name, db):
+    producer = SharedMarket(_FakeProvider, name=table_name, capacity=8)
+    try:
+        await producer.start()
+        reader_table = SharedPriceTable.open(table_name, lock_path=_slots_lock_path())
+        reader_table.register("PYPL")
+        assert reader_table.tickers() == ["AAPL", "PYPL"]
+        reader_table.close()
+        await asyncio.sleep(POLL_INTERVAL * 2)
+        assert "PYPL" in price_cache.tickers
+    finally:
+        await producer.stop()
+        price_cache.clear()
+
+
+class _RecordingProvider(_FakeProvider):
+    restored: dict | None = None
+
+    def restore_state(self, state: dict) -> None:
+        self.restored = state
+
+
+async def test_takeover_continues_from_shared_prices(table_name, db):
+    table = SharedPriceTable.open(table_name, capacity=8, create=True)
+    table.write([_update("AAPL", 175.5)], 1.0)
+    table.close()
+    market = SharedMarket(_RecordingProvider, name=table_name, capacity=8)
+    try:
+        await market.start()
+        assert market.is_producer
+        assert market._provider.restored == {"prices": {"AAPL": 175.5}}
+    finally:
+        await market.stop()
+        price_cache.clear()
+
+
+class _ReaderProvider(_FakeProvider):
+    producing = False
+
+    @property
+    def is_producer(self) -> bool:
+        return self.producing
+
+
+async def test_only_the_producer_records_ticks_and_snapshots(db, tmp_path, monkeypatch):
+    import app.main as main
+    import app.snapshots as snapshots
+
+    monkeypatch.setenv("MARKET_CHECKPOINT", "false")
+    monkeypatch.setenv("TICK_STORE", "true")
+    monkeypatch.setenv("TICK_STORE_DIR", str(tmp_path / "ticks"))
+    monkeypatch.setenv("LLM_MOCK", "true")
+    provider = _ReaderProvider()
+    monkeypatch.setattr(main, "create_provider", lambda: provider)
+    async with main.lifespan(main.app):
+        assert snapshots._recorder is None
+        provider.producing = True  # took over
+        for _ in range(30):
+            if snapshots._recorder is not None:
+                break
+            await asyncio.sleep(0.1)
+        assert snapshots._recorder is not None
+    assert snapshots._recorder is None
+    price_cache.clear()
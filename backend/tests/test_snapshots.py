@@ -0,0 +1,99 @@
+"""Tests for the change-driven snapshot recorder."""
+
+import sqlite3
+
+import pytest
+
+import app.database as database
+import app.snapshots as snapshots
+from app.market.cache import price_cache
+from app.portfolio import add_change_listener, remove_change_listener
+from app.snapshots import SnapshotRecorder
+
+
+@pytest.fixture
+async def recorder(db):
+    price_cache.update("AAPL", 100.0)
+    rec = SnapshotRecorder(change_pct=1.0, max_interval=60.0)
+    price_cache.add_listener(rec.on_prices)
+    add_change_listener(rec.on_portfolio_change)
+    yield rec
+    price_cache.remove_listener(rec.on_prices)
+    remove_change_listener(rec.on_portfolio_change)
+    price_cache.clear()
+
+
+def _snapshot_values() -> list[float]:
+    conn = sqlite3.connect(database.DB_PATH)
+    rows = conn.execute("SELECT total_value FROM portfolio_snapshots ORDER BY recorded_at").fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+async def _buy(client, qty):
+    resp = await client.post("/api/portfolio/trade", json={"ticker": "AAPL", "quantity": qty, "side": "buy"})
+    assert resp.status_code == 200
+
+
+async def test_idle_market_writes_nothing(recorder):
+    assert await recorder.check()  # baseline
+    assert not await recorder.check()
+    price_cache.update("AAPL", 120.0)  # not held
+    assert not await recorder.check()
+    assert recorder.writes == 1
+
+
+async def test_trade_burst_is_one_snapshot(client, recorder):
+    await recorder.check()
+    for _ in range(5):
+        await _buy(client, 1)
+    assert await recorder.check()
+    assert not await recorder.check()
+    assert len(_snapshot_values()) == 2
+
+
+async def test_threshold_and_max_interval(client, recorder):
+    await _buy(client, 50)  # 5000 cash + 5000 AAPL
+    await recorder.check()
+
+    price_cache.update("AAPL", 100.5)  # +0.25% of value, under threshold
+    assert not await recorder.check()
+    price_cache.update("AAPL", 102.5)  # +1.25%
+    assert await recorder.check()
+
+    price_cache.update("AAPL", 102.6)
+    assert not await recorder.check()
+    recorder.max_interval = 0.0
+    assert await recorder.check()
+    assert _snapshot_values() == [10000.0, 10125.0, 10130.0]
+
+
+async def test_checks_that_write_nothing_leave_the_database_alone(client, recorder, monkeypatch):
+    await _buy(client, 50)
+    await recorder.check()
+    opened = []
+    real_get_db = snapshots.get_db
+
+    async def counting_get_db():
+        opened.append(1)
+        return await real_get_db()
+
+    monkeypatch.setattr(snapshots, "get_db", counting_get_db)
+    price_cache.update("AAPL", 100.5)  # under threshold
+    assert not await recorder.check()
+    assert opened == []
+
+
+async def test_failed_reload_keeps_the_change_for_the_next_check(client, recorder, monkeypatch):
+    await recorder.check()
+    await _buy(client, 1)
+
+    async def broken_get_db():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(snapshots, "get_db", broken_get_db)
+    with pytest.raises(sqlite3.OperationalError):
+        await recorder.check()
+    monkeypatch.undo()
+    assert await recorder.check()
+    assert _snapshot_values() == [10000.0, 10000.0]
@@ -0,0 +1,62 @@
+"""Tests for the WebSocket binary price stream."""
+
+import numpy as np
+import pytest
+from starlette.testclient import TestClient
+
+from app.main import app
+from app.market.cache import price_cache
+from app.market.stream import FRAME_DTYPE, encode_frame
+
+
+@pytest.fixture(autouse=True)
+def seed_prices():
+    price_cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    yield
+    price_cache.clear()
+
+
+def _decode(frame: bytes) -> np.ndarray:
+    return np.frombuffer(frame, dtype=FRAME_DTYPE)
+
+
+def test_encode_frame_is_packed():
+    frame = encode_frame([(0, 150.0, 1.0), (1, 420.0, 2.0)])
+    assert len(frame) == 2 * 18
+    records = _decode(frame)
+    assert records["sym"].tolist() == [0, 1]
+    assert records["price"].tolist() == [150.0, 420.0]
+
+
+def test_subscribe_sends_symbols_and_snapshot():
+    with TestClient(app).websocket_connect("/api/ws/prices") as ws:
+        ws.send_json({"action": "subscribe", "tickers": ["aapl"]})
+        assert ws.receive_json() == {"type": "symbols", "symbols": {"AAPL": 0}}
+        records = _decode(ws.receive_bytes())
+        assert records["sym"].tolist() == [0]
+        assert records["price"].tolist() == [150.0]
+
+
+def test_only_subscribed_tickers_are_pushed():
+    with TestClient(app).websocket_connect("/api/ws/prices") as ws:
+        ws.send_json({"action": "subscribe", "tickers": ["MSFT"]})
+        ws.receive_json()
+        ws.receive_bytes()  # snapshot
+
+        price_cache.update("AAPL", 151.0)
+        price_cache.update("MSFT", 421.0)
+        records = _decode(ws.receive_bytes())
+        assert records["sym"].tolist() == [0]
+        assert records["price"].tolist() == [421.0]
+
+
+def test_unsubscribe_and_invalid_messages():
+    with TestClient(app).websocket_connect("/api/ws/prices") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json({"action": "subscribe", "tickers": ["AAPL", "MSFT"]})
+        assert ws.receive_json()["symbols"] == {"AAPL": 0, "MSFT": 1}
+        ws.receive_bytes()
+        ws.send_json({"action": "unsubscribe", "tickers": ["AAPL"]})
+        assert ws.receive_json()["symbols"] == {"MSFT": 1}
@@ -0,0 +1,129 @@
+"""Tests for the persisted append-only tick store."""
+
+import asyncio
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.market.cache import PriceCache
+from app.market.models import PriceUpdate
+from app.market.tickstore import TickRecorder, TickStoreReader, day_bounds
+
+DAY1 = day_bounds(date(2026, 1, 2))[0]
+DAY2 = day_bounds(date(2026, 1, 3))[0]
+
+
+def _update(ticker: str, price: float) -> PriceUpdate:
+    return PriceUpdate(ticker=ticker, price=price, previous_price=price, timestamp="", direction="flat")
+
+
+def test_recorder_writes_columns_per_day(tmp_path):
+    rec = TickRecorder(tmp_path)
+    rec.record([_update("AAPL", 150.0), _update("MSFT", 420.0)], DAY1 + 10)
+    rec.record([_update("AAPL", 151.0)], DAY2 + 5)
+    rec.flush()
+
+    assert (tmp_path / "symbols.txt").read_text().split() == ["AAPL", "MSFT"]
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ["2026-01-02", "2026-01-03"]
+    assert np.fromfile(tmp_path / "2026-01-02" / "px.f8").tolist() == [150.0, 420.0]
+
+
+def test_reader_range_query_is_zero_copy_within_a_day(tmp_path):
+    rec = TickRecorder(tmp_path)
+    for i in range(10):
+        rec.record([_update("AAPL", 100.0 + i)], DAY1 + i)
+    rec.flush()
+
+    cols = TickStoreReader(tmp_path).query(DAY1 + 3, DAY1 + 6)
+    assert cols["px"].tolist() == [103.0, 104.0, 105.0]
+    assert isinstance(cols["px"], np.memmap)
+
+
+def test_reader_filters_ticker_across_days(tmp_path):
+    rec = TickRecorder(tmp_path)
+    rec.record([_update("AAPL", 150.0), _update("MSFT", 420.0)], DAY1 + 1)
+    rec.record([_update("AAPL", 152.0), _update("MSFT", 421.0)], DAY2 + 1)
+    rec.flush()
+
+    ts, px = TickStoreReader(tmp_path).series("MSFT", DAY1, DAY2 + 86400)
+    assert px.tolist() == [420.0, 421.0]
+    assert ts.tolist() == [DAY1 + 1, DAY2 + 1]
+
+
+def test_reader_ignores_torn_trailing_rows(tmp_path):
+    rec = TickRecorder(tmp_path)
+    rec.record([_update("AAPL", 150.0)], DAY1)
+    rec.flush()
+    with open(tmp_path / "2026-01-02" / "px.f8", "ab") as f:
+        np.array([999.0]).tofile(f)
+
+    cols = TickStoreReader(tmp_path).query(DAY1, DAY1 + 60)
+    assert cols["px"].tolist() == [150.0]
+
+
+def test_recorder_resumes_symbol_ids(tmp_path):
+    rec = TickRecorder(tmp_path)
+    rec.record([_update("AAPL", 150.0)], DAY1)
+    rec.flush()
+
+    rec = TickRecorder(tmp_path)
+    rec.record([_update("MSFT", 420.0), _update("AAPL", 151.0)], DAY1 + 1)
+    rec.flush()
+    reader = TickStoreReader(tmp_path)
+    assert reader.symbols == ["AAPL", "MSFT"]
+    assert reader.query(DAY1, DAY1 + 60)["sym"].tolist() == [0, 1, 0]
+
+
+def test_recorder_as_cache_listener(tmp_path):
+    cache = PriceCache()
+    rec = TickRecorder(tmp_path)
+    cache.add_listener(rec.record)
+    cache.update_many({"AAPL": 150.0, "MSFT": 420.0})
+    rec.flush()
+    reader = TickStoreReader(tmp_path)
+    day = reader.days()[0]
+    assert len(reader.map_day(day)["px"]) == 2
+
+
+def test_failed_flush_keeps_columns_aligned_on_retry(tmp_path, monkeypatch):
+    import app.market.tickstore as tickstore
+
+    rec = TickRecorder(tmp_path)
+    rec.record([_update("AAPL", 150.0)], DAY1)
+    rec.flush()
+
+    real_open = open
+
+    def failing_open(path, mode="r", *args, **kwargs):
+        if str(path).endswith("px.f8"):
+            raise OSError("disk full")
+        return real_open(path, mode, *args, **kwargs)
+
+    rec.record([_update("AAPL", 151.0), _update("AAPL", 152.0)], DAY1 + 1)
+    monkeypatch.setattr(tickstore, "open", failing_open, raising=False)
+    with pytest.raises(OSError):
+        rec.flush()
+    monkeypatch.undo()
+    rec.record([_update("AAPL", 153.0)], DAY1 + 2)
+    rec.flush()
+
+    cols = TickStoreReader(tmp_path).map_day("2026-01-02")
+    assert {name: len(col) for name, col in cols.items()} == {"ts": 4, "sym": 4, "px": 4}
+    assert cols["ts"].tolist() == [DAY1, DAY1 + 1, DAY1 + 1, DAY1 + 2]
+    assert cols["px"].tolist() == [150.0, 151.0, 152.0, 153.0]
+
+
+async def test_recorder_task_flushes_off_the_loop_and_on_stop(tmp_path):
+    rec = TickRecorder(tmp_path, flush_interval=60, flush_size=2)
+    rec.start()
+    rec.record([_update("AAPL", 150.0), _update("MSFT", 420.0)], DAY1)
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if TickStoreReader(tmp_path).map_day("2026-01-02") is not None:
+            break
+    assert len(TickStoreReader(tmp_path).map_day("2026-01-02")["px"]) == 2  # early flush
+
+    rec.record([_update("AAPL", 151.0)], DAY1 + 1)
+    await rec.stop()
+    assert len(TickStoreReader(tmp_path).map_day("2026-01-02")["px"]) == 3
@@ -0,0 +1,121 @@
+"""Tests for the trade blotter: keyset pagination, filters and export."""
+
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+import app.database as database
+from app.database import ms_to_iso
+from app.portfolio import TRADE_SELECT
+
+
+JAN_1_2026_MS = 1767225600000
+DAY_MS = 86_400_000
+
+
+def _seed_trades(n: int) -> list[dict]:
+    rows = [
+        {
+            "id": str(i + 1),
+            "ticker": ("AAPL", "MSFT", "TSLA")[i % 3],
+            "side": "buy" if i % 2 == 0 else "sell",
+            "quantity": 1.0 + i,
+            "price": 100.0 + i,
+            # Pairs share a timestamp to exercise the id tie-breaker
+            "ms": JAN_1_2026_MS + (i // 20) * DAY_MS + (i // 2) % 60 * 1000,
+        }
+        for i in range(n)
+    ]
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.executemany(
+        "INSERT INTO trades (id, user_id, ticker, side, quantity, price, executed_at) "
+        "VALUES (:id, 'default', :ticker, :side, :quantity, :price, :ms)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    return [dict(r, executed_at=ms_to_iso(r.pop("ms"))) for r in rows]
+
+
+async def _all_pages(client, **params) -> list[dict]:
+    trades, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        page = (await client.get("/api/portfolio/trades", params=query)).json()
+        trades.extend(page["trades"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return trades
+
+
+async def test_pages_cover_every_trade_once_newest_first(client):
+    rows = _seed_trades(95)
+    trades = await _all_pages(client, limit=10)
+    expected = sorted(rows, key=lambda r: (r["executed_at"], int(r["id"])), reverse=True)
+    assert [t["id"] for t in trades] == [r["id"] for r in expected]
+    assert trades[0]["executed_at"] == expected[0]["executed_at"]
+
+
+async def test_filters(client):
+    rows = _seed_trades(60)
+    trades = await _all_pages(client, ticker="msft", side="sell", limit=7)
+    expected = {r["id"] for r in rows if r["ticker"] == "MSFT" and r["side"] == "sell"}
+    assert {t["id"] for t in trades} == expected
+
+    trades = await _all_pages(client, since="2026-01-02", until="2026-01-03")
+    assert {t["id"] for t in trades} == {r["id"] for r in rows if r["executed_at"].startswith("2026-01-02")}
+
+    resp = await client.get("/api/portfolio/trades", params={"since": "yesterday"})
+    assert resp.status_code == 400
+
+
+async def test_empty_and_invalid_cursor(client):
+    page = (await client.get("/api/portfolio/trades")).json()
+    assert page == {"trades": [], "next_cursor": None}
+    resp = await client.get("/api/portfolio/trades", params={"cursor": "garbage"})
+    assert resp.status_code == 400
+
+
+async def test_export_csv_and_ndjson(client):
+    rows = _seed_trades(2500)
+    resp = await client.get("/api/portfolio/trades/export", params={"format": "csv", "ticker": "AAPL"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    exported = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["id"] for r in exported] == sorted(
+        (r["id"] for r in rows if r["ticker"] == "AAPL"),
+        key=lambda i: (rows[int(i) - 1]["executed_at"], int(i)),
+    )
+
+    resp = await client.get("/api/portfolio/trades/export", params={"format": "ndjson"})
+    lines = resp.text.splitlines()
+    assert len(lines) == 2500
+    assert json.loads(lines[0]) == {
+        "id": "1", "ticker": "AAPL", "side": "buy", "quantity": 1.0, "price": 100.0,
+        "executed_at": "2026-01-01T00:00:00.000Z",
+    }
+
+    resp = await client.get("/api/portfolio/trades/export", params={"format": "xml"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize(
+    ("where", "index"),
+    [
+        ("user_id = 'default'", "idx_trades_user_time"),
+        ("user_id = 'default' AND ticker = 'AAPL'", "idx_trades_user_ticker_time"),
+    ],
+)
+async def test_blotter_queries_use_indexes(db, where, index):
+    conn = sqlite3.connect(database.DB_PATH)
+    plan = conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT {TRADE_SELECT} FROM trades WHERE {where} "
+        "AND (trades.executed_at, trades.id) < (1, 2) "
+        "ORDER BY trades.executed_at DESC, trades.id DESC LIMIT 51"
+    ).fetchall()
+    conn.close()
+    assert any(index in row[-1] for row in plan)
+    assert not any("TEMP B-TREE" in row[-1] for row in plan)
@@ -41,6 +41,7 @@ vi.mock("@/lib/api", () => ({
     getPortfolio: vi.fn(),
     trade: vi.fn(),
     getPortfolioHistory: vi.fn(),
+    getPrices: vi.fn(),
     getWatchlist: vi.fn(),
     addTicker: vi.fn(),
     removeTicker: vi.fn(),
@@ -56,6 +57,15 @@ describe("Portfolio Page Integration", () => {
   beforeEach(() => {
     vi.clearAllMocks();
     vi.mocked(api.getWatchlist).mockResolvedValue([]);
+    vi.mocked(api.getPrices).mockResolvedValue({
+      tickers: [],
+      price: [],
+      previous_price: [],
+      direction: [],
+      timestamp: [],
+      series_time: [],
+      series_price: [],
+    });
     vi.mocked(api.getPortfolioHistory).mockResolvedValue([]);
   });
 
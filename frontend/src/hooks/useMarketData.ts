@@ -2,6 +2,7 @@
 
 import { useEffect, useRef, useState, useCallback, useMemo } from "react";
 import type { ConnectionStatus } from "@/components/Header";
+import { api } from "@/lib/api";
 
 export interface PriceUpdate {
   ticker: string;
@@ -66,6 +67,42 @@ export function useMarketData() {
     };
   }, []);
 
+  // Seed quotes and sparklines from server-side history so a reload
+  // doesn't start from empty charts; streamed ticks keep priority.
+  useEffect(() => {
+    let cancelled = false;
+    api
+      .getPrices()
+      .then((data) => {
+        if (cancelled) return;
+        const h = historyRef.current;
+        const seeded: PriceMap = {};
+        data.tickers.forEach((ticker, i) => {
+          seeded[ticker] = {
+            ticker,
+            price: data.price[i],
+            previous_price: data.previous_price[i],
+            timestamp: data.timestamp[i],
+            direction: data.direction[i],
+          };
+          if (!h[ticker]?.length) {
+            h[ticker] = data.series_time[i].map((t, j) => ({
+              price: data.series_price[i][j],
+              time: new Date(t * 1000).toISOString(),
+            }));
+          }
+        });
+        setPrices((prev) => ({ ...seeded, ...prev }));
+        setHistoryVersion((v) => v + 1);
+      })
+      .catch(() => {
+        // The stream fills history on its own
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, []);
+
   useEffect(() => {
     connect();
     return () => {
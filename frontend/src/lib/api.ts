@@ -22,6 +22,7 @@ export const api = {
       body: JSON.stringify(body),
     }),
   getPortfolioHistory: () => apiFetch<SnapshotResponse[]>("/portfolio/history"),
+  getPrices: (points = 60) => apiFetch<PricesResponse>(`/prices?points=${points}`),
   getWatchlist: () => apiFetch<WatchlistItem[]>("/watchlist"),
   addTicker: (ticker: string) =>
     apiFetch<WatchlistItem>("/watchlist", {
@@ -76,6 +77,17 @@ export interface WatchlistItem {
   change_percent?: number;
 }
 
+/* Columnar: index i of every array belongs to tickers[i] */
+export interface PricesResponse {
+  tickers: string[];
+  price: number[];
+  previous_price: number[];
+  direction: ("up" | "down" | "flat")[];
+  timestamp: string[];
+  series_time: number[][];
+  series_price: number[][];
+}
+
 export interface SnapshotResponse {
   total_value: number;
   recorded_at: string;